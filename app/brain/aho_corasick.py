@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AHO–CORASICK MULTI-PATTERN MATCHER
+✅ Bütün phrase-lər BİR avtomata kompilyasiya olunur
+✅ Mesaj BİR DƏFƏ skan edilir - phrase sayından asılı deyil
+✅ Hər phrase-ə istənilən payload bağlana bilər (kateqoriya, prioritet və s.)
+"""
+
+from collections import deque
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+class AhoCorasick:
+    """
+    Substring (include) məntiqi ilə eyni nəticə:
+    phrase in text  ⇔  phrase avtomatda tapılır
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]] = ()):
+        # Node 0 - root
+        self._goto: List[dict] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Any, ...]] = [()]
+        self.pattern_count = 0
+
+        for pattern, payload in patterns:
+            self._add(pattern, payload)
+        self._build()
+
+    def _add(self, pattern: str, payload: Any) -> None:
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node] = self._out[node] + (payload,)
+        self.pattern_count += 1
+
+    def _build(self) -> None:
+        """BFS ilə fail linklərini qur və output-ları birləşdir"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __bool__(self) -> bool:
+        return self.pattern_count > 0
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """(bitmə indeksi, payload) cütlərini qaytarır"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                for payload in out[node]:
+                    yield i, payload
+
+    def payloads(self, text: str) -> set:
+        """Mətndə tapılan bütün payload-lar (unikal)"""
+        return {payload for _, payload in self.iter_matches(text)}
+
+    def contains_any(self, text: str) -> bool:
+        """Heç olmasa bir phrase varmı?"""
+        for _ in self.iter_matches(text):
+            return True
+        return False
+
+    def best(self, text: str) -> Optional[Any]:
+        """Ən kiçik payload (prioritet sırası üçün) - heç nə yoxdursa None"""
+        best = None
+        for _, payload in self.iter_matches(text):
+            if best is None or payload < best:
+                best = payload
+        return best
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BATCH KLASSİFİKASİYA - MİNLƏRLƏ MESAJ BİR ÇAĞIRIŞDA
+✅ Qaydalar hər prosesdə BİR DƏFƏ yüklənir
+✅ Nəticə sütun formatındadır (intent, mood, emotional_state, matched_phrase)
+✅ İstəyə görə ProcessPoolExecutor ilə paralel
+✅ conversations/*/*.jsonl tarixçəsini rule dəyişikliyindən sonra yenidən qiymətləndirmək üçün
+
+İstifadə:
+    python -m app.brain.batch app/storage/data/telegram/conversations --workers 4
+"""
+
+import argparse
+import contextlib
+import io
+import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.brain.deepthink import deepthink
+from app.brain.emotional_state.emotional_state_think import emotional_state_engine
+from app.brain.intent.intent_think import intent_think
+from app.brain.message_context import MessageContext
+from app.storage.conversation_log import ConversationLog
+
+COLUMNS = ("intent", "mood", "emotional_state", "category", "matched_phrase")
+
+_rule_matcher = None
+
+
+def _json_rule_matcher():
+    """memory.py JSON intent qaydaları - proses başına bir dəfə import olunur"""
+    global _rule_matcher
+    if _rule_matcher is None:
+        # memory.py import zamanı banner çap edir - batch üçün susdur
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app.storage.memory import _match_intent_rules
+        _rule_matcher = _match_intent_rules
+    return _rule_matcher
+
+
+def _classify_one(text: str) -> Tuple[Optional[str], str, str, str, str]:
+    ctx = MessageContext(text)
+
+    # 1. Mood (DeepThink - cache + avtomat, print yoxdur)
+    match = deepthink.match(ctx)
+    if match:
+        category, phrase = match
+        mood = "neutral" if category == "price_complaint" else deepthink.category_to_mood.get(category, "neutral")
+    else:
+        category, phrase, mood = "unknown", "", "neutral"
+
+    # 2. Intent (IntentThink, sonra JSON intent qaydaları)
+    intent = None
+    intent_match = intent_think.match(ctx)
+    if intent_match:
+        intent = intent_match[0]
+    else:
+        rule_match = _json_rule_matcher()(ctx.lowered_stripped)
+        if rule_match:
+            intent = rule_match[1]["intent"]
+
+    # 3. Emotional state
+    emotional_state, _ = emotional_state_engine.resolve(ctx, mood, intent)
+
+    return intent, mood, emotional_state, category, phrase
+
+
+def _classify_chunk(messages: List[str]) -> Dict[str, list]:
+    columns = {name: [] for name in COLUMNS}
+    for text in messages:
+        for name, value in zip(COLUMNS, _classify_one(text or "")):
+            columns[name].append(value)
+    return columns
+
+
+def classify_batch(messages: Iterable[str], workers: int = 0,
+                   chunk_size: int = 2000) -> Dict[str, list]:
+    """
+    Mesajları toplu klassifikasiya et.
+
+    Args:
+        messages: mətnlər
+        workers: >1 olduqda ProcessPoolExecutor istifadə olunur
+        chunk_size: prosesə göndərilən hissənin ölçüsü
+
+    Returns:
+        {"intent": [...], "mood": [...], "emotional_state": [...],
+         "category": [...], "matched_phrase": [...], "count": N}
+        Bütün siyahılar giriş sırası ilə düzülür
+    """
+    messages = list(messages)
+
+    if workers and workers > 1 and len(messages) > chunk_size:
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        columns = {name: [] for name in COLUMNS}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() sıranı saxlayır
+            for part in pool.map(_classify_chunk, chunks):
+                for name in COLUMNS:
+                    columns[name].extend(part[name])
+    else:
+        columns = _classify_chunk(messages)
+
+    columns["count"] = len(messages)
+    return columns
+
+
+def iter_conversation_messages(conversations_path: Path) -> Iterator[Tuple[str, str, dict]]:
+    """conversations/<user>/<date>.jsonl (və köhnə .json) fayllarından (user_id, tarix, entry) stream edir"""
+    yield from ConversationLog(Path(conversations_path)).iter_all()
+
+
+def rescore_conversations(conversations_path: Path, workers: int = 0) -> Dict[str, object]:
+    """Bütün tarixçəni yenidən qiymətləndir və xülasə qaytar"""
+    messages = [entry.get("user_message", "") for _, _, entry in iter_conversation_messages(conversations_path)]
+    columns = classify_batch(messages, workers=workers)
+
+    return {
+        "messages": columns["count"],
+        "intents": Counter(columns["intent"]).most_common(),
+        "moods": Counter(columns["mood"]).most_common(),
+        "emotional_states": Counter(columns["emotional_state"]).most_common(),
+        "unknown": columns["category"].count("unknown")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation tarixçəsini toplu yenidən qiymətləndir")
+    parser.add_argument("path", nargs="?", default="app/storage/data/telegram/conversations")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--out", default="", help="Xülasəni JSON faylına yaz")
+    args = parser.parse_args()
+
+    summary = rescore_conversations(Path(args.path), workers=args.workers)
+
+    print(f"📊 Mesaj sayı: {summary['messages']}")
+    print(f"❓ Unknown: {summary['unknown']}")
+    for key in ("intents", "moods", "emotional_states"):
+        print(f"\n{key}:")
+        for value, count in summary[key]:
+            print(f"   {value}: {count}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Yazıldı: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
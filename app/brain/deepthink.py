@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-DEEPTHINK - RULE-BASED EMOTION ENGINE v4.2
+DEEPTHINK - RULE-BASED EMOTION ENGINE v4.3
 🚨 PSYCHOLOGY FIX: Price Complaint → Mood RESET
 🚨 STATELESS: Keçmiş mood SAXLANMIR
 🚨 REAL HUMAN: Hər mesaj üçün SIFIRDAN hesablanır
+🔤 FUZZY: Exact match yoxdursa → silmə indeksi ("bahadi" → "bahadır")
 """
 
 import json
@@ -13,12 +14,23 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from app.brain.aho_corasick import AhoCorasick
+from app.brain.emotional_state.emotional_state_think import emotional_state_engine
+from app.brain.fuzzy_index import phrase_index
+from app.brain.message_context import MessageContext, normalize_unicode
+from app.brain.result_cache import ResultCache
+from app.brain.rule_registry import RuleRegistry
+from app.brain.unknown_tracker import UnknownPhraseTracker
+
 
 class DeepThink:
     def __init__(self):
         self.rules_path = Path(__file__).parent / "psychology_rules.json"
         self.unknown_path = Path(__file__).parent / "unknown.json"
 
+        # ❓ UNKNOWN: məhdud yaddaşlı top-K aggregator (unknown.json dövri yazılır)
+        self.unknown_tracker = UnknownPhraseTracker(self.unknown_path)
+
         # ❌ QADAĞA: Angry heç vaxt Price Complaint üçün qalmamalı
         # 🚨 PRICE COMPLAINT RESET: "baha" → mood=neutral
         self.price_reset_keywords = [
@@ -81,8 +93,27 @@ class DeepThink:
             "abuse", "threat", "blackmail", "accusation", "harassment", "urgency"
         ]
 
+        # Fuzzy match phrase prefiksi (last_reason-da görünür)
+        self.fuzzy_prefix = "fuzzy:"
+
         self.repeated_chars_regex = re.compile(r'(.)\1{2,}')
 
+        # 🚨 PRICE RESET avtomatı - bir dəfə qurulur
+        self.price_reset_matcher = AhoCorasick(
+            (keyword, keyword) for keyword in self.price_reset_keywords
+        )
+
+        # 🚨 HOT-RELOAD: psychology_rules.json yalnız dəyişəndə kompilyasiya olunur
+        self.rules_registry = RuleRegistry(
+            self.rules_path,
+            loader=lambda path: self._load_rules(),
+            compiler=self._compile_rules
+        )
+
+        # 🚨 LRU: eyni normalizasiya olunmuş mətn təkrar analiz edilmir
+        self.cache = ResultCache("deepthink")
+        self.rules_registry.add_listener(self.cache.clear)
+
     def _load_rules(self) -> Dict:
         try:
             with open(self.rules_path, 'r', encoding='utf-8') as f:
@@ -90,61 +121,113 @@ class DeepThink:
         except:
             return {}
 
+    def _compile_rules(self, rules: Dict) -> AhoCorasick:
+        """
+        Bütün kateqoriya phrase-lərini BİR avtomata yığ.
+        Payload = (kateqoriya sırası, phrase sırası, kateqoriya, phrase)
+        → ən kiçik payload = category_order üzrə köhnə loop-un qalibi
+        """
+        patterns = []
+        for rank, category in enumerate(self.category_order):
+            data = rules.get(category) if isinstance(rules, dict) else None
+            if not isinstance(data, dict):
+                continue
+            for index, phrase in enumerate(data.get("phrases", [])):
+                if phrase and isinstance(phrase, str):
+                    patterns.append((phrase, (rank, index, category, phrase)))
+        return AhoCorasick(patterns)
+
     def _normalize_text_v2(self, text: str) -> str:
-        if not text:
-            return ""
-        text = text.lower()
-        text = re.sub(r'[^\w\sğüşıöçə]', ' ', text)
-        text = self.repeated_chars_regex.sub(r'\1\1', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return normalize_unicode(text)
 
     def _is_price_complaint(self, normalized_text: str) -> bool:
         """🚨 PRICE COMPLAINT DETECTION: Angry-ni RESET edir"""
-        for keyword in self.price_reset_keywords:
-            if keyword in normalized_text:
-                return True
-        return False
+        return self.price_reset_matcher.contains_any(normalized_text)
 
-    def analyze(self, message: str, platform: str = "telegram") -> Optional[Dict[str, Any]]:
+    def analyze(self, message, platform: str = "telegram") -> Optional[Dict[str, Any]]:
         """
         🚨 PSYCHOLOGY FIX: 
         - Hər mesaj SIFIRDAN analiz edilir
         - Price complaint varsa → mood=neutral (angry YOX)
         - Keçmiş mood YOXDUR
+        message: str və ya MessageContext
         """
         
-        normalized = self._normalize_text_v2(message)
-        if not normalized:
+        ctx = MessageContext.of(message)
+        message = ctx.text
+        if not ctx.normalized:
             return self._create_result("non_emotional", "", message)
 
-        # 🚨 1. ƏVVƏL PRICE COMPLAINT CHECK (MƏCBURİ RESET)
-        if self._is_price_complaint(normalized):
-            print(f"   🚨 PSYCHOLOGY RESET: Price complaint → mood=neutral")
-            return self._create_result("price_complaint", "price_reset", message)
-
-        # 2. NORMAL RULE MATCHING
-        rules = self._load_rules()
-        matched_category = None
-        matched_phrase = ""
-
-        for category in self.category_order:
-            if category in rules:
-                for phrase in rules[category].get("phrases", []):
-                    if phrase and phrase in normalized:
-                        matched_category = category
-                        matched_phrase = phrase
-                        break
-            if matched_category:
-                break
-
-        if not matched_category:
+        match = self.match(ctx)
+
+        if not match:
+            # Eyni mesaj bir neçə yerdə analiz olunur (bot + analyze_psychology) - bir dəfə sayılır
+            ctx.memo("unknown_recorded", lambda: self.unknown_tracker.record(ctx, platform))
             return None
 
+        matched_category, matched_phrase = match
+
+        if matched_phrase.startswith(self.fuzzy_prefix):
+            print(f"   🔤 FUZZY MATCH: {matched_phrase[len(self.fuzzy_prefix):]} → {matched_category}")
+
+        if matched_category == "price_complaint":
+            print(f"   🚨 PSYCHOLOGY RESET: Price complaint → mood=neutral")
+
         # 3. ANGRY DETECT EDİLİBSƏ, amma price complaint-dən SONRA?
         # Burada onsuz da price complaint yoxdursa, normal qaydada davam edirik
         return self._create_result(matched_category, matched_phrase, message)
 
+    def match(self, message) -> Optional[tuple]:
+        """
+        (kateqoriya, phrase) və ya None - cache-dən, print / unknown qeydi YOXDUR (batch üçün)
+        Cache açarı: (mətn, rules versiyası, fuzzy index versiyası)
+        """
+        normalized = MessageContext.of(message).normalized
+        if not normalized:
+            return ("non_emotional", "")
+        return self.cache.get_or_compute(
+            (normalized, self.rules_registry.version, phrase_index.version),
+            lambda: self._match(normalized)
+        )
+
+    def _match(self, normalized: str) -> Optional[tuple]:
+        """Stateless hissə: (kateqoriya, phrase) və ya None"""
+        match = self._exact_match(normalized)
+        if match:
+            return match
+
+        # 3. FUZZY: yalnız exact match tapılmadıqda
+        return self._fuzzy_match(normalized)
+
+    def _exact_match(self, normalized: str) -> Optional[tuple]:
+        # 🚨 1. ƏVVƏL PRICE COMPLAINT CHECK (MƏCBURİ RESET)
+        if self._is_price_complaint(normalized):
+            return ("price_complaint", "price_reset")
+
+        # 2. NORMAL RULE MATCHING - bir skan, prioritet category_order üzrə
+        match = self.rules_registry.get().best(normalized)
+        if not match:
+            return None
+
+        _, _, matched_category, matched_phrase = match
+        return (matched_category, matched_phrase)
+
+    def _fuzzy_match(self, normalized: str) -> Optional[tuple]:
+        """
+        Silmə indeksində ən yaxın PSİXOLOGİYA phrase-i → onun düzgün yazılışı exact qaydalardan keçir
+        🚨 Intent və non_emotional phrase-ləri nəzərə alınmır ("nece", "ünvan haradır" emosiya
+           deyil - unknown qalır, rule suggester-ə düşür)
+        Emosional kateqoriyaya düşmürsə → None
+        """
+        hit = phrase_index.lookup(normalized, source="psychology")
+        if not hit:
+            return None
+
+        match = self._exact_match(normalize_unicode(hit.phrase))
+        if not match or match[0] == "non_emotional":
+            return None
+        return (match[0], f"{self.fuzzy_prefix}{hit.phrase}")
+
     def _create_result(self, category: str, phrase: str, message: str) -> Dict[str, Any]:
         """🚨 QEYD: emotional_state-i burada YOX, EmotionalStateEngine hesablayır"""
         
@@ -173,14 +256,17 @@ class DeepThink:
 deepthink = DeepThink()
 
 
-def analyze_psychology(message: str, intent: str) -> Dict[str, Any]:
+def analyze_psychology(message, intent: str) -> Dict[str, Any]:
     """
     🚨 ORKESTRATOR FUNCTION (memory.py üçün)
     - mood → deepthink (STATELESS)
     - emotional_state → EmotionalStateEngine (STATELESS)
+    message: str və ya MessageContext
     """
+    ctx = MessageContext.of(message)
+    
     # 1. Mood-u tap (keçmiş YOX)
-    mood_result = deepthink.analyze(message)
+    mood_result = deepthink.analyze(ctx)
     
     if not mood_result:
         current_mood = "neutral"
@@ -193,9 +279,8 @@ def analyze_psychology(message: str, intent: str) -> Dict[str, Any]:
         operator_required = mood_result.get("operator_required", False)
         last_reason = mood_result.get("last_reason", "")
     
-    # 2. Emotional State-i hesabla (keçmiş YOX)
-    # Sadə emotional state məntiqi - JSON rules yoxdursa
-    emotional_state = _derive_simple_emotional_state(message, current_mood, intent)
+    # 2. Emotional State-i hesabla (keçmiş YOX) - kompilyasiya olunmuş cədvəl
+    emotional_state = emotional_state_engine.derive_emotional_state(ctx, current_mood, intent)
     
     # 3. Nəticəni qaytar
     return {
@@ -206,48 +291,3 @@ def analyze_psychology(message: str, intent: str) -> Dict[str, Any]:
         "operator_required": operator_required,
         "updated_at": datetime.now().isoformat()
     }
-
-
-def _derive_simple_emotional_state(message: str, mood: str, intent: str) -> str:
-    """
-    Sadə emotional state məntiqi
-    JSON rules yoxdursa, bu funksiya işləyəcək
-    """
-    message_lower = message.lower()
-    
-    # 🚨 PRICE COMPLAINT → MƏCBURİ dissatisfied
-    price_keywords = ["baha", "bahadır", "qiymət", "pahalı", "ucuz deyil"]
-    if any(kw in message_lower for kw in price_keywords) and intent == "complaint":
-        return "dissatisfied"
-    
-    # 🚨 ANGRY MOOD + ANGRY KEYWORDS → angry
-    angry_keywords = ["əsəbi", "hirsli", "qəzəbli", "acıqlı", "kefim pis", "sinirlendim"]
-    if mood == "angry" and any(kw in message_lower for kw in angry_keywords):
-        return "angry"
-    
-    # 🚨 SUAL İŞARƏSİ → inquiring
-    if "?" in message or any(q in message_lower for q in ["necə", "niyə", "neçə", "nədir", "hardan", "hara"]):
-        return "inquiring"
-    
-    # 🚨 POSITIVE FEEDBACK → satisfied
-    positive_keywords = ["yaxşı", "məmnunam", "təşəkkür", "sağ ol", "əla", "çox yaxşı"]
-    if intent == "positive_feedback" or any(kw in message_lower for kw in positive_keywords):
-        return "satisfied"
-    
-    # 🚨 COMPLAINT INTENT → dissatisfied (ümumi)
-    if intent == "complaint":
-        return "dissatisfied"
-    
-    # 🚨 MOOD-based emotional state
-    mood_to_state = {
-        "angry": "angry",
-        "frustrated": "frustrated",
-        "sad": "sad",
-        "stressed": "tense",
-        "happy": "joyful",
-        "satisfied": "satisfied",
-        "thinking": "thinking",
-        "neutral": "neutral"
-    }
-    
-    return mood_to_state.get(mood, "neutral")
\ No newline at end of file
@@ -1,153 +1,207 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-EMOTIONAL STATE ENGINE v3.0
+EMOTIONAL STATE ENGINE v4.0 - TABLE-DRIVEN
 🚨 STATELESS: Hər mesaj üçün SIFIRDAN hesablanır
 🚨 NO DEFAULT: calm DEFAULT DEYİL
 🚨 REAL-TIME: Yalnız message + mood + intent əsasında
+🚨 TABLE: Bütün qaydalar emotional_state_rules.json-dan kompilyasiya olunur
+   - keywords → bir Aho–Corasick avtomatı (bir skan)
+   - allowed_moods / forbidden_moods → əvvəlcədən hesablanmış bitmask
+   - qaydalar priority üzrə sıralanır, ilk uyğun gələn qalib gəlir
+🚨 SIRA (v3.0 ilə eyni): "derived" qaydalar → mood-based state
+   - "override": true qaydalar derived-dən ƏVVƏL yoxlanılır
+   - işarəsiz keyword qaydaları yalnız mood_to_state-də olmayan mood üçün (default əvəzinə)
 """
 
 import json
-import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from app.brain.aho_corasick import AhoCorasick
+from app.brain.message_context import MessageContext, normalize_unicode
+from app.brain.rule_registry import RuleRegistry
+
+
+class StateRule(NamedTuple):
+    name: str
+    state: str
+    priority: int
+    # 0 = override, 1 = derived, 2 = işarəsiz (yalnız default əvəzinə)
+    tier: int
+    allowed_mask: int
+    forbidden_mask: int
+    required_intents: FrozenSet[str]
+    trigger_intents: FrozenSet[str]
+
+
+class CompiledStateTable(NamedTuple):
+    rules: Tuple[StateRule, ...]
+    # Normalizasiya olunmuş mətn üzərində keyword avtomatı (payload = qayda indeksi)
+    keyword_matcher: AhoCorasick
+    # Normalizasiyada itən keyword-lər ("?") - lower() mətn üzərində
+    raw_matcher: AhoCorasick
+    mood_bits: Dict[str, int]
+    mood_to_state: Dict[str, str]
+    default_state: str
+    # İlk işarəsiz (tier 2) qaydanın indeksi - buradan sonra mood-based qalib gəlir
+    fallback_start: int
 
 
 class EmotionalStateEngine:
     def __init__(self):
         self.rules_path = Path(__file__).parent / "emotional_state_rules.json"
-        self.rules = self._load_rules()
-        
+
         # 🚨 DEFAULT QADAĞASI: calm DEFAULT OLA BİLMƏZ
         # Hər halda konkret emotional state qaytarılmalıdır
         self.default_state = "neutral"  # calm deyil!
-        
-        # Emotional state kateqoriyaları
-        self.state_categories = {
-            "angry": ["əsəbi", "hirsli", "qəzəbli", "acıqlı", "kefim pis"],
-            "dissatisfied": ["baha", "bahadır", "qiymət", "pahalı", "narazıyam"],
-            "satisfied": ["yaxşı", "məmnunam", "təşəkkür", "sağ ol", "əla"],
-            "inquiring": ["?", "necə", "niyə", "neçə", "nədir", "hardan"],
-            "thinking": ["düşünürəm", "bilmirəm", "görüm", "baxaq"],
-            "neutral": []  # Default deyil, sadəcə digərləri uyğun gəlmədikdə
-        }
+
+        # 🚨 HOT-RELOAD: qaydalar yalnız fayl dəyişəndə yenidən kompilyasiya olunur
+        self.rules_registry = RuleRegistry(
+            self.rules_path,
+            loader=lambda path: self._load_rules(),
+            compiler=self._compile_rules
+        )
 
     def _load_rules(self) -> Dict:
         try:
             if self.rules_path.exists():
                 with open(self.rules_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # Meta məlumatları sil
-                    data.pop("_meta", None)
-                    return data
+                    return json.load(f)
         except Exception as e:
             print(f"⚠️ Emotional state rules yükləmə xətası: {e}")
         return {}
 
+    @property
+    def rules(self) -> Dict:
+        """Xam qaydalar (meta olmadan)"""
+        return {k: v for k, v in self.rules_registry.raw().items() if k != "_meta"}
+
     def _normalize(self, text: str) -> str:
         """Mətni normalizasiya et"""
-        if not text:
-            return ""
-        text = text.lower()
-        text = re.sub(r"[^\w\sğüşıöçə]", " ", text)
-        return re.sub(r"\s+", " ", text).strip()
+        return normalize_unicode(text)
 
-    def _check_state_rules(self, message: str, mood: str, intent: str) -> Optional[str]:
+    def _compile_rules(self, data: Dict) -> CompiledStateTable:
         """
-        JSON rules-dan emotional state tap
-        Əgər rule tapılsa, onu qaytar
+        JSON → cədvəl:
+        keywords, emotional_state, allowed_moods, forbidden_moods, priority,
+        required_intents (AND), trigger_intents (keyword əvəzinə OR),
+        override / derived (sıra pilləsi)
         """
-        normalized_msg = self._normalize(message)
-        
-        if not self.rules:
-            return None
-        
-        # Intent əsaslı axtarış
-        if intent in self.rules:
-            intent_rules = self.rules[intent]
-            for rule in intent_rules:
-                if isinstance(rule, dict):
-                    keywords = rule.get("keywords", [])
-                    conditions = rule.get("conditions", {})
-                    
-                    # Keywords yoxla
-                    keyword_match = False
-                    for kw in keywords:
-                        if kw in normalized_msg:
-                            keyword_match = True
-                            break
-                    
-                    # Conditions yoxla
-                    condition_match = True
-                    if "mood" in conditions:
-                        if mood not in conditions["mood"]:
-                            condition_match = False
-                    
-                    if keyword_match and condition_match:
-                        return rule.get("state", self.default_state)
-        
-        return None
-
-    def derive_emotional_state(self, message: str, mood: str, intent: str) -> str:
+        if not isinstance(data, dict):
+            data = {}
+        meta = data.get("_meta", {}) if isinstance(data.get("_meta"), dict) else {}
+        default_state = meta.get("default_state", self.default_state)
+        mood_to_state = dict(meta.get("mood_to_state", {}))
+
+        entries = [
+            (name, rule) for name, rule in data.items()
+            if name != "_meta" and isinstance(rule, dict)
+        ]
+
+        # 1. Mood lüğəti → bit
+        mood_bits: Dict[str, int] = {}
+        for _, rule in entries:
+            for mood in list(rule.get("allowed_moods", [])) + list(rule.get("forbidden_moods", [])):
+                if mood not in mood_bits:
+                    mood_bits[mood] = 1 << len(mood_bits)
+
+        def mask(moods: List[str]) -> int:
+            value = 0
+            for mood in moods:
+                value |= mood_bits[mood]
+            return value
+
+        # 2. Pillə, sonra priority üzrə sıralama (eyni priority - fayl sırası)
+        def tier(rule: Dict) -> int:
+            if rule.get("override"):
+                return 0
+            return 1 if rule.get("derived") else 2
+
+        entries.sort(key=lambda item: (tier(item[1]), -int(item[1].get("priority", 0))))
+
+        rules: List[StateRule] = []
+        keyword_patterns = []
+        raw_patterns = []
+
+        for index, (name, rule) in enumerate(entries):
+            rules.append(StateRule(
+                name=name,
+                state=rule.get("emotional_state", default_state),
+                priority=int(rule.get("priority", 0)),
+                tier=tier(rule),
+                allowed_mask=mask(rule.get("allowed_moods", [])),
+                forbidden_mask=mask(rule.get("forbidden_moods", [])),
+                required_intents=frozenset(rule.get("required_intents", [])),
+                trigger_intents=frozenset(rule.get("trigger_intents", []))
+            ))
+
+            for keyword in rule.get("keywords", []):
+                if not keyword or not isinstance(keyword, str):
+                    continue
+                normalized_keyword = normalize_unicode(keyword)
+                if normalized_keyword:
+                    keyword_patterns.append((normalized_keyword, index))
+                else:
+                    raw_patterns.append((keyword.lower(), index))
+
+        return CompiledStateTable(
+            rules=tuple(rules),
+            keyword_matcher=AhoCorasick(keyword_patterns),
+            raw_matcher=AhoCorasick(raw_patterns),
+            mood_bits=mood_bits,
+            mood_to_state=mood_to_state,
+            default_state=default_state,
+            fallback_start=next((i for i, rule in enumerate(rules) if rule.tier == 2), len(rules))
+        )
+
+    def resolve(self, message, mood: str, intent: str) -> Tuple[str, str]:
+        """
+        Stateless resolver: (emotional_state, qayda adı)
+        Bütün qaydalar bir priority sırası ilə bir dəfə yoxlanılır
+        """
+        ctx = MessageContext.of(message)
+        table = self.rules_registry.get()
+
+        # 1. Keyword hit-ləri - mesaj başına bir skan
+        hits = ctx.memo(
+            ("emotional_state_hits", id(table)),
+            lambda: table.keyword_matcher.payloads(ctx.normalized) | table.raw_matcher.payloads(ctx.lowered)
+        )
+
+        # 2. Mood bit (lüğətdə yoxdursa 0 → heç bir allowed siyahısına düşmür)
+        mood_bit = table.mood_bits.get(mood, 0)
+
+        # 3. Pillə + priority sırası ilə ilk uyğun qayda
+        for index, rule in enumerate(table.rules):
+            if index == table.fallback_start and mood in table.mood_to_state:
+                # Derived mood-based state işarəsiz keyword qaydalarından üstündür
+                break
+            if index not in hits and intent not in rule.trigger_intents:
+                continue
+            if rule.required_intents and intent not in rule.required_intents:
+                continue
+            if rule.allowed_mask and not (mood_bit & rule.allowed_mask):
+                continue
+            if mood_bit & rule.forbidden_mask:
+                continue
+            return rule.state, rule.name
+
+        # 4. MOOD-based emotional state
+        return table.mood_to_state.get(mood, table.default_state), "mood_based"
+
+    def derive_emotional_state(self, message, mood: str, intent: str) -> str:
         """
         🚨 KRİTİK FUNKSİYA: Emotional state SIFIRDAN hesablanır
         ❌ Keçmiş state OXUNMUR
         ❌ psychology.json OXUNMUR
         ❌ calm DEFAULT YOXDUR
+        message: str və ya MessageContext
         """
-        
-        normalized_msg = self._normalize(message)
-        
-        # 🚨 1. JSON RULES (əgər varsa)
-        rule_based_state = self._check_state_rules(message, mood, intent)
-        if rule_based_state:
-            print(f"   🎯 EmotionalState JSON Rule: {rule_based_state}")
-            return rule_based_state
-        
-        # 🚨 2. PRICE COMPLAINT → MƏCBURİ dissatisfied
-        price_keywords = ["baha", "bahadır", "qiymət", "pahalı", "ucuz deyil"]
-        if any(kw in normalized_msg for kw in price_keywords) and intent == "complaint":
-            print(f"   🚨 EmotionalState: Price complaint → dissatisfied")
-            return "dissatisfied"
-        
-        # 🚨 3. ANGRY MOOD + ANGRY KEYWORDS → angry
-        angry_keywords = ["əsəbi", "hirsli", "qəzəbli", "acıqlı", "kefim pis", "sinirlendim"]
-        if mood == "angry" and any(kw in normalized_msg for kw in angry_keywords):
-            print(f"   🚨 EmotionalState: Angry mood + keywords → angry")
-            return "angry"
-        
-        # 🚨 4. SUAL İŞARƏSİ → inquiring
-        if "?" in message or any(q in normalized_msg for q in ["necə", "niyə", "neçə", "nədir", "hardan", "hara"]):
-            print(f"   ❓ EmotionalState: Question → inquiring")
-            return "inquiring"
-        
-        # 🚨 5. POSITIVE FEEDBACK → satisfied
-        positive_keywords = ["yaxşı", "məmnunam", "təşəkkür", "sağ ol", "əla", "çox yaxşı"]
-        if intent == "positive_feedback" or any(kw in normalized_msg for kw in positive_keywords):
-            print(f"   👍 EmotionalState: Positive → satisfied")
-            return "satisfied"
-        
-        # 🚨 6. COMPLAINT INTENT → dissatisfied (ümumi)
-        if intent == "complaint":
-            print(f"   ⚠️ EmotionalState: Complaint → dissatisfied")
-            return "dissatisfied"
-        
-        # 🚨 7. MOOD-based emotional state
-        mood_to_state = {
-            "angry": "angry",
-            "frustrated": "frustrated",
-            "sad": "sad",
-            "stressed": "tense",
-            "happy": "joyful",
-            "satisfied": "satisfied",
-            "thinking": "thinking",
-            "neutral": "neutral"
-        }
-        
-        state = mood_to_state.get(mood, self.default_state)
-        print(f"   🔄 EmotionalState: Mood-based → {state}")
+        state, rule_name = self.resolve(message, mood, intent)
+        print(f"   🎯 EmotionalState: {rule_name} → {state}")
         return state
 
 
 # GLOBAL INSTANCE
-emotional_state_engine = EmotionalStateEngine()
\ No newline at end of file
+emotional_state_engine = EmotionalStateEngine()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FUZZY PHRASE INDEX - SYMSPELL TİPLİ SİLMƏ İNDEKSİ
+✅ "nece", "bahadi", "tesekkur", "çoooox" kimi yazılışlar üçün
+✅ Indeks qayda yüklənəndə BİR DƏFƏ qurulur (psychology + hər iki intent_rules.json)
+✅ Sorğu: mesajın n-gramlarının silmə variantları → dict lookup (phrase sayından asılı deyil)
+✅ Namizədlər həqiqi edit distance ilə yoxlanılır
+🚨 Yalnız exact matcher None qaytardıqdan SONRA istifadə olunur
+"""
+
+import json
+import re
+import threading
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from app.brain.message_context import MessageContext, normalize_latin
+from app.brain.rule_registry import RuleRegistry
+
+# Uzanmış hərflər: "cooox" → "cox", "tesekkur" → "tesekur"
+_DOUBLED_CHARS_REGEX = re.compile(r'(.)\1+')
+
+# 🚨 QISA SÖZLƏR İNDEKSƏ DÜŞMÜR: "əla" ~ "elə", "baha" ~ "bala" yanlış pozitivdir
+MIN_KEY_LENGTH = 4
+MAX_NGRAM_WORDS = 4
+# Silmələr yalnız ilk N simvoldan yaradılır (prefiks məsafəsi ≤ tam məsafə) - namizəd sonra tam yoxlanılır
+PREFIX_LENGTH = 7
+
+
+def fuzzy_key(text: str) -> str:
+    """Latin normalizasiya + təkrar hərfləri 1-ə endir"""
+    return _DOUBLED_CHARS_REGEX.sub(r'\1', normalize_latin(text))
+
+
+def max_distance_for(length: int) -> int:
+    """Phrase uzunluğuna görə icazə verilən edit distance"""
+    if length <= 4:
+        return 0
+    if length <= 7:
+        return 1
+    return 2
+
+
+def _deletes(term: str, depth: int) -> Set[str]:
+    """term-dən ən çox depth simvol silməklə alınan bütün variantlar (term özü daxil)"""
+    result = {term}
+    length = len(term)
+    for count in range(1, min(depth, length - 1) + 1):
+        for positions in combinations(range(length), count):
+            skip = set(positions)
+            result.add("".join(ch for i, ch in enumerate(term) if i not in skip))
+    return result
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment (transpozisiya 1 sayılır); limit-i keçəndə limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    prev_prev: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev_prev[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        prev_prev, prev = prev, current
+    return prev[len(b)]
+
+
+class FuzzyHit(NamedTuple):
+    distance: int
+    payload: Any
+    phrase: str
+    term: str
+
+
+class DeletionIndex:
+    """
+    Silmə qonşuluğu indeksi:
+    phrase açarı prefiksinin ≤ d silmə variantı → [(açar, payload, phrase, d)]
+    Sorğu tərəfdə də eyni silmələr yaradılır, kəsişmə namizəddir
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]] = ()):
+        self._deletes: Dict[str, List[Tuple[str, Any, str, int]]] = {}
+        self.key_count = 0
+        # söz sayı → ən uzun açar (sorğu n-gramlarını məhdudlaşdırır)
+        self._max_length_by_words: Dict[int, int] = {}
+
+        seen: Set[str] = set()
+        for phrase, payload in entries:
+            key = fuzzy_key(phrase) if isinstance(phrase, str) else ""
+            if len(key) < MIN_KEY_LENGTH or key in seen:
+                continue
+            seen.add(key)
+
+            distance = max_distance_for(len(key))
+            record = (key, payload, phrase, distance)
+            for variant in _deletes(key[:PREFIX_LENGTH], distance):
+                self._deletes.setdefault(variant, []).append(record)
+
+            self.key_count += 1
+            words = min(MAX_NGRAM_WORDS, key.count(" ") + 1)
+            self._max_length_by_words[words] = max(self._max_length_by_words.get(words, 0), len(key))
+
+    def __bool__(self) -> bool:
+        return self.key_count > 0
+
+    def _terms(self, text: str) -> Iterator[str]:
+        """Mesajın söz n-gramları (yalnız indeksdə olan söz sayları və uzunluqlar)"""
+        words = fuzzy_key(text).split()
+        for size, max_length in self._max_length_by_words.items():
+            longest = max_length + 2
+            for start in range(len(words) - size + 1):
+                term = " ".join(words[start:start + size])
+                if MIN_KEY_LENGTH <= len(term) <= longest:
+                    yield term
+
+    def lookup(self, text: str, accept: Optional[Callable[[Any], bool]] = None) -> Optional[FuzzyHit]:
+        """
+        Ən yaxın phrase: (distance, payload) üzrə ən kiçik
+        accept: payload süzgəci (məs. yalnız bir mənbənin phrase-ləri)
+        Heç nə tapılmasa None
+        """
+        if not self._deletes or not text:
+            return None
+
+        best: Optional[Tuple[Tuple[int, Any], FuzzyHit]] = None
+        for term in self._terms(text):
+            checked: Set[str] = set()
+            # term ilə ən çox 2 simvol fərqlənən açarların icazəsi qədər silmə
+            for variant in _deletes(term[:PREFIX_LENGTH], max_distance_for(len(term) + 2)):
+                for key, payload, phrase, limit in self._deletes.get(variant, ()):
+                    if key in checked:
+                        continue
+                    checked.add(key)
+                    if accept is not None and not accept(payload):
+                        continue
+                    # Limit qısa tərəfə görə: "sağ ol" → "sağ olun" (2 əlavə) qısa sorğu üçün çox uzaqdır
+                    limit = min(limit, max_distance_for(len(term)))
+                    distance = edit_distance(term, key, limit)
+                    if distance > limit:
+                        continue
+                    rank = (distance, payload)
+                    if best is None or rank < best[0]:
+                        best = (rank, FuzzyHit(distance, payload, phrase, term))
+        return best[1] if best else None
+
+
+# ======================================================
+# QAYDA FAYLLARI → BİR İNDEKS
+# ======================================================
+def _load_json(path: Path) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _psychology_entries(rules: Dict) -> List[Tuple[str, tuple]]:
+    """psychology_rules.json: kateqoriya → phrases (priority kiçik = vacib)"""
+    entries = []
+    for category, data in rules.items():
+        if category == "_meta" or not isinstance(data, dict):
+            continue
+        priority = data.get("priority", 99)
+        for index, phrase in enumerate(data.get("phrases", [])):
+            entries.append((phrase, (priority, index, "psychology", category)))
+    return entries
+
+
+def _intent_entries(source: str) -> Any:
+    """intent_rules.json: intent → (kateqoriya →) phrases (priority böyük = vacib)"""
+    def compile_entries(rules: Dict) -> List[Tuple[str, tuple]]:
+        entries = []
+        for intent, data in rules.items():
+            if intent == "_meta" or not isinstance(data, dict):
+                continue
+            groups = [data] if "phrases" in data else [g for g in data.values() if isinstance(g, dict)]
+            for group in groups:
+                priority = group.get("priority", 0)
+                for index, phrase in enumerate(group.get("phrases", [])):
+                    entries.append((phrase, (-priority, index, source, intent)))
+        return entries
+    return compile_entries
+
+
+class PhraseIndex:
+    """
+    psychology_rules.json + app/brain/intent/intent_rules.json + intent_rules.json
+    Hər fayl öz RuleRegistry-si ilə izlənilir; hər hansı biri dəyişəndə indeks yenidən qurulur
+    Payload = (source sırası, priority, phrase sırası, source, label)
+    """
+
+    def __init__(self):
+        brain_path = Path(__file__).parent
+        self._sources = [
+            RuleRegistry(brain_path / "psychology_rules.json", _load_json, _psychology_entries),
+            RuleRegistry(brain_path / "intent" / "intent_rules.json", _load_json, _intent_entries("intent_think")),
+            # memory.py ilə eyni yol (işçi qovluğa nisbətən)
+            RuleRegistry(Path("intent_rules.json"), _load_json, _intent_entries("intent_rules")),
+        ]
+        self._lock = threading.Lock()
+        self._state: Optional[Tuple[Tuple[int, ...], DeletionIndex]] = None
+
+    @property
+    def version(self) -> Tuple[int, ...]:
+        return tuple(registry.version for registry in self._sources)
+
+    def get(self) -> DeletionIndex:
+        version = self.version
+        state = self._state
+        if state is not None and state[0] == version:
+            return state[1]
+
+        with self._lock:
+            state = self._state
+            if state is None or state[0] != version:
+                entries = []
+                for source_rank, registry in enumerate(self._sources):
+                    for phrase, payload in registry.get():
+                        entries.append((phrase, (source_rank,) + payload))
+                index = DeletionIndex(entries)
+                self._state = state = (version, index)
+                print(f"   🔁 Fuzzy index quruldu: {index.key_count} phrase")
+            return state[1]
+
+    def rule_phrases(self) -> List[Tuple[str, str, str]]:
+        """Bütün qayda phrase-ləri: (source, label, phrase)"""
+        result = []
+        for registry in self._sources:
+            for phrase, payload in registry.get():
+                if phrase and isinstance(phrase, str):
+                    result.append((payload[2], payload[3], phrase))
+        return result
+
+    def lookup(self, message, source: Optional[str] = None) -> Optional[FuzzyHit]:
+        """
+        message: str və ya MessageContext
+        source: yalnız bu mənbənin phrase-ləri ("psychology", "intent_think", "intent_rules")
+        """
+        ctx = MessageContext.of(message)
+        accept = (lambda payload: payload[3] == source) if source else None
+        return self.get().lookup(ctx.text, accept)
+
+
+# GLOBAL INSTANCE
+phrase_index = PhraseIndex()
@@ -6,11 +6,15 @@ INTENT ANALIZ SISTEMI v1.0
 """
 
 import json
-import re
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 
+from app.brain.aho_corasick import AhoCorasick
+from app.brain.message_context import MessageContext, normalize_latin
+from app.brain.result_cache import ResultCache
+from app.brain.rule_registry import RuleRegistry
+
 class IntentThink:
     def __init__(self):
         self.rules_path = Path(__file__).parent / "intent_rules.json"
@@ -28,6 +32,17 @@ class IntentThink:
             "thanks",             # Təşəkkür
             "confusion"           # Qarışıqlıq
         ]
+        
+        # 🚨 HOT-RELOAD: qaydalar yalnız fayl dəyişəndə yenidən kompilyasiya olunur
+        self.rules_registry = RuleRegistry(
+            self.rules_path,
+            loader=lambda path: self._load_rules(),
+            compiler=self._compile_rules
+        )
+        
+        # 🚨 LRU: açar (Latin normalizasiya, rules versiyası)
+        self.cache = ResultCache("intent_think")
+        self.rules_registry.add_listener(self.cache.clear)
     
     def _load_rules(self) -> Dict:
         """Intent qaydalarını yüklə"""
@@ -42,44 +57,8 @@ class IntentThink:
         """
         MƏTNİ NORMALİZASİYA ET - DEEPTHINK İLƏ EYNİ
         """
-        if not text or not isinstance(text, str):
-            return ""
-        
-        # 1. Lowercase
-        text = text.lower()
-        
-        # 2. Durğu işarələrini sil
-        text = re.sub(r'[.,!?;:()\[\]{}"\'`…\-–—/*+=_|~<>]', ' ', text)
-        
-        # 3. AZ → LATIN çevir (DEEPTHINK İLƏ EYNİ)
-        az_to_latin = {
-            'ə': 'e',
-            'ş': 's',
-            'ı': 'i',
-            'ö': 'o',
-            'ü': 'u',
-            'ç': 'c',
-            'ğ': 'g',
-            'Ə': 'e',
-            'Ş': 's',
-            'İ': 'i',
-            'I': 'i',
-            'Ö': 'o',
-            'Ü': 'u',
-            'Ç': 'c',
-            'Ğ': 'g'
-        }
-        
-        for az_char, latin_char in az_to_latin.items():
-            text = text.replace(az_char, latin_char)
-        
-        # 4. Çoxlu boşluqları tək boşluğa sal
-        text = re.sub(r'\s+', ' ', text)
-        
-        # 5. Trim
-        text = text.strip()
-        
-        return text
+        # lower → durğu sil → AZ → LATIN → boşluqlar (message_context.normalize_latin)
+        return normalize_latin(text)
     
     def _generate_variants(self, text: str) -> List[str]:
         """
@@ -112,71 +91,88 @@ class IntentThink:
         
         return list(variants)
     
-    def _check_intent_match(self, normalized_input: str, intent_phrases: List[str]) -> Tuple[bool, str]:
+    def _compile_rules(self, rules: Dict) -> AhoCorasick:
         """
-        INTENT MATCHING - include (contains) məntiqi
+        Phrase variantları (normalized, boşluqsuz, ne→no) qaydalar yüklənəndə
+        BİR DƏFƏ yaradılır və bir avtomatda indekslənir.
+        Payload = (intent sırası, phrase sırası, intent, phrase)
+        → ən kiçik payload = köhnə nested loop-un nəticəsi
         """
-        # Input-un bütün variantları
-        input_variants = self._generate_variants(normalized_input)
+        patterns = []
         
-        for phrase in intent_phrases:
-            if not phrase:
+        for rank, intent_name in enumerate(self.intent_categories):
+            intent_data = rules.get(intent_name) if isinstance(rules, dict) else None
+            if not isinstance(intent_data, dict):
                 continue
-                
-            # Phrase-in bütün variantları
-            phrase_variants = self._generate_variants(phrase)
             
-            # Hər bir input variantı üçün
-            for input_var in input_variants:
-                # Hər bir phrase variantı üçün
-                for phrase_var in phrase_variants:
-                    # SUBSTRING CHECK: phrase_var in input_var
-                    if phrase_var and input_var and phrase_var in input_var:
-                        return True, phrase
-        
-        return False, ""
+            for index, phrase in enumerate(intent_data.get("phrases", [])):
+                if not phrase:
+                    continue
+                payload = (rank, index, intent_name, phrase)
+                for phrase_var in self._generate_variants(phrase):
+                    if phrase_var:
+                        patterns.append((phrase_var, payload))
+        
+        return AhoCorasick(patterns)
+    
+    def _match(self, normalized_message: str) -> Optional[Tuple[str, str]]:
+        """
+        Stateless hissə: input variantlarının hər biri avtomatla BİR DƏFƏ skan edilir
+        """
+        matcher = self.rules_registry.get()
+        
+        match = None
+        for input_var in self._generate_variants(normalized_message):
+            candidate = matcher.best(input_var)
+            if candidate is not None and (match is None or candidate < match):
+                match = candidate
+        
+        if not match:
+            return None
+        
+        _, _, matched_intent, matched_phrase = match
+        return (matched_intent, matched_phrase)
     
-    def analyze(self, message: str, psychology_category: str = None) -> Optional[Dict[str, Any]]:
+    def match(self, message) -> Optional[Tuple[str, str]]:
+        """(intent, phrase) və ya None - cache-dən (batch üçün)"""
+        normalized_message = MessageContext.of(message).latin
+        if not normalized_message:
+            return None
+        return self.cache.get_or_compute(
+            (normalized_message, self.rules_registry.version),
+            lambda: self._match(normalized_message)
+        )
+    
+    def analyze(self, message, psychology_category: str = None) -> Optional[Dict[str, Any]]:
         """
         MESADAN INTENT TAP
         
         Args:
-            message: İstifadəçi mesajı
+            message: İstifadəçi mesajı (str və ya MessageContext)
             psychology_category: Psixoloji kateqoriya (məsələn, "stress")
             
         Returns:
             Dict və ya None (heç bir intent tapılmasa)
         """
         # 1. Mesajı normalizə et
-        normalized_message = self._normalize_text(message)
-        if not normalized_message:
+        ctx = MessageContext.of(message)
+        if not ctx.latin:
             return None
         
-        # 2. Intent qaydalarını yüklə
-        rules = self._load_rules()
+        # 2. Kompilyasiya olunmuş qaydalar (diskdən oxunmur)
+        rules = self.rules_registry.raw()
         if not rules:
             return None
         
-        # 3. Bütün intent kateqoriyalarını yoxla
-        matched_intent = None
-        matched_phrase = ""
-        
-        for intent_name in self.intent_categories:
-            if intent_name in rules:
-                intent_data = rules[intent_name]
-                phrases = intent_data.get("phrases", [])
-                
-                if phrases:
-                    match_found, phrase = self._check_intent_match(normalized_message, phrases)
-                    if match_found:
-                        matched_intent = intent_name
-                        matched_phrase = phrase
-                        break
+        # 3. Match cache-dən və ya avtomatdan
+        match = self.match(ctx)
         
         # 4. Heç bir intent tapılmadısa
-        if not matched_intent:
+        if not match:
             return None
         
+        matched_intent, matched_phrase = match
+        
         # 5. Nəticə yarat
         intent_data = rules[matched_intent]
         
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MESSAGE CONTEXT - MESAJ BAŞINA BİR DƏFƏ NORMALİZASİYA
+✅ lower(), Unicode və Latin normalizasiyası yalnız BİR DƏFƏ hesablanır
+✅ Token set və keyword qrup nəticələri yadda saxlanılır (memo)
+✅ save_message → _beyin_guncelle → DeepThink / IntentThink / EmotionalState
+   bütün mərhələlər eyni obyekti paylaşır
+"""
+
+import re
+from functools import cached_property
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Union
+
+# DEEPTHINK / EMOTIONAL STATE normalizasiyası
+_NON_WORD_REGEX = re.compile(r'[^\w\sğüşıöçə]')
+_REPEATED_CHARS_REGEX = re.compile(r'(.)\1{2,}')
+_WHITESPACE_REGEX = re.compile(r'\s+')
+
+# INTENT THINK normalizasiyası
+_PUNCTUATION_REGEX = re.compile(r'[.,!?;:()\[\]{}"\'`…\-–—/*+=_|~<>]')
+_AZ_TO_LATIN = str.maketrans({
+    'ə': 'e',
+    'ş': 's',
+    'ı': 'i',
+    'ö': 'o',
+    'ü': 'u',
+    'ç': 'c',
+    'ğ': 'g',
+    'Ə': 'e',
+    'Ş': 's',
+    'İ': 'i',
+    'I': 'i',
+    'Ö': 'o',
+    'Ü': 'u',
+    'Ç': 'c',
+    'Ğ': 'g'
+})
+
+
+def normalize_unicode(text: str) -> str:
+    """
+    DEEPTHINK normalizasiyası: lower + durğu sil + təkrar hərfləri 2-yə endir
+    """
+    if not text:
+        return ""
+    text = text.lower()
+    text = _NON_WORD_REGEX.sub(' ', text)
+    text = _REPEATED_CHARS_REGEX.sub(r'\1\1', text)
+    text = _WHITESPACE_REGEX.sub(' ', text)
+    return text.strip()
+
+
+def normalize_latin(text: str) -> str:
+    """
+    INTENT THINK normalizasiyası: lower + durğu sil + AZ → LATIN
+    """
+    if not text or not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = _PUNCTUATION_REGEX.sub(' ', text)
+    text = text.translate(_AZ_TO_LATIN)
+    text = _WHITESPACE_REGEX.sub(' ', text)
+    return text.strip()
+
+
+class MessageContext:
+    """
+    Bir mesajın bütün analiz formaları.
+    Bütün sahələr lazım olanda (lazy) hesablanır və sonra təkrar istifadə olunur.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self._memo: Dict[Any, Any] = {}
+
+    @classmethod
+    def of(cls, message: Union[str, "MessageContext"]) -> "MessageContext":
+        """str və ya hazır context qəbul edir"""
+        if isinstance(message, MessageContext):
+            return message
+        return cls(message)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    # ------------------------------------------------------
+    # Normalizasiyalar
+    # ------------------------------------------------------
+    @cached_property
+    def lowered(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def lowered_stripped(self) -> str:
+        return self.lowered.strip()
+
+    @cached_property
+    def normalized(self) -> str:
+        """Unicode normalizasiya (DeepThink)"""
+        return normalize_unicode(self.text)
+
+    @cached_property
+    def latin(self) -> str:
+        """Latin transliterasiya (IntentThink)"""
+        return normalize_latin(self.text)
+
+    @cached_property
+    def tokens(self) -> FrozenSet[str]:
+        return frozenset(self.normalized.split())
+
+    # ------------------------------------------------------
+    # Memo
+    # ------------------------------------------------------
+    def memo(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Eyni mesaj üçün hesablamanı bir dəfə et"""
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = compute()
+            return value
+
+    def contains_any(self, group: str, keywords: Iterable[str], field: str = "lowered") -> bool:
+        """
+        Keyword qrupundan heç olmasa biri mətndə varmı? (substring məntiqi)
+        Nəticə (group, field) üzrə yadda saxlanılır
+        """
+        def compute() -> bool:
+            haystack = getattr(self, field)
+            return any(keyword in haystack for keyword in keywords)
+
+        return self.memo(("kw", group, field), compute)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ML SENTIMENT FALLBACK - İKİNCİ SƏVİYYƏ (RULE MISS ÜÇÜN)
+✅ Yalnız DeepThink None qaytaranda istifadə olunur
+✅ vaderSentiment / textblob YALNIZ ilk lazım olanda import olunur (worker prosesdə)
+✅ Kiçik ProcessPoolExecutor (spawn) - event loop bloklanmır
+   - fork YOX: ana prosesin thread-ləri / lock-ları (writer, cache flusher) worker-ə kopyalanmır
+✅ Pool bot startup-da isidilir (warm_up): worker spawn + model yüklənməsi arxa fonda
+✅ Worker hazır olana qədər pool-a göndərilmir → "unknown" (soyuq start deadline-ı yemir)
+✅ Hər çağırışın deadline-ı var: vaxt bitdisə → "unknown"
+✅ Bal 0.0 (ingilis leksikonunda heç bir söz yoxdur - adətən Azərbaycan dilli mətn) → "unknown"
+🚨 Startup və rule-hit mesajlarının gecikməsi DƏYİŞMİR
+🚨 Kritik kateqoriya (operator) HEÇ VAXT ML-dən gəlmir
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# ======================================================
+# WORKER PROSES
+# ======================================================
+_analyzer = None
+
+
+def _load_analyzer():
+    """Worker prosesdə bir dəfə: əvvəl VADER, yoxdursa TextBlob"""
+    global _analyzer
+    if _analyzer is not None:
+        return _analyzer
+
+    try:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        vader = SentimentIntensityAnalyzer()
+        _analyzer = ("vader", lambda text: vader.polarity_scores(text)["compound"])
+    except ImportError:
+        try:
+            from textblob import TextBlob
+            _analyzer = ("textblob", lambda text: TextBlob(text).sentiment.polarity)
+        except ImportError:
+            _analyzer = ("unavailable", None)
+    return _analyzer
+
+
+def _warm() -> str:
+    """Worker: modeli əvvəlcədən yüklə (lambda pickle olunmur - yalnız ad qaytarılır)"""
+    return _load_analyzer()[0]
+
+
+def _score(text: str) -> Tuple[str, float]:
+    """Worker: (model adı, -1..1 arası bal)"""
+    name, scorer = _load_analyzer()
+    if scorer is None:
+        return name, 0.0
+    return name, float(scorer(text))
+
+
+# ======================================================
+# ƏSAS PROSES
+# ======================================================
+class SentimentFallback:
+    """
+    score ≥ positive_threshold  → satisfaction (mood=satisfied)
+    score ≤ negative_threshold  → frustration (mood=frustrated)
+    arada                       → non_emotional (mood=neutral)
+    score == 0.0 (siqnal yoxdur) → unknown
+    model yoxdur / timeout      → unknown
+    """
+
+    def __init__(self, max_workers: int = 1, timeout: float = 0.5,
+                 positive_threshold: float = 0.5, negative_threshold: float = -0.5):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.positive_threshold = positive_threshold
+        self.negative_threshold = negative_threshold
+
+        self.category_to_mood = {
+            "satisfaction": "satisfied",
+            "frustration": "frustrated",
+            "non_emotional": "neutral"
+        }
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.available = True
+        # warm_up() worker-dən cavab alanda True olur
+        self.ready = False
+        self._warming = False
+
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.no_signal = 0
+        self.not_ready = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+                    atexit.register(self.shutdown)
+                    print(f"   🤖 ML fallback pool başladı ({self.max_workers} worker)")
+        return self._executor
+
+    def warm_up(self) -> None:
+        """Pool-u başlat və modeli yüklə - gözləmir (startup gecikməsi dəyişmir)"""
+        if self.ready or not self.available:
+            return
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+        try:
+            self._pool().submit(_warm).add_done_callback(self._on_warm)
+        except Exception as e:
+            self._warming = False
+            print(f"⚠️ ML fallback isidilə bilmədi: {e}")
+
+    def _on_warm(self, future) -> None:
+        if future.cancelled():
+            self._warming = False
+            return
+        try:
+            model = future.result()
+        except Exception as e:
+            self.errors += 1
+            self._warming = False
+            print(f"⚠️ ML fallback isidilə bilmədi: {e}")
+            return
+        if model == "unavailable":
+            self.available = False
+            print("   🤖 ML fallback: model yoxdur (vaderSentiment / textblob) - söndürüldü")
+            return
+        self.ready = True
+        print(f"   🤖 ML fallback hazır ({model})")
+
+    def _skip_reason(self, text: str) -> Optional[str]:
+        """None → pool-a göndər; əks halda unknown səbəbi"""
+        if not self.available or not text or not text.strip():
+            return "skipped"
+        if not self.ready:
+            # Soyuq worker deadline-ı keçəcək - gözləmə, isinməni başlat
+            self.warm_up()
+            self.not_ready += 1
+            return "warming"
+        return None
+
+    def _unknown(self, reason: str) -> Dict[str, Any]:
+        return {"label": "unknown", "category": None, "score": 0.0, "model": reason}
+
+    def _to_result(self, model: str, score: float) -> Dict[str, Any]:
+        if model == "unavailable":
+            # Heç bir ML paketi yoxdur - bir daha pool-a göndərmə
+            self.available = False
+            return self._unknown(model)
+
+        if score == 0.0:
+            # VADER / TextBlob mətndə tanıdığı söz tapmayıb - bu "neytral" deyil, bilinmir
+            self.no_signal += 1
+            return {"label": "unknown", "category": None, "score": 0.0, "model": model}
+
+        if score >= self.positive_threshold:
+            label, category = "positive", "satisfaction"
+        elif score <= self.negative_threshold:
+            label, category = "negative", "frustration"
+        else:
+            label, category = "neutral", "non_emotional"
+        return {"label": label, "category": category, "score": round(score, 4), "model": model}
+
+    def classify(self, text: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Sinxron variant (batch / test üçün)"""
+        reason = self._skip_reason(text)
+        if reason:
+            return self._unknown(reason)
+
+        self.calls += 1
+        try:
+            future = self._pool().submit(_score, text)
+            return self._to_result(*future.result(timeout=timeout or self.timeout))
+        except FutureTimeoutError:
+            self.timeouts += 1
+            return self._unknown("timeout")
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ ML fallback xətası: {e}")
+            return self._unknown("error")
+
+    async def classify_async(self, text: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Event loop üçün: worker prosesdə işləyir, deadline-dan sonra unknown"""
+        reason = self._skip_reason(text)
+        if reason:
+            return self._unknown(reason)
+
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        try:
+            model, score = await asyncio.wait_for(
+                loop.run_in_executor(self._pool(), _score, text),
+                timeout=timeout or self.timeout
+            )
+            return self._to_result(model, score)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return self._unknown("timeout")
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ ML fallback xətası: {e}")
+            return self._unknown("error")
+
+    def to_psychology(self, sentiment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """ML nəticəsi → DeepThink nəticə formatı (unknown → None)"""
+        category = sentiment.get("category")
+        if not category:
+            return None
+
+        mood = self.category_to_mood.get(category, "neutral")
+        return {
+            "current_mood": mood,
+            "emotional_state": mood if mood != "neutral" else "calm",
+            "last_message_type": category,
+            "last_reason": f"ml_{sentiment.get('model')}:{sentiment.get('score')}",
+            "operator_required": False,
+            "updated_at": datetime.now().isoformat()
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.ready = False
+        self._warming = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self._executor is not None,
+            "available": self.available,
+            "ready": self.ready,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "no_signal": self.no_signal,
+            "not_ready": self.not_ready
+        }
+
+
+# GLOBAL INSTANCE
+sentiment_fallback = SentimentFallback()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RESULT CACHE - KLASSİFİKASİYA NƏTİCƏLƏRİ ÜÇÜN LRU
+✅ Açar: (normalizasiya olunmuş mətn, rule-set versiyası)
+✅ Ölçü məhduddur - ən köhnə istifadə olunan silinir
+✅ Rule reload zamanı tam təmizlənir
+✅ hit / miss / eviction sayğacları
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+_MISSING = object()
+
+# Bütün cache-lər (statistika üçün)
+_CACHES: Dict[str, "ResultCache"] = {}
+
+
+class ResultCache:
+    def __init__(self, name: str, maxsize: int = 4096):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        _CACHES[name] = self
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cache-də varsa qaytar, yoxdursa hesabla və saxla (None da saxlanılır)"""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # Hesablama lock-dan kənarda - paralel mesajları bloklamır
+        value = compute()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+        return value
+
+    def clear(self, *_: Any) -> None:
+        """Bütün nəticələri sil (rule reload listener kimi də istifadə olunur)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Bütün klassifikasiya cache-lərinin statistikası"""
+    return {name: cache.stats() for name, cache in _CACHES.items()}
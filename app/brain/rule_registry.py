@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RULE REGISTRY - HOT-RELOAD QAYDA İNDEKSİ
+✅ JSON fayl bir dəfə oxunur və kompilyasiya olunur
+✅ Fayl dəyişəndə (mtime/size) yenidən kompilyasiya
+✅ Yeni versiya atomik şəkildə dəyişdirilir
+✅ Manual dəyişikliklər ən gec check_interval saniyə ərzində görünür
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class RuleRegistry:
+    """
+    Qayda faylını kompilyasiya olunmuş formada yaddaşda saxlayır.
+
+    loader   → fayldan xam qaydaları oxuyur (dict qaytarır)
+    compiler → xam qaydalardan match strukturu qurur
+    """
+
+    def __init__(self, path: Path, loader: Callable[[Path], Any],
+                 compiler: Callable[[Any], Any], check_interval: float = 1.0):
+        self.path = Path(path)
+        self.loader = loader
+        self.compiler = compiler
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[int], None]] = []
+
+        # (signature, version, raw, compiled) - tək obyekt kimi dəyişdirilir
+        self._state: Optional[Tuple[Any, int, Any, Any]] = None
+        self._next_check = 0.0
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _reload(self, signature) -> None:
+        raw = self.loader(self.path)
+        compiled = self.compiler(raw)
+        version = self._state[1] + 1 if self._state else 1
+        # 🚨 ATOMİK SWAP: oxuyanlar ya köhnə, ya da yeni versiyanı görür
+        self._state = (signature, version, raw, compiled)
+        print(f"   🔁 Rules kompilyasiya edildi: {self.path.name} (v{version})")
+
+        # İlk yükləmə reload sayılmır
+        if version == 1:
+            return
+
+        for listener in list(self._listeners):
+            try:
+                listener(version)
+            except Exception as e:
+                print(f"⚠️ Rule reload listener xətası: {e}")
+
+    def _refresh(self) -> Tuple[Any, int, Any, Any]:
+        now = time.monotonic()
+        state = self._state
+        if state is not None and now < self._next_check:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is not None and now < self._next_check:
+                return state
+
+            signature = self._signature()
+            if state is None or signature != state[0]:
+                self._reload(signature)
+                # Loader faylı yarada bilər (default rules) - signature-i yenilə
+                if signature is None:
+                    self._state = (self._signature(),) + self._state[1:]
+
+            self._next_check = now + self.check_interval
+            return self._state
+
+    def get(self) -> Any:
+        """Kompilyasiya olunmuş qaydaları qaytarır"""
+        return self._refresh()[3]
+
+    def raw(self) -> Any:
+        """Xam (JSON) qaydaları qaytarır"""
+        return self._refresh()[2]
+
+    @property
+    def version(self) -> int:
+        return self._refresh()[1]
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """Hər yenidən kompilyasiyadan (reload) sonra callback(version) çağırılır"""
+        self._listeners.append(callback)
+
+    def invalidate(self) -> None:
+        """Növbəti get() çağırışında faylı mütləq yoxla"""
+        self._next_check = 0.0
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RULE SUGGESTER - UNKNOWN PHRASE → ƏN YAXIN KATEQORİYA (OFFLINE)
+✅ Rule phrase-ləri və unknown mesajlar char n-gram TF-IDF ilə vektorlaşdırılır (sklearn, char_wb)
+✅ Oxşarlıq BİR sparse matris hasili ilə (hissə-hissə) hesablanır - Python loop yoxdur
+✅ Kateqoriya balı = kateqoriyanın ən yaxın phrase-inin oxşarlığı (sparse top-k, dense kopya yoxdur)
+✅ Nəticə: oxşarlıq balı ilə sıralanmış təkliflər (rule müəllifləri üçün)
+
+İstifadə:
+    python -m app.brain.rule_suggester                       # app/brain/unknown.json
+    python -m app.brain.rule_suggester --messages msgs.txt   # hər sətir bir mesaj
+    python -m app.brain.rule_suggester --out suggestions.json --top 3 --min-score 0.3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.brain.fuzzy_index import fuzzy_key, phrase_index
+
+UNKNOWN_PATH = Path(__file__).parent / "unknown.json"
+
+NGRAM_RANGE = (2, 4)
+
+
+def _top_categories(similarity: sp.spmatrix, column_category: np.ndarray,
+                    top: int) -> Tuple[np.ndarray, ...]:
+    """
+    Sparse oxşarlıq (sətir × rule phrase) → hər sətir üçün ən yaxşı `top` kateqoriya
+    Yalnız sıfırdan fərqli elementlər işlənir (dense matris / sətir başına loop yoxdur)
+    Sütunlar kateqoriyaya görə düzülüb → CSR sətrində (sətir, kateqoriya) qrupları ardıcıldır
+    Returns: (sətir, rank, kateqoriya, ən yaxın phrase sütunu, bal)
+    """
+    similarity = similarity.tocsr()
+    similarity.sort_indices()
+    columns, scores = similarity.indices, similarity.data
+    if not len(scores):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty, scores
+    rows = np.repeat(np.arange(similarity.shape[0]), np.diff(similarity.indptr))
+    categories = column_category[columns]
+
+    # Kateqoriya balı = qrupdakı maksimum, ən yaxın phrase = maksimumun ilk sütunu
+    boundary = np.ones(len(rows), dtype=bool)
+    boundary[1:] = (rows[1:] != rows[:-1]) | (categories[1:] != categories[:-1])
+    starts = np.flatnonzero(boundary)
+    group_scores = np.maximum.reduceat(scores, starts)
+    group_of = np.cumsum(boundary) - 1
+    at_max = np.flatnonzero(scores == group_scores[group_of])
+    first_max = at_max[np.append(True, group_of[at_max][1:] != group_of[at_max][:-1])]
+    group_rows, group_categories, group_columns = rows[starts], categories[starts], columns[first_max]
+
+    # Sətir daxilində bal ↓ → rank; rank < top saxlanılır
+    order = np.lexsort((group_categories, -group_scores, group_rows))
+    group_rows = group_rows[order]
+    ranks = np.arange(len(order)) - np.searchsorted(group_rows, group_rows)
+    keep = ranks < top
+    order = order[keep]
+    return (group_rows[keep], ranks[keep], group_categories[order],
+            group_columns[order], group_scores[order])
+
+
+def _fuzzy_keys(texts: List[str]) -> List[str]:
+    """
+    fuzzy_key bütün siyahıya: mətnlər birləşdirilib regex-lər BİR dəfə işlədilir
+    Ayırıcı normalizasiyada dəyişmir; uyğunsuzluq olarsa tək-tək hesablanır
+    """
+    separator = "\x01\x02"
+    keys = fuzzy_key(separator.join(texts)).split(separator)
+    if len(keys) != len(texts):
+        return [fuzzy_key(text) for text in texts]
+    return [key.strip() for key in keys]
+
+
+def load_unknown_phrases(path: Path = UNKNOWN_PATH) -> List[Tuple[str, int]]:
+    """unknown.json → [(phrase, count)] (yeni sıralanmış və köhnə formatlar)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Oxuna bilmədi: {path} ({e})")
+        return []
+
+    result = []
+    for item in data if isinstance(data, list) else []:
+        if isinstance(item, dict):
+            phrase = item.get("phrase") or item.get("original") or item.get("normalized")
+            if phrase:
+                result.append((phrase, int(item.get("count", 1))))
+    return result
+
+
+def load_message_lines(path: Path) -> List[Tuple[str, int]]:
+    """Hər sətir bir mesaj - təkrarlar sayılır"""
+    counts: Dict[str, int] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                counts[line] = counts.get(line, 0) + 1
+    return list(counts.items())
+
+
+def suggest(unknown: Iterable[Tuple[str, int]],
+            rules: Optional[List[Tuple[str, str, str]]] = None,
+            top: int = 3, min_score: float = 0.0,
+            chunk_size: int = 5000) -> List[Dict]:
+    """
+    Args:
+        unknown: [(mətn, say)]
+        rules: [(source, label, phrase)] - default: bütün qayda faylları
+        top: hər unknown üçün neçə kateqoriya təklifi
+        min_score: bu baldan aşağı təkliflər atılır
+        chunk_size: bir matris hasilindəki sətir sayı (yaddaş həddi)
+
+    Returns:
+        Ən yüksək bala görə sıralanmış siyahı:
+        {"phrase", "count", "suggestions": [{"source", "category", "score", "nearest_phrase"}]}
+    """
+    if rules is None:
+        rules = phrase_index.rule_phrases()
+
+    # Eyni normalizasiya olunan mesajlar birləşir
+    unknown = [(text, count) for text, count in unknown if text]
+    merged: Dict[str, List] = {}
+    for (text, count), key in zip(unknown, _fuzzy_keys([text for text, _ in unknown])):
+        if not key:
+            continue
+        if key in merged:
+            merged[key][1] += count
+        else:
+            merged[key] = [text, count]
+    if not merged or not rules:
+        return []
+
+    # 1. Rule sütunları kateqoriyaya görə düzülür → sütun → kateqoriya xəritəsi
+    rules = sorted(rules, key=lambda rule: (rule[0], rule[1]))
+    categories: List[Tuple[str, str]] = []
+    column_category = np.empty(len(rules), dtype=np.int64)
+    for column, (source, label, _) in enumerate(rules):
+        if not categories or categories[-1] != (source, label):
+            categories.append((source, label))
+        column_category[column] = len(categories) - 1
+
+    # 2. TF-IDF (char_wb 2-4) - rule phrase-ləri və unknown-lar eyni idf ilə, BİR keçid
+    #    Mətnlər artıq fuzzy_key-dir → sklearn-in lowercase addımı lazım deyil
+    unknown_keys = list(merged)
+    vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=NGRAM_RANGE, lowercase=False,
+                                 sublinear_tf=True, dtype=np.float32)
+    matrix = vectorizer.fit_transform(_fuzzy_keys([rule[2] for rule in rules]) + unknown_keys).tocsr()
+    rule_matrix = matrix[:len(rules)].T.tocsc()
+    unknown_matrix = matrix[len(rules):]
+
+    top = max(1, min(top, len(categories)))
+    best_scores = np.zeros((len(unknown_keys), top), dtype=np.float32)
+    best_categories = np.zeros((len(unknown_keys), top), dtype=np.int64)
+    best_columns = np.zeros((len(unknown_keys), top), dtype=np.int64)
+
+    # 3. Cosine oxşarlıq = sparse hasil (vektorlar L2 normallaşdırılıb), top-k sparse-dan
+    for start in range(0, len(unknown_keys), chunk_size):
+        stop = min(start + chunk_size, len(unknown_keys))
+        rows, ranks, chosen, columns, scores = _top_categories(
+            unknown_matrix[start:stop] @ rule_matrix, column_category, top)
+        rows += start
+        best_scores[rows, ranks] = scores
+        best_categories[rows, ranks] = chosen
+        best_columns[rows, ranks] = columns
+
+    # 4. Nəticə - yalnız həddi keçən sətirlər, sıralama NumPy ilə (bal ↓, say ↓)
+    valid = (best_scores > 0.0) & (best_scores >= min_score)
+    counts_array = np.fromiter((merged[key][1] for key in unknown_keys), dtype=np.int64,
+                               count=len(unknown_keys))
+    rows = np.flatnonzero(valid[:, 0])
+    rows = rows[np.lexsort((-counts_array[rows], -best_scores[rows, 0]))]
+
+    scores = np.round(best_scores[rows].astype(np.float64), 4).tolist()
+    valid_rows = valid[rows].tolist()
+    category_rows = best_categories[rows].tolist()
+    column_rows = best_columns[rows].tolist()
+
+    results = []
+    for position, row in enumerate(rows.tolist()):
+        text, count = merged[unknown_keys[row]]
+        suggestions = []
+        for rank in range(top):
+            if not valid_rows[position][rank]:
+                break
+            source, label = categories[category_rows[position][rank]]
+            suggestions.append({
+                "source": source,
+                "category": label,
+                "score": scores[position][rank],
+                "nearest_phrase": rules[column_rows[position][rank]][2]
+            })
+        results.append({"phrase": text, "count": count, "suggestions": suggestions})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unknown phrase-lər üçün ən yaxın qayda kateqoriyası")
+    parser.add_argument("--unknown", default=str(UNKNOWN_PATH), help="unknown.json yolu")
+    parser.add_argument("--messages", default="", help="Hər sətri bir mesaj olan mətn faylı")
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--min-score", type=float, default=0.2)
+    parser.add_argument("--out", default="", help="Nəticəni JSON faylına yaz")
+    parser.add_argument("--show", type=int, default=30, help="Ekranda göstərilən sətir sayı")
+    args = parser.parse_args()
+
+    if args.messages:
+        unknown = load_message_lines(Path(args.messages))
+    else:
+        unknown = load_unknown_phrases(Path(args.unknown))
+
+    # Rule registry yükləmə mesajlarını susdur
+    with contextlib.redirect_stdout(io.StringIO()):
+        rules = phrase_index.rule_phrases()
+
+    results = suggest(unknown, rules, top=args.top, min_score=args.min_score)
+
+    print(f"📊 Unknown: {len(unknown)} | Rule phrase: {len(rules)} | Təklif: {len(results)}")
+    for item in results[:args.show]:
+        best = item["suggestions"][0]
+        print(f"   {best['score']:.2f}  {item['phrase'][:40]!r} ×{item['count']}"
+              f" → {best['source']}:{best['category']} (~{best['nearest_phrase']})")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Yazıldı: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UNKNOWN PHRASE TRACKER - SPACE-SAVING HEAVY HITTERS
+✅ Tanınmayan mesajlar normalizasiya olunmuş mətn üzrə yığılır
+✅ Yaddaş məhduddur: ən çox capacity phrase saxlanılır (Space-Saving)
+✅ Hər phrase: count, error, first_seen, last_seen, nümunə mesajlar
+✅ unknown.json dövri olaraq (və proses bitəndə) sıralanmış siyahı kimi yazılır
+✅ Rule müəllifləri üçün: ən çox təkrarlanan = ilk əlavə olunmalı
+"""
+
+import atexit
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.brain.message_context import MessageContext, normalize_unicode
+
+
+class UnknownPhraseTracker:
+    """
+    Space-Saving alqoritmi:
+    - phrase varsa → count += 1
+    - yer varsa → count = 1
+    - yer yoxdursa → ən kiçik count-lu phrase çıxarılır,
+      yenisi count = min + 1, error = min ilə daxil olur
+    count - error ≤ həqiqi say ≤ count
+    """
+
+    def __init__(self, path: Path, capacity: int = 500, max_examples: int = 3,
+                 flush_interval: float = 60.0):
+        self.path = Path(path)
+        self.capacity = capacity
+        self.max_examples = max_examples
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # (count, seq, phrase) - köhnəlmiş qeydlər pop zamanı atılır
+        self._heap: List[Tuple[int, int, str]] = []
+        self._seq = 0
+
+        self.total = 0
+        self.evictions = 0
+        self._dirty = False
+        self._next_flush = time.monotonic() + flush_interval
+
+        self._load()
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------
+    # Yükləmə (köhnə append formatı da qəbul olunur)
+    # ------------------------------------------------------
+    def _load(self) -> None:
+        try:
+            if not self.path.exists():
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Unknown phrases yükləmə xətası: {e}")
+            return
+
+        if isinstance(data, dict):
+            data = data.get("phrases", [])
+        if not isinstance(data, list):
+            return
+
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            # Köhnə formatlar: phrase / full_message / platform və ya original / normalized
+            raw_text = item.get("phrase") or item.get("original") or item.get("normalized") or ""
+            phrase = normalize_unicode(raw_text)
+            if not phrase:
+                continue
+
+            seen = item.get("first_seen") or item.get("timestamp", "")
+            examples = item.get("examples") or [item.get("full_message") or item.get("original") or raw_text]
+            platforms = item.get("platforms") or ([item["platform"]] if item.get("platform") else [])
+
+            with self._lock:
+                entry = self._entries.get(phrase)
+                if entry is None:
+                    if len(self._entries) >= self.capacity:
+                        continue
+                    entry = self._entries[phrase] = {
+                        "count": 0,
+                        "error": int(item.get("error", 0)),
+                        "first_seen": seen,
+                        "last_seen": seen,
+                        "examples": [],
+                        "platforms": []
+                    }
+                entry["count"] += int(item.get("count", 1))
+                entry["first_seen"] = min(entry["first_seen"] or seen, seen or entry["first_seen"])
+                entry["last_seen"] = max(entry["last_seen"], item.get("last_seen") or seen)
+                self._add_examples(entry, examples)
+                for platform in platforms:
+                    if platform not in entry["platforms"]:
+                        entry["platforms"].append(platform)
+                self.total += int(item.get("count", 1))
+
+        with self._lock:
+            self._rebuild_heap()
+
+    # ------------------------------------------------------
+    # Space-Saving
+    # ------------------------------------------------------
+    def _push(self, phrase: str, count: int) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (count, self._seq, phrase))
+        # Köhnəlmiş qeydlər çoxalanda heap-i yenidən qur
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(entry["count"], 0, phrase) for phrase, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, Dict[str, Any]]:
+        while True:
+            count, _, phrase = heapq.heappop(self._heap)
+            entry = self._entries.get(phrase)
+            if entry is not None and entry["count"] == count:
+                return phrase, self._entries.pop(phrase)
+
+    def _add_examples(self, entry: Dict[str, Any], examples: List[str]) -> None:
+        for example in examples:
+            if len(entry["examples"]) >= self.max_examples:
+                return
+            if example and example not in entry["examples"]:
+                entry["examples"].append(example)
+
+    def record(self, message, platform: str = "telegram") -> None:
+        """Tanınmayan mesajı say (message: str və ya MessageContext)"""
+        ctx = MessageContext.of(message)
+        phrase = ctx.normalized
+        if not phrase:
+            return
+
+        now_iso = datetime.now().isoformat()
+
+        with self._lock:
+            self.total += 1
+            entry = self._entries.get(phrase)
+
+            if entry is None:
+                count, error = 1, 0
+                if len(self._entries) >= self.capacity:
+                    _, evicted = self._pop_min()
+                    error = evicted["count"]
+                    count = error + 1
+                    self.evictions += 1
+                entry = self._entries[phrase] = {
+                    "count": count,
+                    "error": error,
+                    "first_seen": now_iso,
+                    "last_seen": now_iso,
+                    "examples": [],
+                    "platforms": []
+                }
+            else:
+                entry["count"] += 1
+                entry["last_seen"] = now_iso
+
+            self._add_examples(entry, [ctx.text.strip()])
+            if platform and platform not in entry["platforms"]:
+                entry["platforms"].append(platform)
+            self._push(phrase, entry["count"])
+            self._dirty = True
+
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    # ------------------------------------------------------
+    # Nəticə
+    # ------------------------------------------------------
+    def top(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Sıralanmış siyahı: ən çox görülən birinci"""
+        with self._lock:
+            ranked = sorted(
+                self._entries.items(),
+                key=lambda item: (-item[1]["count"], item[1]["error"], item[0])
+            )
+            result = [
+                {
+                    "phrase": phrase,
+                    "count": entry["count"],
+                    "error": entry["error"],
+                    "first_seen": entry["first_seen"],
+                    "last_seen": entry["last_seen"],
+                    "examples": list(entry["examples"]),
+                    "platforms": list(entry["platforms"])
+                }
+                for phrase, entry in ranked
+            ]
+        return result[:limit] if limit else result
+
+    def flush(self) -> bool:
+        """Dəyişiklik varsa unknown.json-u atomik yaz"""
+        with self._lock:
+            self._next_flush = time.monotonic() + self.flush_interval
+            if not self._dirty:
+                return False
+            self._dirty = False
+
+        ranked = self.top()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(ranked, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            self._dirty = True
+            print(f"⚠️ Unknown phrases yazma xətası: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tracked": len(self._entries),
+                "capacity": self.capacity,
+                "total": self.total,
+                "evictions": self.evictions,
+                "pending_flush": self._dirty
+            }
@@ -23,7 +23,7 @@ from telegram.ext import (
 # 🔹 CORE MEMORY FUNKSİYALARI
 from app.storage.memory import (
     add_customer_if_not_exists,
-    save_message,
+    submit_message,
     set_operator_handoff,
     is_operator_handoff_active,
     get_customer_brain,
@@ -37,6 +37,8 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 from app.brain.deepthink import deepthink
 from app.brain.intent.intent_think import intent_think
+from app.brain.message_context import MessageContext
+from app.brain.ml_fallback import sentiment_fallback
 # 🔹 PROJECT ROOT PATH TAP
 ROOT_PATH = Path(__file__).parent.parent.parent  # app/channels/telegram → robot
 sys.path.append(str(ROOT_PATH))
@@ -111,11 +113,12 @@ OPERATOR_KEYWORDS = [
 # ==============================
 # RESPONSE SYSTEM v2.0
 # ==============================
-def generate_smart_response(text: str, psychology: dict = None, intent: dict = None) -> str:
+def generate_smart_response(text, psychology: dict = None, intent: dict = None) -> str:
     """
     PSİXOLOGİYA + INTENT əsasında ağıllı cavab
+    text: str və ya MessageContext
     """
-    t = text.lower()
+    t = MessageContext.of(text).lowered
     
     # CRITICAL PSİXOLOGİYA → TEKST ÇOX VACİB
     if psychology:
@@ -265,6 +268,9 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     print(f"\n📩 YENİ MESAJ: {user_id} ({username}): {text[:50]}...")
 
+    # 🚨 MESAJ CONTEXT: bütün analizlər eyni normalizasiyanı paylaşır
+    ctx = MessageContext(text)
+
     # 1️⃣ MÜŞTERİ YARAT (ƏGƏR YOXDURSA)
     add_customer_if_not_exists(
         company_id=company_id,
@@ -279,7 +285,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # 3️⃣ PSİXOLOGİYA ANALİZİ (DEEPTHINK)
-    psychology_result = deepthink.analyze(text)
+    psychology_result = deepthink.analyze(ctx)
     
     if psychology_result:
         current_mood = psychology_result.get("current_mood", "neutral")
@@ -293,12 +299,18 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         psychology_result = None
         print(f"   ❓ UNKNOWN PHRASE")
+
+        # 3️⃣.1 ML FALLBACK - yalnız rule miss üçün (deadline-dan sonra unknown qalır)
+        sentiment = await sentiment_fallback.classify_async(ctx.text)
+        psychology_result = sentiment_fallback.to_psychology(sentiment)
+        if psychology_result:
+            print(f"   🤖 ML SENTIMENT: {sentiment['label']} ({sentiment['score']}) → {psychology_result['current_mood']}")
     
     # 4️⃣ INTENT ANALİZİ
     intent_result = None
     if psychology_result:
         intent_result = intent_think.analyze(
-            text, 
+            ctx, 
             psychology_result.get("last_message_type")
         )
         
@@ -318,13 +330,13 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         handoff_reason = f"critical_intent:{intent_result.get('intent', 'unknown')}"
     
     # 6️⃣ MANUAL OPERATOR REQUEST
-    if any(k in text.lower() for k in OPERATOR_KEYWORDS):
+    if ctx.contains_any("operator", OPERATOR_KEYWORDS):
         should_handoff = True
         handoff_reason = "manual_request"
     
     # 7️⃣ PROFİL SORĞUSU
-    if "profil" in text.lower() or "mənim" in text.lower() and ("məlumat" in text.lower() or "info" in text.lower()):
-        profile = get_customer_profile(user_id)
+    if "profil" in ctx.lowered or "mənim" in ctx.lowered and ("məlumat" in ctx.lowered or "info" in ctx.lowered):
+        profile = get_customer_profile(user_id, company_id, platform)
         if profile:
             profile_text = (
                 f"👤 SİZİN PROFİLİNİZ:\n"
@@ -392,19 +404,20 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await asyncio.sleep(random.uniform(typing_delay, typing_delay + 0.5))
 
     # 🔟 SMART RESPONSE GENERATE
-    response = generate_smart_response(text, psychology_result, intent_result)
+    response = generate_smart_response(ctx, psychology_result, intent_result)
     
     print(f"   🤖 CAVAB: {response[:50]}...")
 
     # 1️⃣1️⃣ MESSAGE SAVE (PSİXOLOGİYA + INTENT DAXİLİ)
-    save_message(
+    # Thread pool-da: event loop bloklanmır, eyni müştərinin mesajları ardıcıl yazılır
+    await asyncio.wrap_future(submit_message(
         user_id=user_id,
-        message=text,
+        message=ctx,
         response=response,
         company_id=company_id,
         platform=platform,
         username=username
-    )
+    ))
 
     # 1️⃣2️⃣ SEND RESPONSE
     await message.reply_text(response, reply_markup=CHAT_MENU)
@@ -435,6 +448,9 @@ def main():
     print("👥 OPERATOR HANDOFF: AKTİV")
     print("=" * 60)
 
+    # ML fallback worker-i arxa fonda isit (ilk rule miss soyuq start gözləməsin)
+    sentiment_fallback.warm_up()
+
     # HTTPX Request (daha stabil)
     request = HTTPXRequest(
         connect_timeout=30,
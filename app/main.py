@@ -8,6 +8,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
+import asyncio
 import json
 import os
 from datetime import datetime
@@ -16,7 +17,7 @@ from datetime import datetime
 from app.storage.memory import (
     get_memory_manager,
     initialize_memory_system,
-    save_message,
+    submit_message,
     add_customer_if_not_exists,
     get_statistics,
     set_operator_handoff,
@@ -189,12 +190,21 @@ async def health_check():
 # CHAT ENDPOINTS
 # ===========================================
 
+def _log_save_failure(future, company_id: str, platform: str, user_id: str):
+    """submit_message Future-u bitəndə: xəta varsa logla"""
+    if future.cancelled():
+        print(f"⚠️ Mesaj yazılması ləğv olundu: {company_id}/{platform}/{user_id}")
+        return
+    error = future.exception()
+    if error is not None:
+        print(f"⚠️ Mesaj yazıla bilmədi: {company_id}/{platform}/{user_id} ({error})")
+
 @app.post("/api/chat", response_model=MessageResponse)
 async def chat_message(request: MessageRequest, background_tasks: BackgroundTasks):
     """
     Mesaj qəbul et və cavab yarat
     
-    Background task olaraq mesajı yadda saxlayır
+    Mesajı yaddaş pool-unda (arxa fonda) saxlayır - cavab commit-i gözləmir, xəta loglanır
     """
     # 1. Müştəri yoxdursa əlavə et
     add_customer_if_not_exists(
@@ -214,9 +224,9 @@ async def chat_message(request: MessageRequest, background_tasks: BackgroundTask
     # 3. AI cavabını yarat (burada sadə bir rule-based sistem var)
     ai_response = generate_response(request.message, handoff_active)
     
-    # 4. Background task olaraq mesajı yadda saxla
-    background_tasks.add_task(
-        save_message,
+    # 4. Mesajı yaddaş pool-unda saxla (eyni müştəri ardıcıl, fərqli müştərilər paralel)
+    # Cavab gözləmir; yazma xətası itmir (done-callback loglayır)
+    save_future = submit_message(
         user_id=request.user_id,
         message=request.message,
         response=ai_response,
@@ -224,6 +234,8 @@ async def chat_message(request: MessageRequest, background_tasks: BackgroundTask
         platform=request.platform,
         username=request.username
     )
+    save_future.add_done_callback(
+        lambda future: _log_save_failure(future, request.company_id, request.platform, request.user_id))
     
     # 5. Profili analiz et və yenilə
     background_tasks.add_task(
@@ -342,9 +354,10 @@ async def get_customer_info(user_id: str, company_id: str = "default", platform:
     raise HTTPException(status_code=404, detail="Müştəri tapılmadı")
 
 @app.get("/api/customer/{user_id}/messages")
-async def get_customer_messages(user_id: str, limit: int = 20):
+async def get_customer_messages(user_id: str, limit: int = 20, company_id: str = "default",
+                                platform: str = "telegram"):
     """Müştərinin mesajlarını gətir"""
-    messages = memory_manager.get_customer_messages(user_id, limit)
+    messages = memory_manager.get_customer_messages(user_id, limit, company_id, platform)
     
     return {
         "status": "success",
@@ -361,11 +374,13 @@ async def get_customer_messages(user_id: str, limit: int = 20):
 @app.post("/api/cleanup")
 async def cleanup_data(days: int = 30):
     """Köhnə məlumatları təmizlə"""
-    memory_manager.cleanup_old_data(days)
+    # Fayl əməliyyatları event loop-u bloklamasın
+    netice = await asyncio.to_thread(memory_manager.cleanup_old_data, days)
     
     return {
         "status": "success",
         "message": f"Son {days} gündən qabaq məlumatlar təmizləndi",
+        "result": netice,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ANALİTİKA AQREQATORU - İNKREMENTAL SAYĞACLAR
+✅ Mesaj başına O(1): yalnız yaddaşdakı sayğaclar artır (glob / JSON parse YOXDUR)
+✅ total_customers: startup-da BİR dəfə sayılır, yeni müştəri yarananda +1
+✅ Günlük: message_count, active_customers (günün unikal müştəriləri), operator_handoffs
+✅ Bu günün unikal müştəri id-ləri meta-da (active_today) saxlanılır - restart-dan sonra təkrar sayılmır
+✅ Dəyişmiş günlər flush_interval-da bir (və proses bitəndə) backend-ə yazılır
+✅ Retention (30 gün) gündə BİR dəfə - gün dəyişəndə
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Set
+
+from app.storage.backend import ANALYTICS_KEEP_DAYS, ANALYTICS_META_KEYS, StorageBackend
+
+
+def _empty_day() -> Dict[str, int]:
+    return {"message_count": 0, "active_customers": 0, "operator_handoffs": 0}
+
+
+class AnalyticsAggregator:
+    """
+    record_message(user_id)     → günlük message_count / active_customers
+    record_customer_created()   → total_customers += 1
+    record_handoff()            → günlük operator_handoffs
+    Restart-dan sonra active_customers bu günün yazılmış dəyərindən və id-lərindən davam edir
+    """
+
+    def __init__(self, backend: StorageBackend, flush_interval: float = 30.0,
+                 keep_days: int = ANALYTICS_KEEP_DAYS):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.keep_days = keep_days
+
+        self._lock = threading.Lock()
+        self._daily: Dict[str, Dict[str, int]] = {}
+        self._dirty_days: Set[str] = set()
+        self._active_today: Set[str] = set()
+        self._today = ""
+        self._pruned_day = ""
+
+        self.total_customers = 0
+        self.last_update = ""
+        self._next_flush = time.monotonic() + flush_interval
+        self.flushes = 0
+
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self) -> None:
+        analitik_veri = self.backend.get_analytics()
+        with self._lock:
+            for key, value in analitik_veri.items():
+                if key not in ANALYTICS_META_KEYS and isinstance(value, dict):
+                    day = _empty_day()
+                    day.update({name: int(value.get(name, 0)) for name in day})
+                    self._daily[key] = day
+            self.last_update = analitik_veri.get("last_update", "")
+            active = analitik_veri.get("active_today")
+            if isinstance(active, dict) and active.get("day") == datetime.now().strftime("%Y-%m-%d"):
+                self._today = active["day"]
+                self._active_today = {str(user_id) for user_id in active.get("users", [])}
+            # Müştəri sayı startup-da BİR dəfə hesablanır
+            self.total_customers = self.backend.count_customers()
+
+    # ------------------------------------------------------
+    # Sayğaclar (O(1))
+    # ------------------------------------------------------
+    def _day(self, now: datetime) -> Dict[str, int]:
+        """Lock altında çağırılır: bu günün sayğacları (gün dəyişibsə aktiv set sıfırlanır)"""
+        day = now.strftime("%Y-%m-%d")
+        if day != self._today:
+            self._today = day
+            self._active_today = set()
+        counters = self._daily.get(day)
+        if counters is None:
+            counters = self._daily[day] = _empty_day()
+        self._dirty_days.add(day)
+        return counters
+
+    def record_message(self, user_id: str) -> None:
+        now = datetime.now()
+        with self._lock:
+            counters = self._day(now)
+            counters["message_count"] += 1
+            user_id = str(user_id)
+            if user_id not in self._active_today:
+                self._active_today.add(user_id)
+                counters["active_customers"] += 1
+            self.last_update = now.isoformat()
+        self._maybe_flush(now)
+
+    def record_customer_created(self) -> None:
+        with self._lock:
+            self.total_customers += 1
+            # total_customers meta açardır - növbəti flush-da yazılsın
+            self._day(datetime.now())
+
+    def record_handoff(self) -> None:
+        now = datetime.now()
+        with self._lock:
+            self._day(now)["operator_handoffs"] += 1
+        self._maybe_flush(now)
+
+    # ------------------------------------------------------
+    # Flush / retention
+    # ------------------------------------------------------
+    def _maybe_flush(self, now: datetime) -> None:
+        if time.monotonic() >= self._next_flush or now.strftime("%Y-%m-%d") != self._pruned_day:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Dəyişmiş günləri yaz; gün dəyişibsə retention-ı işə sal"""
+        now = datetime.now()
+        with self._lock:
+            self._next_flush = time.monotonic() + self.flush_interval
+            if not self._dirty_days:
+                return False
+            daily = {day: dict(self._daily[day]) for day in self._dirty_days}
+            meta = {"total_customers": self.total_customers, "last_update": self.last_update}
+            if self._today in daily:
+                meta["active_today"] = {"day": self._today, "users": sorted(self._active_today)}
+            self._dirty_days = set()
+
+        try:
+            self.backend.save_analytics(daily, meta)
+        except Exception as e:
+            with self._lock:
+                self._dirty_days.update(daily)
+            print(f"⚠️ Analitika yazma xətası: {e}")
+            return False
+        self.flushes += 1
+
+        today = now.strftime("%Y-%m-%d")
+        if today != self._pruned_day:
+            self._pruned_day = today
+            self.prune(now)
+        return True
+
+    def prune(self, now: datetime) -> int:
+        """keep_days gündən köhnə günlər: yaddaşdan və backend-dən"""
+        with self._lock:
+            for day in list(self._daily):
+                try:
+                    if (now - datetime.strptime(day, "%Y-%m-%d")).days > self.keep_days:
+                        del self._daily[day]
+                except ValueError:
+                    continue
+        return self.backend.prune_analytics(now, self.keep_days)
+
+    # ------------------------------------------------------
+    # Oxuma
+    # ------------------------------------------------------
+    def today(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._daily.get(datetime.now().strftime("%Y-%m-%d"), _empty_day()))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """global.json formatında (yaddaşdan)"""
+        with self._lock:
+            analitik_veri: Dict[str, Any] = {day: dict(counters) for day, counters in sorted(self._daily.items())}
+            analitik_veri["total_customers"] = self.total_customers
+            analitik_veri["last_update"] = self.last_update
+        return analitik_veri
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._dirty_days)
+        return {"days": len(self._daily), "pending_days": pending, "flushes": self.flushes,
+                "flush_interval": self.flush_interval}
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YADDAŞ BACKEND İNTERFEYSİ - PLUGGABLE STORAGE
+✅ memory.py yalnız bu interfeysi çağırır (fayl yolları backend-in işidir)
+✅ JsonBackend: mövcud qovluq strukturu (customers / conversations / control / analytics)
+✅ SqliteBackend: WAL rejimi, indeksli cədvəllər, mesaj başına BİR tranzaksiya
+✅ Seçim: MEMORY_BACKEND=json|sqlite (default: json)
+✅ Serializasiya: MEMORY_SERIALIZER=json|binary (default: json) - backend başına
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.storage.concurrency import lock_manager
+from app.storage.conversation_log import ConversationLog
+from app.storage.customer_store import CustomerStore, atomic_write_json, fsync_paths
+from app.storage.handoff_registry import HandoffJournal, HandoffKey
+from app.storage.serializer import JSON, Serializer, get_serializer
+
+HISTORY_LIMIT = 100
+ANALYTICS_KEEP_DAYS = 30
+# active_today: {"day": "YYYY-MM-DD", "users": [...]} - restart-dan sonra günün unikal müştəriləri
+ANALYTICS_META_KEYS = ("total_customers", "last_update", "active_today")
+
+
+def history_days(days: int) -> List[str]:
+    """Bu gündən geriyə days gün: ["2026-01-14", "2026-01-13", ...]"""
+    today = datetime.now().date()
+    return [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+
+
+class StorageBackend(ABC):
+    """
+    memory.py-nin istifadə etdiyi bütün oxuma/yazma əməliyyatları
+    Qaytarılan formatlar JSON fayllarının formatı ilə EYNİDİR
+    """
+
+    name = "abstract"
+
+    # ------------------------------------------------------
+    # Tranzaksiya
+    # ------------------------------------------------------
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Bir mesajın bütün yazmaları - default: heç nə etmir"""
+        yield
+
+    def initialize(self) -> None:
+        """Lazımi qovluq / cədvəlləri yarat"""
+
+    def close(self) -> None:
+        """Açıq resursları bağla"""
+
+    def write_batch(self, customers: Dict[str, Dict[str, Dict[str, Any]]],
+                    conversations: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """
+        Group commit: bir batch-in bütün yazmaları BİR tranzaksiyada, sonda BİR durability barrier
+        customers: {user_id: sections} (birləşdirilmiş), conversations: [(user_id, day, entry), ...]
+        """
+        with self.transaction():
+            for user_id, sections in customers.items():
+                self.save_customer(user_id, sections)
+            for user_id, day, entry in conversations:
+                self.append_conversation(user_id, day, entry)
+
+    # ------------------------------------------------------
+    # Müştəri beyni
+    # ------------------------------------------------------
+    @abstractmethod
+    def customer_exists(self, user_id: str) -> bool: ...
+
+    @abstractmethod
+    def load_customer(self, user_id: str) -> Optional[Dict[str, Dict[str, Any]]]: ...
+
+    @abstractmethod
+    def save_customer(self, user_id: str, sections: Dict[str, Dict[str, Any]]) -> None: ...
+
+    @abstractmethod
+    def count_customers(self) -> int: ...
+
+    # ------------------------------------------------------
+    # Konuşmalar
+    # ------------------------------------------------------
+    @abstractmethod
+    def append_conversation(self, user_id: str, day: str, entry: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def conversation_history(self, user_id: str, days: int, limit: int = HISTORY_LIMIT,
+                             before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Son days günün mesajları, ən yeni birinci (before: bu timestamp-dan köhnə səhifə)"""
+
+    @abstractmethod
+    def compact_conversations(self, retention_days: Optional[int] = None) -> Dict[str, int]:
+        """Retention / compaction keçidi - {"expired": .., "bytes_reclaimed": .., ...}"""
+
+    # ------------------------------------------------------
+    # Operator handoff
+    # ------------------------------------------------------
+    # Açar: (company_id, platform, user_id). Oxuma HandoffRegistry-dən (yaddaşda) gedir
+    @abstractmethod
+    def load_handoffs(self) -> Dict[HandoffKey, Dict[str, Any]]:
+        """Bütün aktiv handoff-lar (startup-da bir dəfə)"""
+
+    @abstractmethod
+    def append_handoff(self, key: HandoffKey, record: Optional[Dict[str, Any]]) -> None:
+        """Bir dəyişiklik = bir qeyd. record=None → handoff bağlanır"""
+
+    def snapshot_handoffs(self, records: Dict[HandoffKey, Dict[str, Any]]) -> None:
+        """Jurnalı yığ (default: heç nə etmir)"""
+
+    # ------------------------------------------------------
+    # Analitika
+    # ------------------------------------------------------
+    @abstractmethod
+    def save_analytics(self, daily: Dict[str, Dict[str, int]], meta: Dict[str, Any]) -> None:
+        """Verilən günlərin sayğaclarını (mütləq dəyər) və meta açarları yaz"""
+
+    @abstractmethod
+    def prune_analytics(self, now: datetime, keep_days: int = ANALYTICS_KEEP_DAYS) -> int:
+        """keep_days gündən köhnə günləri sil - silinən gün sayı"""
+
+    @abstractmethod
+    def get_analytics(self) -> Dict[str, Any]:
+        """global.json formatı: {"YYYY-MM-DD": {...}, "total_customers": N, "last_update": ...}"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+# ======================================================
+# JSON QOVLUQ BACKEND-İ (MÖVCUD STRUKTUR)
+# ======================================================
+def _json_oku(dosya_yolu: Path, varsayilan=None):
+    """JSON oxu"""
+    try:
+        if dosya_yolu.exists():
+            with open(dosya_yolu, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return varsayilan if varsayilan is not None else {}
+
+
+def _prune_days(analitik_veri: Dict[str, Any], simdi: datetime,
+                keep_days: int = ANALYTICS_KEEP_DAYS) -> int:
+    """keep_days gündən köhnə günlük qeydləri sil (meta açarlara toxunmur)"""
+    bugun_tarih = simdi.strftime("%Y-%m-%d")
+    silinen = 0
+    for tarih in list(analitik_veri.keys()):
+        if tarih in ANALYTICS_META_KEYS or tarih == bugun_tarih:
+            continue
+        try:
+            if (simdi - datetime.strptime(tarih, "%Y-%m-%d")).days > keep_days:
+                del analitik_veri[tarih]
+                silinen += 1
+        except ValueError:
+            continue
+    return silinen
+
+
+class JsonBackend(StorageBackend):
+    """
+    base_path/
+      customers/<ab>/<cd>/<id>/brain.json  (+ customers/manifest.jsonl)
+      conversations/<ab>/<cd>/<id>/<YYYY-MM-DD>.jsonl  (append-only, köhnə .json da oxunur)
+      conversations/<ab>/<cd>/<id>/archive/<YYYY-MM>.jsonl.gz  (köhnə günlər, arxa fonda yığılır)
+      control/operator_handoff.json (+ .journal.jsonl)
+      analytics/global.json
+    brain / gündəlik / arxiv faylları serializer formatındadır (adlar dəyişmir), control / analytics JSON qalır
+    """
+
+    name = "json"
+
+    def __init__(self, base_path: Path, retention_days: Optional[int] = None,
+                 max_per_day: Optional[int] = None, archive_after_days: Optional[int] = None,
+                 serializer: Serializer = JSON):
+        self.base_path = Path(base_path)
+        self.serializer = serializer
+        self.customers_path = self.base_path / "customers"
+        self.conversations_path = self.base_path / "conversations"
+        self.control_path = self.base_path / "control"
+        self.analytics_path = self.base_path / "analytics"
+        self.handoff_file = self.control_path / "operator_handoff.json"
+        self.handoff_journal = HandoffJournal(self.handoff_file)
+        self.analytics_file = self.analytics_path / "global.json"
+        self.customer_store = CustomerStore(self.customers_path, serializer=serializer)
+        self.conversation_log = ConversationLog(self.conversations_path, retention_days=retention_days,
+                                                max_per_day=max_per_day, archive_after_days=archive_after_days,
+                                                serializer=serializer)
+
+    def initialize(self) -> None:
+        for dizin in [self.customers_path, self.conversations_path, self.control_path, self.analytics_path]:
+            dizin.mkdir(parents=True, exist_ok=True)
+        self.customer_store.initialize()
+        self.conversation_log.initialize()
+
+    def migrate_layout(self) -> Dict[str, int]:
+        """Düz qovluqlar → hash shard-lar (müştərilər + konuşmalar), manifest yenidən qurulur"""
+        result = self.customer_store.migrate_layout()
+        result["conversations_moved"] = self.conversation_log.layout.migrate_all()
+        result["conversations_manifest"] = self.conversation_log.manifest.rebuild(
+            self.conversation_log.layout.iter_ids())
+        return result
+
+    def convert_format(self) -> Dict[str, int]:
+        """Qarışıq ağac → hamısı self.serializer formatında (müştərilər, gündəlik fayllar, arxivlər)"""
+        result = {"customers": self.customer_store.convert_all()}
+        result.update(self.conversation_log.convert_all())
+        return result
+
+    # Müştəri beyni
+    def customer_exists(self, user_id: str) -> bool:
+        return self.customer_store.exists(user_id)
+
+    def load_customer(self, user_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.customer_store.load(user_id)
+
+    def save_customer(self, user_id: str, sections: Dict[str, Dict[str, Any]]) -> None:
+        self.customer_store.save(user_id, sections)
+
+    def count_customers(self) -> int:
+        # Manifestdən - ağac gəzilmir
+        return self.customer_store.count()
+
+    # Konuşmalar
+    def append_conversation(self, user_id: str, day: str, entry: Dict[str, Any]) -> None:
+        self.conversation_log.append(user_id, day, entry)
+
+    def conversation_history(self, user_id: str, days: int, limit: int = HISTORY_LIMIT,
+                             before: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.conversation_log.history(user_id, days, limit=limit, before=before)
+
+    def compact_conversations(self, retention_days: Optional[int] = None) -> Dict[str, int]:
+        return self.conversation_log.compact(retention_days=retention_days)
+
+    def write_batch(self, customers: Dict[str, Dict[str, Dict[str, Any]]],
+                    conversations: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Qeydlər + gün faylı başına BİR append, sonra toxunulan fayllar üçün BİR fsync keçidi"""
+        paths = [self.customer_store.save(user_id, sections) for user_id, sections in customers.items()]
+        paths.extend(self.conversation_log.append_many(conversations))
+        fsync_paths(paths)
+
+    # Operator handoff
+    def load_handoffs(self) -> Dict[HandoffKey, Dict[str, Any]]:
+        return self.handoff_journal.load()
+
+    def append_handoff(self, key: HandoffKey, record: Optional[Dict[str, Any]]) -> None:
+        # Fayl yenidən yazılmır - jurnala BİR sətir
+        with lock_manager.resource(f"handoffs:{self.handoff_file}"):
+            self.handoff_journal.append(key, record)
+
+    def snapshot_handoffs(self, records: Dict[HandoffKey, Dict[str, Any]]) -> None:
+        with lock_manager.resource(f"handoffs:{self.handoff_file}"):
+            self.handoff_journal.snapshot(records)
+
+    # Analitika
+    def save_analytics(self, daily: Dict[str, Dict[str, int]], meta: Dict[str, Any]) -> None:
+        with lock_manager.resource(f"analytics:{self.analytics_file}"):
+            analitik_veri = _json_oku(self.analytics_file, {})
+            for day, counters in daily.items():
+                analitik_veri[day] = dict(counters)
+            analitik_veri.update(meta)
+            atomic_write_json(self.analytics_file, analitik_veri)
+
+    def prune_analytics(self, now: datetime, keep_days: int = ANALYTICS_KEEP_DAYS) -> int:
+        with lock_manager.resource(f"analytics:{self.analytics_file}"):
+            analitik_veri = _json_oku(self.analytics_file, {})
+            silinen = _prune_days(analitik_veri, now, keep_days)
+            if silinen:
+                atomic_write_json(self.analytics_file, analitik_veri)
+            return silinen
+
+    def get_analytics(self) -> Dict[str, Any]:
+        return _json_oku(self.analytics_file, {})
+
+    def close(self) -> None:
+        self.conversation_log.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "path": str(self.base_path), "serializer": self.serializer.name,
+                "conversations": self.conversation_log.stats()}
+
+
+# ======================================================
+# BACKEND SEÇİMİ
+# ======================================================
+def create_backend(kind: Optional[str] = None, base_path: Path = Path("app/storage/data/telegram"),
+                   sqlite_path: Optional[Path] = None, serializer: Optional[str] = None) -> StorageBackend:
+    """
+    kind: "json" | "sqlite" (default: MEMORY_BACKEND env, yoxdursa "json")
+    sqlite_path: default MEMORY_SQLITE_PATH env, yoxdursa base_path/memory.db
+    serializer: "json" | "binary" (default: MEMORY_SERIALIZER env, yoxdursa "json")
+    CONVERSATION_RETENTION_DAYS: 0 = limitsiz (default)
+    CONVERSATION_MAX_PER_DAY: gün başına son N mesaj saxlanılır (default 100, açıq şəkildə 0 = limitsiz)
+    CONVERSATION_ARCHIVE_DAYS: bu gündən köhnə günlər aylıq gzip arxivə (default 30, 0 = arxiv yoxdur)
+    """
+    kind = (kind or os.getenv("MEMORY_BACKEND", "json")).lower()
+    serializer = get_serializer(serializer or os.getenv("MEMORY_SERIALIZER", "json"))
+
+    if kind == "sqlite":
+        from app.storage.sqlite_backend import SqliteBackend
+        sqlite_path = sqlite_path or Path(os.getenv("MEMORY_SQLITE_PATH", str(Path(base_path) / "memory.db")))
+        return SqliteBackend(sqlite_path, serializer=serializer)
+
+    if kind != "json":
+        print(f"⚠️ Naməlum MEMORY_BACKEND: {kind} → json istifadə olunur")
+    return JsonBackend(
+        base_path,
+        retention_days=int(os.getenv("CONVERSATION_RETENTION_DAYS", 0)),
+        max_per_day=int(os.getenv("CONVERSATION_MAX_PER_DAY", 100)),
+        archive_after_days=int(os.getenv("CONVERSATION_ARCHIVE_DAYS", 30)),
+        serializer=serializer
+    )
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YADDAŞ QATI - KONKURENSİYA
+✅ LockManager: (company, platform, user) açarına görə shard-lanmış RLock-lar
+   - eyni müştəri → eyni lock (yeniləmələr ardıcıl, lost update yoxdur)
+   - fərqli müştərilər → fərqli shard (paralel)
+✅ Paylaşılan resurslar (handoff, analitika) üçün adlı lock-lar
+✅ KeyedExecutor: thread pool + müştəri başına növbə
+   - fərqli müştərilərin mesajları paralel işlənir
+   - bir müştərinin mesajları GƏLİŞ SIRASI ilə, bir-bir işlənir
+"""
+
+import atexit
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, Tuple
+
+DEFAULT_SHARDS = 256
+
+
+class LockManager:
+    """Açar → shard RLock (açar sayından asılı olmayaraq sabit yaddaş)"""
+
+    def __init__(self, shards: int = DEFAULT_SHARDS):
+        self.shards = shards
+        self._locks = [threading.RLock() for _ in range(shards)]
+        self._resources: Dict[str, threading.RLock] = {}
+        self._resources_lock = threading.Lock()
+
+        self.acquisitions = 0
+        self.contentions = 0
+
+    @staticmethod
+    def key(company_id: str, platform: str, user_id: str) -> Tuple[str, str, str]:
+        return (str(company_id or ""), str(platform or ""), str(user_id))
+
+    def shard_for(self, company_id: str, platform: str, user_id: str) -> threading.RLock:
+        return self._locks[hash(self.key(company_id, platform, user_id)) % self.shards]
+
+    @contextmanager
+    def _acquire(self, lock: threading.RLock) -> Iterator[None]:
+        self.acquisitions += 1
+        if not lock.acquire(blocking=False):
+            self.contentions += 1
+            lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def lock(self, company_id: str, platform: str, user_id: str):
+        """with lock_manager.lock(company, platform, user): ..."""
+        return self._acquire(self.shard_for(company_id, platform, user_id))
+
+    def try_lock(self, company_id: str, platform: str, user_id: str) -> bool:
+        """Gözləmədən götür (uğurlu olarsa release() çağıran edir)"""
+        return self.shard_for(company_id, platform, user_id).acquire(blocking=False)
+
+    def release(self, company_id: str, platform: str, user_id: str) -> None:
+        self.shard_for(company_id, platform, user_id).release()
+
+    def resource(self, name: str):
+        """Paylaşılan fayl / cədvəl üçün adlı lock (məs. "handoffs:<path>")"""
+        lock = self._resources.get(name)
+        if lock is None:
+            with self._resources_lock:
+                lock = self._resources.setdefault(name, threading.RLock())
+        return self._acquire(lock)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shards": self.shards,
+            "resources": len(self._resources),
+            "acquisitions": self.acquisitions,
+            "contentions": self.contentions
+        }
+
+
+class KeyedExecutor:
+    """
+    submit(key, fn, ...) → Future
+    Eyni açarın tapşırıqları növbəyə düşür, fərqli açarlar pool-da paralel işləyir
+    """
+
+    def __init__(self, max_workers: int = 8, name: str = "memory-worker"):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._queues: Dict[Hashable, Deque[Tuple[Future, Callable, tuple, dict]]] = {}
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+        atexit.register(self.shutdown)
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self.submitted += 1
+            queue = self._queues.get(key)
+            if queue is not None:
+                # Bu açar üçün işləyən tapşırıq var - arxasına düz
+                queue.append((future, fn, args, kwargs))
+                return future
+            self._queues[key] = deque()
+        self._pool.submit(self._run, key, future, fn, args, kwargs)
+        return future
+
+    def _run(self, key: Hashable, future: Future, fn: Callable, args: tuple, kwargs: dict) -> None:
+        while True:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                    self.completed += 1
+                except BaseException as e:
+                    self.failed += 1
+                    print(f"⚠️ Yaddaş tapşırığı xətası ({key}): {e}")
+                    future.set_exception(e)
+
+            with self._lock:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    return
+                future, fn, args, kwargs = queue.popleft()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active_keys = len(self._queues)
+            queued = sum(len(queue) for queue in self._queues.values())
+        return {
+            "max_workers": self.max_workers,
+            "active_keys": active_keys,
+            "queued": queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+
+# GLOBAL INSTANCE
+lock_manager = LockManager()
@@ -0,0 +1,737 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KONUŞMA JURNALI - APPEND-ONLY JSONL
+✅ conversations/<ab>/<cd>/<user>/<YYYY-MM-DD>.jsonl - hər sətir bir mesaj (ShardedLayout)
+✅ conversations/manifest.jsonl - konuşması olan istifadəçilər (compaction / iter_all / convert_all ağacı gəzmir)
+✅ Mesaj başına BİR write() - fayl yenidən oxunmur / yenidən yazılmır (group commit: gün faylı başına BİR)
+✅ Oxuyanlar sətir-sətir stream edir (yarımçıq son sətir atlanır)
+✅ Köhnə <date>.json massivləri oxunur, arxa fon compaction-ı onları .jsonl-ə çevirir
+✅ Retention (gün / gün başına mesaj limiti) YALNIZ arxa fon compaction-ında tətbiq olunur
+✅ Aktiv istifadəçilər üçün son mesajlar ring buffer-də (deque) - "son N mesaj" diskə getmir
+✅ Tail index: istifadəçinin günləri sıralı siyahıda - 30 tarix yoxlanmır, tam sort yoxdur
+✅ archive_after_days-dan köhnə günlər aylıq gzip arxivə yığılır: conversations/<user>/archive/<YYYY-MM>.jsonl.gz
+   (gündəlik fayllar silinir, tarixçə sorğuları arxivi stream edərək oxuyur)
+✅ Compaction nə qədər yer boşaltdığını (bytes_reclaimed) bildirir
+✅ Seqment formatı serializatordandır (json → JSONL sətirləri, binary → uzunluq prefiksli frame-lər)
+   Fayl adları eynidir; mövcud faylın formatı başlığından tanınır - append onun formatında davam edir,
+   compaction yenidən yazanda faylı konfiqurasiya olunmuş formata çevirir
+"""
+
+import atexit
+import bisect
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.storage.layout import MANIFEST_FILE, IdManifest, ShardedLayout
+from app.storage.serializer import HEADER_SIZE, JSON, Serializer, iter_stream, read_file, sniff
+
+LOG_SUFFIX = ".jsonl"
+LEGACY_SUFFIX = ".json"
+LOCK_STRIPES = 64
+ARCHIVE_DIR = "archive"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+COMPACT_STATE_FILE = ".compact_state.json"
+STALE_TMP_SECONDS = 3600
+STOP_TIMEOUT = 30.0
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """JSONL faylını sətir-sətir oxu - korlanmış / yarımçıq sətirlər atlanır"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Hələ yazılmaqda olan son sətir
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def _iter_legacy(path: Path) -> Iterator[Dict[str, Any]]:
+    """Köhnə format: bütün gün bir JSON massivi"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        print(f"⚠️ Oxuna bilmədi: {path} ({e})")
+        return
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict):
+            yield entry
+
+
+def iter_segment(path: Path) -> Iterator[Dict[str, Any]]:
+    """Gündəlik seqment (JSONL və ya binar) - korlanmış / yarımçıq qeydlər atlanır"""
+    try:
+        with open(path, "rb") as f:
+            for entry in iter_stream(f):
+                if isinstance(entry, dict):
+                    yield entry
+    except FileNotFoundError:
+        return
+    except ValueError as e:
+        print(f"⚠️ Seqment oxuna bilmədi: {path} ({e})")
+
+
+def iter_archive(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Aylıq arxivi stream et: (gün, entry) - yarımçıq / korlanmış son hissə atlanır"""
+    try:
+        with gzip.open(path, "rb") as f:
+            for record in iter_stream(f):
+                if isinstance(record, dict) and isinstance(record.get("entry"), dict):
+                    yield record.get("day", ""), record["entry"]
+    except FileNotFoundError:
+        return
+    except (EOFError, OSError, ValueError, zlib.error) as e:
+        print(f"⚠️ Arxiv tam oxuna bilmədi: {path} ({e})")
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class _Tail:
+    """İstifadəçinin son recent_size mesajı: (gün, entry), xronoloji"""
+    __slots__ = ("entries", "complete")
+
+    def __init__(self, entries: Deque[Tuple[str, Dict[str, Any]]], complete: bool):
+        self.entries = entries
+        # True → istifadəçinin BÜTÜN tarixçəsi buffer-dədir
+        self.complete = complete
+
+
+class ConversationLog:
+    """
+    append()   → BİR sətir, BİR write()
+    history()  → son N günün mesajları (ən yeni birinci):
+                 ring buffer-dən, yoxsa sıralı gün indeksi ilə yenidən köhnəyə (sort yoxdur)
+    compact()  → köhnə .json → .jsonl, korlanmış sətirlər, aylıq arxivlər, retention
+    """
+
+    def __init__(self, conversations_path: Path, retention_days: Optional[int] = None,
+                 max_per_day: Optional[int] = None, compact_interval: float = 3600.0,
+                 recent_size: int = 100, recent_users: int = 1024, index_users: int = 10000,
+                 archive_after_days: Optional[int] = None, serializer: Serializer = JSON):
+        self.conversations_path = Path(conversations_path)
+        self.serializer = serializer
+        self.layout = ShardedLayout(self.conversations_path)
+        self.manifest = IdManifest(self.conversations_path / MANIFEST_FILE)
+        self.retention_days = retention_days or None
+        self.max_per_day = max_per_day or None
+        self.archive_after_days = archive_after_days or None
+        self.compact_interval = compact_interval
+
+        # Fayl başına lock (zolaqlı): append ilə compaction yenidən yazması toqquşmur
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._known_dirs = set()
+
+        self._compactor: Optional[threading.Thread] = None
+        self._compactor_lock = threading.Lock()
+        self._stop = threading.Event()
+        # Watermark diskdə: restart-dan sonra dəyişməyən günlər yenidən oxunmur
+        self._state_path = self.conversations_path / COMPACT_STATE_FILE
+        self._last_compact = self._load_last_compact()
+        # compact() eyni anda bir dəfə (arxa fon thread-i və /api/cleanup)
+        self._compact_run_lock = threading.Lock()
+
+        # Ring buffer-lər (LRU, recent_users istifadəçi) və gün indeksi (LRU, index_users istifadəçi)
+        self.recent_size = recent_size
+        self.recent_users = recent_users
+        self.index_users = index_users
+        self._tails: "OrderedDict[str, _Tail]" = OrderedDict()
+        self._day_index: "OrderedDict[str, List[str]]" = OrderedDict()
+        # İstifadəçi başına dəyişiklik sayğacı: diskdən qurulan buffer arada append olubsa atılır
+        self._generations: Dict[str, int] = {}
+        self._tail_lock = threading.Lock()
+
+        self.appends = 0
+        self.compactions = 0
+        self.buffer_hits = 0
+        self.buffer_misses = 0
+        self.archived_days = 0
+        self.bytes_reclaimed = 0
+
+    def initialize(self) -> None:
+        self.layout.initialize()
+        if not self.manifest.exists():
+            # Bir dəfəlik: mövcud ağacdan manifest
+            self.manifest.rebuild(self.layout.iter_ids())
+
+    def iter_user_ids(self) -> Iterator[str]:
+        """Konuşması olan istifadəçilər: manifestdən (yoxdursa ağacdan)"""
+        if self.manifest.exists():
+            yield from self.manifest.iter_ids()
+        else:
+            yield from self.layout.iter_ids()
+
+    # ------------------------------------------------------
+    # Yollar
+    # ------------------------------------------------------
+    def user_dir(self, user_id: str) -> Path:
+        return self.layout.resolve(user_id)
+
+    def day_path(self, user_id: str, day: str) -> Path:
+        return self.user_dir(user_id) / f"{day}{LOG_SUFFIX}"
+
+    def legacy_path(self, user_id: str, day: str) -> Path:
+        return self.user_dir(user_id) / f"{day}{LEGACY_SUFFIX}"
+
+    def archive_path(self, user_id: str, month: str) -> Path:
+        return self.user_dir(user_id) / ARCHIVE_DIR / f"{month}{ARCHIVE_SUFFIX}"
+
+    def _lock_for(self, path: Path) -> threading.Lock:
+        return self._locks[hash(str(path)) % LOCK_STRIPES]
+
+    # ------------------------------------------------------
+    # Yazma
+    # ------------------------------------------------------
+    def append(self, user_id: str, day: str, entry: Dict[str, Any]) -> None:
+        """Bir qeyd = bir frame (JSONL-də bir sətir) = bir write() (O_APPEND)"""
+        self.append_many([(user_id, day, entry)])
+
+    def append_many(self, records: List[Tuple[str, str, Dict[str, Any]]]) -> List[Path]:
+        """Group commit: gün faylı başına BİR write() (qeydlərin sırası saxlanılır) - yazılan fayllar"""
+        grouped: Dict[Path, List[Tuple[str, str, Dict[str, Any]]]] = {}
+        for user_id, day, entry in records:
+            grouped.setdefault(self.day_path(user_id, day), []).append((str(user_id), day, entry))
+
+        for path, path_records in grouped.items():
+            user_dir = path.parent
+            if user_dir not in self._known_dirs:
+                if not user_dir.exists():
+                    # Yeni istifadəçi: əvvəl manifest (çöksə təkrar sətir zərərsizdir, itən istifadəçi olmur)
+                    # manifest yoxdursa (initialize çağırılmayıb) ağac gəzilir - yarımçıq manifest yaradılmır
+                    if self.manifest.exists():
+                        self.manifest.add(path_records[0][0])
+                    user_dir.mkdir(parents=True, exist_ok=True)
+                self._known_dirs.add(user_dir)
+
+            with self._lock_for(path):
+                with open(path, "a+b") as f:
+                    serializer = self.serializer
+                    header = b""
+                    if f.seek(0, os.SEEK_END) == 0:
+                        header = serializer.segment_header()
+                    else:
+                        # Qarışıq ağac: mövcud fayl öz formatında davam edir (compaction çevirir)
+                        f.seek(0)
+                        serializer = sniff(f.read(HEADER_SIZE))
+                    f.write(header + b"".join(serializer.frame(entry) for _, _, entry in path_records))
+            self.appends += len(path_records)
+            for user_id, day, entry in path_records:
+                self._remember(user_id, day, entry)
+
+        if grouped:
+            self._ensure_compactor()
+        return list(grouped)
+
+    # ------------------------------------------------------
+    # Oxuma (stream)
+    # ------------------------------------------------------
+    def days(self, user_id: str) -> List[str]:
+        """İstifadəçinin tarixləri (köhnədən yeniyə)"""
+        user_dir = self.user_dir(user_id)
+        if not user_dir.exists():
+            return []
+        return sorted({
+            path.stem for path in user_dir.iterdir()
+            if path.suffix in (LOG_SUFFIX, LEGACY_SUFFIX) and not path.name.startswith(".")
+        })
+
+    def archive_months(self, user_id: str) -> List[str]:
+        """Arxivlənmiş aylar (köhnədən yeniyə)"""
+        archive_dir = self.user_dir(user_id) / ARCHIVE_DIR
+        if not archive_dir.exists():
+            return []
+        return sorted(path.name[:-len(ARCHIVE_SUFFIX)] for path in archive_dir.glob(f"*{ARCHIVE_SUFFIX}"))
+
+    def iter_day(self, user_id: str, day: str) -> Iterator[Dict[str, Any]]:
+        """Əvvəl köhnə .json (varsa), sonra .jsonl - xronoloji ardıcıllıq"""
+        yield from _iter_legacy(self.legacy_path(user_id, day))
+        yield from iter_segment(self.day_path(user_id, day))
+
+    # ------------------------------------------------------
+    # Ring buffer / gün indeksi
+    # ------------------------------------------------------
+    def _remember(self, user_id: str, day: str, entry: Dict[str, Any]) -> None:
+        """append-dən sonra: buffer və indeks (varsa) yenilənir"""
+        with self._tail_lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+            tail = self._tails.get(user_id)
+            if tail is not None:
+                if len(tail.entries) == self.recent_size:
+                    tail.complete = False
+                tail.entries.append((day, entry))
+
+            day_list = self._day_index.get(user_id)
+            if day_list is not None and (not day_list or day_list[-1] != day) and day not in day_list:
+                bisect.insort(day_list, day)
+
+    def _forget(self, user_id: str) -> None:
+        """Compaction faylları dəyişdirəndə: buffer və indeks yenidən qurulacaq"""
+        with self._tail_lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._tails.pop(user_id, None)
+            self._day_index.pop(user_id, None)
+
+    def _days_sorted(self, user_id: str) -> List[str]:
+        with self._tail_lock:
+            day_list = self._day_index.get(user_id)
+            if day_list is not None:
+                self._day_index.move_to_end(user_id)
+                return list(day_list)
+            generation = self._generations.get(user_id, 0)
+
+        day_list = self.days(user_id)
+        with self._tail_lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._day_index[user_id] = day_list
+                while len(self._day_index) > self.index_users:
+                    self._day_index.popitem(last=False)
+        return list(day_list)
+
+    def _iter_newest(self, user_id: str, since: str = "", until: str = "9999") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Sıralı gün indeksi üzrə: ən yeni gündən köhnəyə, gün daxilində sondan əvvələ"""
+        day_list = self._days_sorted(user_id)
+        stop = bisect.bisect_right(day_list, until)
+        start = bisect.bisect_left(day_list, since)
+        for day in reversed(day_list[start:stop]):
+            for entry in reversed(list(self.iter_day(user_id, day))):
+                yield day, entry
+
+        # Gündəlik fayllar bitdi - aylıq arxivlərə keç (hələ silinməmiş gündəlik fayl üstündür)
+        live_days = set(day_list)
+        for month in reversed(self.archive_months(user_id)):
+            if month > until[:7]:
+                continue
+            if month < since[:7]:
+                break
+            by_day: Dict[str, List[Dict[str, Any]]] = {}
+            for day, entry in iter_archive(self.archive_path(user_id, month)):
+                if since <= day <= until and day not in live_days:
+                    by_day.setdefault(day, []).append(entry)
+            for day in sorted(by_day, reverse=True):
+                for entry in reversed(by_day[day]):
+                    yield day, entry
+
+    def _tail(self, user_id: str) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+        """(son mesajlar - köhnədən yeniyə, complete): kopya _tail_lock altında (append deque-ni dəyişir)"""
+        with self._tail_lock:
+            tail = self._tails.get(user_id)
+            if tail is not None:
+                self._tails.move_to_end(user_id)
+                self.buffer_hits += 1
+                return list(tail.entries), tail.complete
+            self.buffer_misses += 1
+            generation = self._generations.get(user_id, 0)
+
+        newest: List[Tuple[str, Dict[str, Any]]] = []
+        for item in self._iter_newest(user_id):
+            newest.append(item)
+            if len(newest) > self.recent_size:
+                break
+        complete = len(newest) <= self.recent_size
+        tail = _Tail(deque(reversed(newest[:self.recent_size]), maxlen=self.recent_size), complete)
+
+        with self._tail_lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._tails[user_id] = tail
+                while len(self._tails) > self.recent_users:
+                    self._tails.popitem(last=False)
+                return list(tail.entries), tail.complete
+        # Oxuyarkən append oldu - buffer-i saxlama, amma bu cavab üçün istifadə et
+        return list(tail.entries), False
+
+    # ------------------------------------------------------
+    # Tarixçə
+    # ------------------------------------------------------
+    def history(self, user_id: str, days: int, limit: int = 100,
+                before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Son days günün ən yeni limit mesajı (ən yeni birinci)
+        before: bu timestamp-dan əvvəlki səhifə (köhnə səhifələr sıralı indeksdən)
+        """
+        user_id = str(user_id)
+        if days <= 0 or limit <= 0 or not self.user_dir(user_id).exists():
+            return []
+
+        today = datetime.now().date()
+        until = today.strftime("%Y-%m-%d")
+        since = (today - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+        # 1. Ring buffer: son N mesaj diskə getmədən
+        if before is None and limit <= self.recent_size:
+            entries, window_exhausted = self._tail(user_id)
+            result = []
+            for day, entry in reversed(entries):
+                if day < since:
+                    window_exhausted = True
+                    break
+                if day <= until:
+                    result.append(dict(entry))
+                    if len(result) >= limit:
+                        return result
+            if window_exhausted:
+                return result
+
+        # 2. Sıralı gün indeksi: yenidən köhnəyə, limit dolanda dayan
+        if before is not None:
+            until = min(until, before[:10])
+        result = []
+        for day, entry in self._iter_newest(user_id, since, until):
+            if before is not None and entry.get("timestamp", "") >= before:
+                continue
+            result.append(dict(entry))
+            if len(result) >= limit:
+                break
+        return result
+
+    def iter_all(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Bütün arxiv: (user_id, tarix, entry)"""
+        for user_id in self.iter_user_ids():
+            live_days = self.days(user_id)
+            for month in self.archive_months(user_id):
+                for day, entry in iter_archive(self.archive_path(user_id, month)):
+                    if day not in live_days:
+                        yield user_id, day, entry
+            for day in live_days:
+                for entry in self.iter_day(user_id, day):
+                    yield user_id, day, entry
+
+    # ------------------------------------------------------
+    # Compaction (arxa fon)
+    # ------------------------------------------------------
+    def _ensure_compactor(self) -> None:
+        if self._compactor is not None:
+            return
+        with self._compactor_lock:
+            if self._compactor is None:
+                self._compactor = threading.Thread(target=self._compact_loop,
+                                                   name="conversation-compactor", daemon=True)
+                self._compactor.start()
+                atexit.register(self.stop)
+
+    def _compact_loop(self) -> None:
+        # İlk keçid compact_interval sonra (start zamanı tam keçid yoxdur)
+        while not self._stop.wait(self.compact_interval):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"⚠️ Konuşma compaction xətası: {e}")
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> None:
+        """Compactor-u dayandır və gözlə (keçid istifadəçi sərhədində kəsilir)"""
+        self._stop.set()
+        atexit.unregister(self.stop)
+        compactor = self._compactor
+        if compactor is not None and compactor is not threading.current_thread():
+            compactor.join(timeout)
+            if compactor.is_alive():
+                print(f"⚠️ Konuşma compaction {timeout}s ərzində dayanmadı")
+
+    def _load_last_compact(self) -> float:
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                return float(json.load(f).get("last_compact", 0.0))
+        except (OSError, ValueError, TypeError, AttributeError):
+            return 0.0
+
+    def _save_last_compact(self, started: float) -> None:
+        tmp_path = self._state_path.with_name(f"{self._state_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"last_compact": started}, f)
+            os.replace(tmp_path, self._state_path)
+        except OSError as e:
+            print(f"⚠️ Compaction watermark yazıla bilmədi: {e}")
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        self._last_compact = started
+
+    def _sweep_tmp(self, user_id: str) -> int:
+        """Yarımçıq qalmış .*.tmp faylları (çökmüş yenidən yazma / arxiv) - köhnələri silinir"""
+        removed = 0
+        stale_before = time.time() - STALE_TMP_SECONDS
+        user_dir = self.user_dir(user_id)
+        for directory in (user_dir, user_dir / ARCHIVE_DIR):
+            try:
+                tmp_paths = list(directory.glob(".*.tmp"))
+            except OSError:
+                continue
+            for tmp_path in tmp_paths:
+                try:
+                    if tmp_path.stat().st_mtime < stale_before:
+                        tmp_path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+    def _rewrite(self, path: Path, entries: List[Dict[str, Any]]) -> None:
+        """Temp fayla yaz → os.replace (lock altında çağırılır)"""
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(self.serializer.segment_header())
+                f.writelines(self.serializer.frame(entry) for entry in entries)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def compact_day(self, user_id: str, day: str, force: bool = False) -> bool:
+        """
+        Bir günü yenidən yaz: köhnə .json birləşdirilir, korlanmış qeydlər atılır,
+        max_per_day tətbiq olunur, fayl konfiqurasiya olunmuş formata çevrilir.
+        Dəyişiklik yoxdursa fayla toxunulmur.
+        """
+        path = self.day_path(user_id, day)
+        legacy_path = self.legacy_path(user_id, day)
+
+        with self._lock_for(path):
+            has_legacy = legacy_path.exists()
+            if not has_legacy and not force:
+                # Son compaction-dan sonra dəyişməyibsə (append olmayıbsa) oxumağa ehtiyac yoxdur
+                try:
+                    if path.stat().st_mtime < self._last_compact:
+                        return False
+                except FileNotFoundError:
+                    return False
+
+            stored_format, stored, raw_count = read_file(path)
+            entries = list(_iter_legacy(legacy_path))
+            entries.extend(entry for entry in stored if isinstance(entry, dict))
+            converted = stored_format is not None and stored_format is not self.serializer
+
+            over_limit = self.max_per_day and len(entries) > self.max_per_day
+            if over_limit:
+                entries = entries[-self.max_per_day:]
+
+            if not has_legacy and not over_limit and not converted and raw_count == len(entries) and not force:
+                return False
+
+            self._rewrite(path, entries)
+            if has_legacy:
+                legacy_path.unlink()
+        self._forget(str(user_id))
+        return True
+
+    # ------------------------------------------------------
+    # Aylıq arxivlər
+    # ------------------------------------------------------
+    def _write_archive(self, path: Path, records: List[Tuple[str, Dict[str, Any]]]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(self.serializer.segment_header())
+                f.writelines(self.serializer.frame({"day": day, "entry": entry}) for day, entry in records)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def archive_user(self, user_id: str, cutoff: str) -> Tuple[int, int]:
+        """
+        cutoff-dan köhnə günləri aylıq arxivə köçür → (arxivlənən gün, boşalan bayt)
+        Arxivdə artıq olan gün gündəlik faylın məzmunu ilə əvəz olunur (təkrar icra təhlükəsizdir)
+        """
+        months: Dict[str, List[str]] = {}
+        for day in self.days(user_id):
+            if day < cutoff:
+                months.setdefault(day[:7], []).append(day)
+
+        archived = 0
+        reclaimed = 0
+        for month, month_days in sorted(months.items()):
+            archive_path = self.archive_path(user_id, month)
+            size_before = _size(archive_path)
+
+            fresh: Dict[str, List[Dict[str, Any]]] = {}
+            seen: List[Tuple[Path, int, float]] = []
+            for day in month_days:
+                path = self.day_path(user_id, day)
+                with self._lock_for(path):
+                    fresh[day] = list(self.iter_day(user_id, day))
+                    for day_file in (path, self.legacy_path(user_id, day)):
+                        try:
+                            st = day_file.stat()
+                        except FileNotFoundError:
+                            continue
+                        seen.append((day_file, st.st_size, st.st_mtime))
+
+            records = [(day, entry) for day, entry in iter_archive(archive_path) if day not in fresh]
+            records.extend((day, entry) for day in month_days for entry in fresh[day])
+            records.sort(key=lambda record: record[0])
+            self._write_archive(archive_path, records)
+            reclaimed += size_before - _size(archive_path)
+
+            # Arxiv yazılandan SONRA gündəlik fayllar silinir (arada dəyişibsə növbəti keçidə qalır)
+            for day_file, size, mtime in seen:
+                with self._lock_for(self.day_path(user_id, day_file.stem)):
+                    try:
+                        st = day_file.stat()
+                    except FileNotFoundError:
+                        continue
+                    if (st.st_size, st.st_mtime) == (size, mtime):
+                        day_file.unlink()
+                        reclaimed += size
+            archived += len(month_days)
+
+        if archived:
+            self._forget(str(user_id))
+        return archived, reclaimed
+
+    def _expire_archives(self, user_id: str, cutoff: str) -> int:
+        """Retention: cutoff-dan köhnə aylar silinir, sərhəd ayı süzülür → boşalan bayt"""
+        reclaimed = 0
+        for month in self.archive_months(user_id):
+            if month > cutoff[:7]:
+                break
+            archive_path = self.archive_path(user_id, month)
+            size_before = _size(archive_path)
+            if month < cutoff[:7]:
+                archive_path.unlink()
+            else:
+                # Arxiv günə görə sıralıdır: ilk qeyd cutoff-dan yenidirsə oxumağa ehtiyac yoxdur
+                first = next(iter_archive(archive_path), None)
+                if first is None or first[0] >= cutoff:
+                    continue
+                kept = [(day, entry) for day, entry in iter_archive(archive_path) if day >= cutoff]
+                if kept:
+                    self._write_archive(archive_path, kept)
+                else:
+                    archive_path.unlink()
+            reclaimed += size_before - _size(archive_path)
+            self._forget(str(user_id))
+        return reclaimed
+
+    def convert_all(self) -> Dict[str, int]:
+        """Bütün gündəlik faylları və arxivləri konfiqurasiya olunmuş formata çevir"""
+        result = {"days": 0, "archives": 0}
+        with self._compact_run_lock:
+            for user_id in list(self.iter_user_ids()):
+                for day in self.days(user_id):
+                    path = self.day_path(user_id, day)
+                    stored_format, _, _ = read_file(path)
+                    if stored_format is not self.serializer or self.legacy_path(user_id, day).exists():
+                        if self.compact_day(user_id, day, force=True):
+                            result["days"] += 1
+                for month in self.archive_months(user_id):
+                    archive_path = self.archive_path(user_id, month)
+                    with gzip.open(archive_path, "rb") as f:
+                        stored_format = sniff(f.read(HEADER_SIZE))
+                    if stored_format is not self.serializer:
+                        self._write_archive(archive_path, list(iter_archive(archive_path)))
+                        result["archives"] += 1
+                self._forget(user_id)
+        return result
+
+    def compact(self, retention_days: Optional[int] = None,
+                archive_after_days: Optional[int] = None) -> Dict[str, int]:
+        """
+        Bütün konuşmalar üzərindən bir keçid
+        retention_days / archive_after_days: bu keçid üçün konfiqurasiyanı əvəz edir
+        """
+        with self._compact_run_lock:
+            return self._compact(retention_days or self.retention_days,
+                                 archive_after_days or self.archive_after_days)
+
+    def _compact(self, retention_days: Optional[int], archive_after_days: Optional[int]) -> Dict[str, int]:
+        started = time.time()
+        result = {"rewritten": 0, "expired": 0, "archived": 0, "bytes_reclaimed": 0, "tmp_removed": 0}
+        if not self.conversations_path.exists():
+            return result
+
+        today = datetime.now().date()
+        cutoff = None
+        if retention_days:
+            cutoff = (today - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+        archive_cutoff = None
+        if archive_after_days:
+            archive_cutoff = (today - timedelta(days=archive_after_days)).strftime("%Y-%m-%d")
+
+        interrupted = False
+        for user_id in list(self.iter_user_ids()):
+            if self._stop.is_set():
+                # stop(): keçid yarımçıq - watermark yazılmır, növbəti start hamısını yoxlayır
+                interrupted = True
+                break
+            result["tmp_removed"] += self._sweep_tmp(user_id)
+            for day in self.days(user_id):
+                path = self.day_path(user_id, day)
+                legacy_path = self.legacy_path(user_id, day)
+                if cutoff and day < cutoff:
+                    with self._lock_for(path):
+                        for expired_path in (path, legacy_path):
+                            if expired_path.exists():
+                                result["bytes_reclaimed"] += _size(expired_path)
+                                expired_path.unlink()
+                    self._forget(user_id)
+                    result["expired"] += 1
+                elif archive_cutoff and day < archive_cutoff:
+                    # Arxivə gedir - ayrıca yenidən yazmağa ehtiyac yoxdur
+                    continue
+                else:
+                    size_before = _size(path) + _size(legacy_path)
+                    if self.compact_day(user_id, day):
+                        result["rewritten"] += 1
+                        result["bytes_reclaimed"] += size_before - _size(path)
+
+            if cutoff:
+                result["bytes_reclaimed"] += self._expire_archives(user_id, cutoff)
+            if archive_cutoff:
+                archived, reclaimed = self.archive_user(user_id, archive_cutoff)
+                result["archived"] += archived
+                result["bytes_reclaimed"] += reclaimed
+
+        if not interrupted:
+            self._save_last_compact(started)
+        self.compactions += 1
+        self.archived_days += result["archived"]
+        self.bytes_reclaimed += result["bytes_reclaimed"]
+        if result["rewritten"] or result["expired"] or result["archived"] or result["tmp_removed"]:
+            print(f"🗜️ Konuşma compaction: {result}")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "format": self.serializer.name,
+            "appends": self.appends,
+            "compactions": self.compactions,
+            "retention_days": self.retention_days,
+            "max_per_day": self.max_per_day,
+            "archive_after_days": self.archive_after_days,
+            "archived_days": self.archived_days,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "buffered_users": len(self._tails),
+            "indexed_users": len(self._day_index),
+            "buffer_hits": self.buffer_hits,
+            "buffer_misses": self.buffer_misses,
+            "compactor_running": self._compactor is not None and self._compactor.is_alive()
+        }
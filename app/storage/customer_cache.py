@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MÜŞTƏRİ BEYNİ CACHE - WRITE-BACK LRU
+✅ Aktiv müştərinin beyni BİR DƏFƏ yüklənir, sonra yaddaşda dəyişdirilir
+✅ Qeydlər kompakt CustomerState formasında saxlanılır (__slots__ + interned enum-lar)
+   get() həmişə təzə dict qaytarır - dəyişiklik yalnız put() ilə cache-ə düşür
+✅ Dəyişmiş (dirty) qeydlər flush_interval-da bir və proses bitəndə yazılır
+✅ Ölçü məhduddur: ən köhnə istifadə olunan qeyd çıxarılır (dirty-dirsə əvvəl yazılır)
+✅ Handoff-kritik sahələr (operator_required) dəyişəndə DƏRHAL yazılır
+✅ flush_interval <= 0 → write-through (hər put dərhal yazılır)
+✅ writer (GroupCommitWriter) verilərsə yazmalar onun batch-lərinə növbələnir (gözləmədən);
+   commit gözləyən qeydlər get() / exists()-də görünür, uğursuz commit qeydi yenidən dirty edir
+✅ Metrikalar: hits / misses / flushes / evictions
+"""
+
+import atexit
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+from app.storage.backend import StorageBackend
+from app.storage.concurrency import LockManager, lock_manager as default_lock_manager
+from app.storage.customer_state import CustomerState
+from app.storage.group_commit import GroupCommitWriter
+
+# Dəyişəndə gözləmədən yazılan sahələr: (bölmə, açar)
+CRITICAL_FIELDS = (
+    ("relationship", "operator_required"),
+    ("psychology", "operator_required")
+)
+
+
+class _Entry:
+    __slots__ = ("state", "dirty", "critical")
+
+    def __init__(self, state: CustomerState, critical: Tuple):
+        self.state = state
+        self.dirty = False
+        # Son yazılmış kritik sahə dəyərləri
+        self.critical = critical
+
+
+class CustomerCache:
+    """
+    get(user_id)      → bölmələrin təzə (decode olunmuş) dict-i (cache-dədirsə diskə getmir)
+    put(user_id, ..)  → kompakt formaya çevir, dirty işarələ (kritik dəyişiklik → dərhal yaz)
+    locked(user_id)   → müştəri qeydini dəyişdirən kod bu lock altında işləməlidir
+                        (LockManager-də (company, platform, user) açarı ilə - flusher də eyni lock-u götürür)
+    flush()           → bütün dirty qeydləri yaz
+    """
+
+    def __init__(self, backend: StorageBackend, maxsize: int = 1024, flush_interval: float = 5.0,
+                 critical_fields: Tuple[Tuple[str, str], ...] = CRITICAL_FIELDS,
+                 company_id: str = "", platform: str = "telegram",
+                 lock_manager: Optional[LockManager] = None,
+                 writer: Optional[GroupCommitWriter] = None):
+        self.backend = backend
+        self.writer = writer
+        self.company_id = company_id
+        self.platform = platform
+        self.lock_manager = lock_manager or default_lock_manager
+        self.maxsize = max(1, maxsize)
+        self.flush_interval = flush_interval
+        self.write_through = flush_interval <= 0
+        self.critical_fields = critical_fields
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.immediate_flushes = 0
+        self.evictions = 0
+
+        atexit.register(self.close)
+
+    # ------------------------------------------------------
+    # Lock-lar
+    # ------------------------------------------------------
+    def locked(self, user_id: str):
+        return self.lock_manager.lock(self.company_id, self.platform, user_id)
+
+    def _critical_values(self, sections: Dict[str, Dict[str, Any]]) -> Tuple:
+        return tuple((sections.get(section) or {}).get(key) for section, key in self.critical_fields)
+
+    # ------------------------------------------------------
+    # Oxuma
+    # ------------------------------------------------------
+    def get(self, user_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry.state.decode()
+            self.misses += 1
+
+        sections = self.writer.pending_customer(user_id) if self.writer is not None else None
+        if sections is None:
+            sections = self.backend.load_customer(user_id)
+        if sections is None:
+            return None
+
+        with self._lock:
+            # Paralel yükləmə olubsa, cache-dəki qalır
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = self._entries[user_id] = _Entry(CustomerState.encode(sections),
+                                                        self._critical_values(sections))
+                state = None
+            else:
+                state = entry.state
+        self._evict()
+        return sections if state is None else state.decode()
+
+    def exists(self, user_id: str) -> bool:
+        with self._lock:
+            if str(user_id) in self._entries:
+                return True
+        if self.writer is not None and self.writer.has_customer(user_id):
+            return True
+        return self.backend.customer_exists(user_id)
+
+    # ------------------------------------------------------
+    # Yazma
+    # ------------------------------------------------------
+    def put(self, user_id: str, sections: Dict[str, Dict[str, Any]], critical: bool = False) -> None:
+        """
+        Qeydi dirty işarələ. Dərhal yazılır əgər:
+        - write-through rejimidirsə
+        - critical=True (məs. yeni müştəri)
+        - handoff-kritik sahə son yazılmış dəyərdən fərqlidirsə
+        """
+        user_id = str(user_id)
+        state = CustomerState.encode(sections)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = self._entries[user_id] = _Entry(state, ())
+            else:
+                entry.state = state
+                self._entries.move_to_end(user_id)
+            entry.dirty = True
+
+        # Bağlanmış cache-də (tenant registry-dən çıxarılıb) flusher yoxdur - dərhal yaz
+        if critical or self.write_through or self._stop.is_set() or \
+                self._critical_values(sections) != entry.critical:
+            self.immediate_flushes += 1
+            self._flush_entry(user_id, entry)
+        else:
+            self._ensure_flusher()
+        self._evict()
+
+    def _flush_entry(self, user_id: str, entry: _Entry) -> bool:
+        with self.locked(user_id):
+            if not entry.dirty:
+                return False
+            sections = entry.state.decode()
+            if self.writer is not None:
+                state = entry.state
+                self.writer.save_customer(user_id, sections).add_done_callback(
+                    lambda future: self._on_commit(user_id, entry, state, future))
+            else:
+                try:
+                    self.backend.save_customer(user_id, sections)
+                except Exception as e:
+                    print(f"⚠️ Müştəri beyni yazıla bilmədi: {user_id} ({e})")
+                    return False
+            entry.dirty = False
+            entry.critical = self._critical_values(sections)
+            self.flushes += 1
+            return True
+
+    def _on_commit(self, user_id: str, entry: _Entry, state: CustomerState, future: Future) -> None:
+        """Writer thread-ində: commit uğursuzdursa qeyd yenidən dirty olur (cache-dən çıxıbsa geri qayıdır)"""
+        if future.exception() is None:
+            return
+        print(f"⚠️ Müştəri beyni yazıla bilmədi: {user_id} ({future.exception()})")
+        with self._lock:
+            if entry.state is state:
+                entry.dirty = True
+                self._entries.setdefault(user_id, entry)
+
+    def flush(self) -> int:
+        """Bütün dirty qeydləri yaz (writer varsa: növbələ) - yazılan qeyd sayı"""
+        with self._lock:
+            dirty = [(user_id, entry) for user_id, entry in self._entries.items() if entry.dirty]
+        return sum(1 for user_id, entry in dirty if self._flush_entry(user_id, entry))
+
+    def _evict(self) -> None:
+        """LRU: maxsize-dan artıq qeydləri çıxar (dirty-dirsə əvvəl yaz)"""
+        while True:
+            with self._lock:
+                if len(self._entries) <= self.maxsize:
+                    return
+                user_id, entry = next(iter(self._entries.items()))
+
+            # Başqa thread bu müştərini dəyişdirirsə gözləmə - növbəti dəfəyə qalsın
+            if not self.lock_manager.try_lock(self.company_id, self.platform, user_id):
+                return
+            try:
+                if entry.dirty:
+                    self._flush_entry(user_id, entry)
+                with self._lock:
+                    if self._entries.get(user_id) is entry and not entry.dirty:
+                        del self._entries[user_id]
+                        self.evictions += 1
+                    else:
+                        return
+            finally:
+                self.lock_manager.release(self.company_id, self.platform, user_id)
+
+    # ------------------------------------------------------
+    # Arxa fon flush
+    # ------------------------------------------------------
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None or self.write_through:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="customer-cache-flusher",
+                                                 daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Customer cache flush xətası: {e}")
+
+    def close(self) -> None:
+        """Shutdown: flusher-i dayandır, qalan dirty qeydləri yaz"""
+        self._stop.set()
+        written = self.flush()
+        if written:
+            print(f"💾 Customer cache: {written} qeyd yazıldı (shutdown)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+            dirty = sum(1 for entry in self._entries.values() if entry.dirty)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "dirty": dirty,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "flushes": self.flushes,
+            "immediate_flushes": self.immediate_flushes,
+            "evictions": self.evictions,
+            "flush_interval": self.flush_interval,
+            "write_through": self.write_through
+        }
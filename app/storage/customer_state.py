@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MÜŞTƏRİ VƏZİYYƏTİ - KOMPAKT __slots__ QEYDLƏR
+✅ Cache-dəki hər profil dict-lər əvəzinə __slots__ qeydləridir (bölmə başına bir sinif)
+✅ Mood / intent / emotional state / satış mərhələsi / pain point → kiçik int (interned vocab)
+✅ Timestamp-lar epoch mikrosaniyə int (ISO sətri itkisiz geri qurulur)
+✅ encode(sections) / decode() → mövcud JSON forması (API cavabları, backend yazmaları)
+✅ Sxemdə olmayan açarlar / gözlənilməyən tiplər bölmənin extra dict-ində saxlanılır - heç nə itmir
+"""
+
+import copy
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+VOCAB_LIMIT = 4096
+
+_MISSING = object()
+_UNENCODABLE = object()
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_SCALARS = (str, int, float, bool, type(None))
+
+
+# ======================================================
+# INTERNED VOCAB
+# ======================================================
+class Vocab:
+    """str ↔ kiçik int (proses ömrü boyu sabit, yalnız əlavə olunur)"""
+
+    def __init__(self, name: str, seed: Tuple[str, ...] = (), limit: int = VOCAB_LIMIT):
+        self.name = name
+        self.limit = limit
+        self._ids: Dict[str, int] = {}
+        self._values: List[str] = []
+        self._lock = threading.Lock()
+        for value in seed:
+            self.id(value)
+
+    def id(self, value: str) -> Optional[int]:
+        """Dəyərin id-si (vocab doludursa None - dəyər kodlanmır)"""
+        value_id = self._ids.get(value)
+        if value_id is not None:
+            return value_id
+        with self._lock:
+            value_id = self._ids.get(value)
+            if value_id is None:
+                if len(self._values) >= self.limit:
+                    return None
+                value_id = len(self._values)
+                self._values.append(value)
+                self._ids[value] = value_id
+            return value_id
+
+    def value(self, value_id: int) -> str:
+        return self._values[value_id]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+MOODS = Vocab("mood", ("neutral", "happy", "satisfied", "positive", "calm", "angry", "frustrated",
+                       "abuse", "threat", "blackmail", "accusation", "harassment", "urgency"))
+EMOTIONAL_STATES = Vocab("emotional_state", ("neutral", "satisfied", "dissatisfied", "angry"))
+MESSAGE_TYPES = Vocab("message_type", ("non_emotional", "unknown", "price_complaint"))
+INTENTS = Vocab("intent", ("request_info", "price_question", "general_question", "accusation",
+                           "positive_feedback", "complaint", "slow_response", "interest", "confirmation"))
+GOALS = Vocab("goal", ("get_price_info", "get_information", "clarify_query", "handle_legal_issue",
+                       "acknowledge_satisfaction", "reduce_cost", "address_price_concern",
+                       "address_quality_concern", "resolve_issue", "get_faster_response",
+                       "explore_options", "make_decision"))
+PAIN_POINTS = Vocab("pain_point", ("price_inquiry", "information_request", "legal_accusation", "satisfaction",
+                                   "price", "price_issue", "quality_issue"))
+INTERESTS = Vocab("interest")
+STAGES = Vocab("stage", ("initial", "cold", "warm", "hot"))
+LEVELS = Vocab("level", ("low", "medium", "high", "unknown"))
+LANGUAGES = Vocab("language", ("az", "tr", "ru", "en"))
+PLATFORMS = Vocab("platform", ("telegram", "instagram", "whatsapp", "web"))
+
+
+# ======================================================
+# KODEKLƏR: dəyər ↔ kompakt forma (_UNENCODABLE → extra-ya düşür)
+# ======================================================
+class _Scalar:
+    @staticmethod
+    def encode(value):
+        return value if isinstance(value, _SCALARS) else _UNENCODABLE
+
+    @staticmethod
+    def decode(value):
+        return value
+
+
+class _ScalarList:
+    @staticmethod
+    def encode(value):
+        if isinstance(value, list) and all(isinstance(item, _SCALARS) for item in value):
+            return tuple(value)
+        return _UNENCODABLE
+
+    @staticmethod
+    def decode(value):
+        return list(value)
+
+
+class _Timestamp:
+    """Naive ISO sətri → 1970-01-01-dən mikrosaniyə (yalnız itkisiz geri qurulursa)"""
+
+    @staticmethod
+    def encode(value):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            return _UNENCODABLE
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return _UNENCODABLE
+        if parsed.tzinfo is not None:
+            return _UNENCODABLE
+        micros = (parsed - _EPOCH) // _MICROSECOND
+        if (_EPOCH + timedelta(microseconds=micros)).isoformat() != value:
+            return _UNENCODABLE
+        return micros
+
+    @staticmethod
+    def decode(value):
+        return None if value is None else (_EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+class _Enum:
+    def __init__(self, vocab: Vocab):
+        self.vocab = vocab
+
+    def encode(self, value):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            return _UNENCODABLE
+        value_id = self.vocab.id(value)
+        return _UNENCODABLE if value_id is None else value_id
+
+    def decode(self, value):
+        return None if value is None else self.vocab.value(value)
+
+
+class _EnumList(_Enum):
+    def encode(self, value):
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            return _UNENCODABLE
+        ids = tuple(self.vocab.id(item) for item in value)
+        return _UNENCODABLE if None in ids else ids
+
+    def decode(self, value):
+        values = self.vocab._values
+        return [values[value_id] for value_id in value]
+
+
+class _Nested:
+    def __init__(self, record_class):
+        self.record_class = record_class
+
+    def encode(self, value):
+        return self.record_class.encode(value) if isinstance(value, dict) else _UNENCODABLE
+
+    def decode(self, value):
+        return value.decode()
+
+
+# ======================================================
+# QEYDLƏR
+# ======================================================
+class _Record:
+    """FIELDS: ((açar, kodek), ...) - alt siniflərdə __slots__ = açarlar + "extra" """
+    __slots__ = ()
+    FIELDS: Tuple[Tuple[str, Any], ...] = ()
+    _KEYS: frozenset = frozenset()
+
+    @classmethod
+    def encode(cls, data: Dict[str, Any]) -> "_Record":
+        record = cls.__new__(cls)
+        extra: Optional[Dict[str, Any]] = None
+        for key, codec in cls.FIELDS:
+            value = data.get(key, _MISSING)
+            if value is not _MISSING:
+                encoded = codec.encode(value)
+                if encoded is _UNENCODABLE:
+                    extra = extra or {}
+                    extra[key] = copy.deepcopy(value)
+                    value = _MISSING
+                else:
+                    value = encoded
+            setattr(record, key, value)
+        for key, value in data.items():
+            if key not in cls._KEYS:
+                extra = extra or {}
+                extra[key] = copy.deepcopy(value)
+        record.extra = extra
+        return record
+
+    def decode(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for key, codec in self.FIELDS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                data[key] = codec.decode(value)
+        if self.extra:
+            data.update(copy.deepcopy(self.extra))
+        return data
+
+
+def _record(name: str, fields: Tuple[Tuple[str, Any], ...]) -> type:
+    return type(name, (_Record,), {
+        "__slots__": tuple(key for key, _ in fields) + ("extra",),
+        "FIELDS": fields,
+        "_KEYS": frozenset(key for key, _ in fields)
+    })
+
+
+_scalar = _Scalar()
+_scalar_list = _ScalarList()
+_timestamp = _Timestamp()
+
+IdentityState = _record("IdentityState", (
+    ("telegram_id", _scalar),
+    ("username", _scalar),
+    ("real_name", _scalar),
+    ("first_seen", _timestamp),
+    ("last_seen", _timestamp),
+    ("language", _Enum(LANGUAGES)),
+    ("location", _scalar),
+    ("platform", _Enum(PLATFORMS)),
+    ("updated_at", _timestamp)
+))
+
+BehaviorState = _record("BehaviorState", (
+    ("message_count", _scalar),
+    ("avg_response_time", _scalar),
+    ("active_hours", _scalar_list),
+    ("last_seen", _timestamp),
+    ("message_frequency", _Enum(LEVELS)),
+    ("avg_message_length", _scalar),
+    ("updated_at", _timestamp)
+))
+
+PsychologyState = _record("PsychologyState", (
+    ("current_mood", _Enum(MOODS)),
+    ("emotional_state", _Enum(EMOTIONAL_STATES)),
+    ("last_mood", _Enum(MOODS)),
+    # last_reason sərbəst mətn ola bilər (məs. "..._phrase:<ifadə>") - vocab-a düşmür
+    ("last_reason", _scalar),
+    ("last_message_type", _Enum(MESSAGE_TYPES)),
+    ("operator_required", _scalar),
+    ("updated_at", _timestamp)
+))
+
+ConversationContextState = _record("ConversationContextState", (
+    ("has_active_complaint", _scalar),
+    ("last_positive_message", _scalar),
+    ("waiting_for_response", _scalar),
+    ("decision_stage", _Enum(STAGES)),
+    ("last_question_time", _timestamp),
+    ("last_complaint_time", _timestamp)
+))
+
+IntentDetailsState = _record("IntentDetailsState", (
+    ("raw_intent", _Enum(INTENTS)),
+    ("final_intent", _Enum(INTENTS)),
+    ("goal", _Enum(GOALS)),
+    ("pain_points", _EnumList(PAIN_POINTS)),
+    ("confidence", _scalar),
+    ("psychology_mood", _Enum(MOODS)),
+    ("psychology_emotional_state", _Enum(EMOTIONAL_STATES)),
+    ("psychology_type", _Enum(MESSAGE_TYPES)),
+    ("json_rule_used", _scalar),
+    ("state_lock_broken", _scalar),
+    ("timestamp", _timestamp)
+))
+
+IntentInterestState = _record("IntentInterestState", (
+    ("intents", _EnumList(INTENTS)),
+    ("interests", _EnumList(INTERESTS)),
+    ("last_intent", _Enum(INTENTS)),
+    ("current_goal", _Enum(GOALS)),
+    ("pain_points", _EnumList(PAIN_POINTS)),
+    ("updated_at", _timestamp),
+    ("conversation_context", _Nested(ConversationContextState)),
+    ("last_intent_details", _Nested(IntentDetailsState))
+))
+
+RelationshipState = _record("RelationshipState", (
+    ("trust_level", _scalar),
+    ("loyalty", _scalar),
+    ("operator_required", _scalar),
+    ("interaction_count", _scalar),
+    ("last_interaction", _timestamp),
+    ("engagement_level", _Enum(LEVELS)),
+    ("updated_at", _timestamp)
+))
+
+SalesState = _record("SalesState", (
+    ("lead_score", _scalar),
+    ("stage", _Enum(STAGES)),
+    ("last_offer", _scalar),
+    ("buying_signals", _scalar_list),
+    ("price_sensitivity", _Enum(LEVELS)),
+    ("estimated_value", _scalar),
+    ("sales_potential", _Enum(LEVELS)),
+    ("updated_at", _timestamp)
+))
+
+SECTION_STATES = (
+    ("identity", IdentityState),
+    ("behavior", BehaviorState),
+    ("psychology", PsychologyState),
+    ("intent_interest", IntentInterestState),
+    ("relationship", RelationshipState),
+    ("sales", SalesState)
+)
+
+_SECTION_NAMES = frozenset(section for section, _ in SECTION_STATES)
+
+
+class CustomerState:
+    """Bir müştərinin 6 bölməsi - kompakt forma"""
+    __slots__ = tuple(section for section, _ in SECTION_STATES) + ("extra",)
+
+    @classmethod
+    def encode(cls, sections: Dict[str, Dict[str, Any]]) -> "CustomerState":
+        state = cls.__new__(cls)
+        extra: Optional[Dict[str, Any]] = None
+        for section, record_class in SECTION_STATES:
+            data = sections.get(section, _MISSING)
+            if data is _MISSING:
+                setattr(state, section, _MISSING)
+            elif isinstance(data, dict):
+                setattr(state, section, record_class.encode(data))
+            else:
+                setattr(state, section, _MISSING)
+                extra = extra or {}
+                extra[section] = copy.deepcopy(data)
+        for section, data in sections.items():
+            if section not in _SECTION_NAMES:
+                extra = extra or {}
+                extra[section] = copy.deepcopy(data)
+        state.extra = extra
+        return state
+
+    def decode(self) -> Dict[str, Dict[str, Any]]:
+        """Mövcud JSON forması - hər çağırış yeni (dəyişdirilə bilən) dict-lər qaytarır"""
+        sections: Dict[str, Any] = {}
+        for section, _ in SECTION_STATES:
+            record = getattr(self, section)
+            if record is not _MISSING:
+                sections[section] = record.decode()
+        if self.extra:
+            sections.update(copy.deepcopy(self.extra))
+        return sections
+
+
+def encode(sections: Dict[str, Dict[str, Any]]) -> CustomerState:
+    return CustomerState.encode(sections)
+
+
+def decode(state: CustomerState) -> Dict[str, Dict[str, Any]]:
+    return state.decode()
+
+
+def vocab_stats() -> Dict[str, int]:
+    return {vocab.name: len(vocab) for vocab in (MOODS, EMOTIONAL_STATES, MESSAGE_TYPES, INTENTS, GOALS,
+                                                 PAIN_POINTS, INTERESTS, STAGES, LEVELS, LANGUAGES, PLATFORMS)}
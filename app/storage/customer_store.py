@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MÜŞTƏRİ BEYNİ - TƏK FAYL (brain.json)
+✅ 6 bölmə (identity, behavior, psychology, intent_interest, relationship, sales) BİR qeyddə
+✅ Mesaj başına: BİR oxuma + BİR atomik yazma (temp fayl + os.replace)
+✅ Köhnə 6 fayllı qovluqlar ilk oxunuşda avtomatik köçürülür
+✅ Qovluqlar hash shard-lanmışdır: customers/<ab>/<cd>/<user_id>/brain.json (ShardedLayout)
+✅ Qeyd formatı backend-in serializatorundandır (json / binary); oxuma faylın başlığına baxır
+✅ IdManifest (layout.py): müştəri siyahısı append-only faylda - sayma / siyahı üçün ağac gəzilmir
+✅ Toplu köçürmə:
+    python -m app.storage.customer_store app/storage/data/telegram/customers
+"""
+
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from app.storage.layout import MANIFEST_FILE, IdManifest, ShardedLayout
+from app.storage.serializer import JSON, Serializer, loads, sniff
+
+SCHEMA_VERSION = 1
+
+SECTIONS = (
+    "identity",
+    "behavior",
+    "psychology",
+    "intent_interest",
+    "relationship",
+    "sales"
+)
+
+RECORD_FILE = "brain.json"
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Temp fayla yaz → os.replace: oxuyan heç vaxt yarımçıq fayl görmür"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # pid + thread: eyni faylı paralel yazan thread-lərin temp faylları toqquşmur
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def atomic_write_json(path: Path, data: Any, indent: Optional[int] = 2) -> None:
+    atomic_write_bytes(path, json.dumps(data, indent=indent, ensure_ascii=False).encode("utf-8"))
+
+
+def fsync_paths(paths: Iterable[Path]) -> None:
+    """Durability barrier: faylları və (rename / yeni fayl üçün) onların qovluqlarını diskə endir"""
+    files = set(paths)
+    for path in list(files) + sorted({path.parent for path in files}):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except (FileNotFoundError, PermissionError, IsADirectoryError):
+            # Windows-da qovluq açıla bilmir
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+class CustomerStore:
+    """
+    customers/<ab>/<cd>/<user_id>/brain.json:
+    {"schema_version": 1, "identity": {...}, "behavior": {...}, ...}
+    Fayl adı formatdan asılı deyil - binar qeyd də brain.json-dadır (başlıqdan tanınır)
+    """
+
+    def __init__(self, customers_path: Path, serializer: Serializer = JSON):
+        self.customers_path = Path(customers_path)
+        self.serializer = serializer
+        self.layout = ShardedLayout(self.customers_path)
+        self.manifest = IdManifest(self.customers_path / MANIFEST_FILE)
+
+    def initialize(self) -> None:
+        self.layout.initialize()
+        if not self.manifest.exists():
+            # Bir dəfəlik: mövcud ağacdan manifest
+            self.manifest.rebuild(self.layout.iter_ids())
+
+    def customer_dir(self, user_id: str) -> Path:
+        return self.layout.resolve(user_id)
+
+    def record_path(self, user_id: str) -> Path:
+        return self.customer_dir(user_id) / RECORD_FILE
+
+    def exists(self, user_id: str) -> bool:
+        """Yeni qeyd və ya köhnə qovluq varsa True"""
+        return self.customer_dir(user_id).exists()
+
+    # ------------------------------------------------------
+    # Oxuma / yazma
+    # ------------------------------------------------------
+    def load(self, user_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Bütün bölmələr (dict) və ya müştəri yoxdursa None"""
+        record_path = self.record_path(user_id)
+        try:
+            with open(record_path, "rb") as f:
+                record = loads(f.read())
+            return self._sections(record)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Müştəri qeydi oxuna bilmədi: {record_path} ({e})")
+            return None
+
+        if not self.customer_dir(user_id).exists():
+            return None
+
+        # Köhnə format → bir dəfəlik köçürmə
+        return self.migrate(user_id)
+
+    def save(self, user_id: str, sections: Dict[str, Dict[str, Any]]) -> Path:
+        """Bütün qeydi BİR atomik yazma ilə saxla - yazılan fayl"""
+        record = {"schema_version": SCHEMA_VERSION}
+        for section in SECTIONS:
+            record[section] = sections.get(section, {})
+        customer_dir = self.customer_dir(user_id)
+        if not customer_dir.exists():
+            # Yeni müştəri: əvvəl manifest (çöksə təkrar sətir sayılmır, itən müştəri olmur)
+            self.manifest.add(user_id)
+        record_path = customer_dir / RECORD_FILE
+        atomic_write_bytes(record_path, self.serializer.dumps(record, SCHEMA_VERSION))
+        return record_path
+
+    def _sections(self, record: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        return {section: record.get(section) or {} for section in SECTIONS}
+
+    # ------------------------------------------------------
+    # Köçürmə (6 fayl → brain.json)
+    # ------------------------------------------------------
+    def migrate(self, user_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        identity.json ... sales.json → brain.json
+        Yeni qeyd atomik yazılandan SONRA köhnə fayllar silinir
+        """
+        customer_dir = self.customer_dir(user_id)
+        if self.record_path(user_id).exists():
+            return self.load(user_id)
+
+        sections: Dict[str, Dict[str, Any]] = {}
+        found = False
+        for section in SECTIONS:
+            legacy_path = customer_dir / f"{section}.json"
+            data: Dict[str, Any] = {}
+            if legacy_path.exists():
+                found = True
+                try:
+                    with open(legacy_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print(f"⚠️ Köhnə fayl oxuna bilmədi: {legacy_path} ({e})")
+            sections[section] = data if isinstance(data, dict) else {}
+
+        if not found:
+            return None
+
+        self.save(user_id, sections)
+        for section in SECTIONS:
+            legacy_path = customer_dir / f"{section}.json"
+            if legacy_path.exists():
+                legacy_path.unlink()
+
+        print(f"📦 Müştəri beyni köçürüldü: {user_id} (6 fayl → {RECORD_FILE})")
+        return sections
+
+    def iter_customer_ids(self) -> Iterator[str]:
+        """Manifestdən (yoxdursa ağacdan)"""
+        if self.manifest.exists():
+            yield from self.manifest.iter_ids()
+        else:
+            yield from self.layout.iter_ids()
+
+    def count(self) -> int:
+        if not self.manifest.exists():
+            return sum(1 for _ in self.layout.iter_ids())
+        return self.manifest.count()
+
+    def migrate_layout(self) -> Dict[str, int]:
+        """Düz qovluqlar → shard-lar, manifest ağacdan yenidən qurulur"""
+        moved = self.layout.migrate_all()
+        return {"moved": moved, "manifest": self.manifest.rebuild(self.layout.iter_ids())}
+
+    def convert_all(self) -> int:
+        """Bütün qeydləri bu store-un serializatoru ilə yenidən yaz - çevrilən qeyd sayı"""
+        converted = 0
+        for user_id in self.iter_customer_ids():
+            record_path = self.record_path(user_id)
+            try:
+                with open(record_path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            if sniff(data) is self.serializer:
+                continue
+            sections = self.load(user_id)
+            if sections is not None:
+                self.save(user_id, sections)
+                converted += 1
+        return converted
+
+    def migrate_all(self) -> int:
+        """Bütün köhnə qovluqları köçür - köçürülən müştəri sayı"""
+        migrated = 0
+        for user_id in self.iter_customer_ids():
+            if not self.record_path(user_id).exists() and self.migrate(user_id) is not None:
+                migrated += 1
+        return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="6 fayllı müştəri beyinlərini brain.json-a köçür")
+    parser.add_argument("path", nargs="?", default="app/storage/data/telegram/customers")
+    args = parser.parse_args()
+
+    migrated = CustomerStore(Path(args.path)).migrate_all()
+    print(f"✅ Köçürüldü: {migrated} müştəri")
+
+
+if __name__ == "__main__":
+    main()
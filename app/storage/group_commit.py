@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GROUP COMMIT - BATCH YAZAN THREAD
+✅ Bütün handler-lərin yazmaları (müştəri qeydi, konuşma) BİR writer thread-inə növbələnir
+✅ Qısa pəncərə (window) ərzində eyni müştərinin təkrar qeydləri birləşir - sonuncu yazılır
+✅ Batch backend.write_batch() ilə yazılır: BİR tranzaksiya + BİR durability barrier (fsync)
+   - yük artdıqca batch böyüyür: commit gedərkən gələnlər növbəti batch-ə yığılır
+✅ Hər sorğunun Future-u batch commit olunanda tamamlanır (xəta → bütün batch-in Future-ları)
+✅ Commit gözləyən qeydlər oxunur (pending_customer / wait) - read-your-writes pozulmur
+"""
+
+import atexit
+import copy
+import threading
+import time
+from concurrent.futures import Future, wait as wait_futures
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.storage.backend import StorageBackend
+
+ConversationRecord = Tuple[str, str, Dict[str, Any]]
+
+
+def completed(result: Any = None) -> Future:
+    """Artıq tamamlanmış Future (writer yoxdursa - yazma sinxron olub)"""
+    future: Future = Future()
+    future.set_result(result)
+    return future
+
+
+def flatten(outer: Future) -> Future:
+    """Future[Future] → Future: daxili Future (commit) tamamlananda tamamlanır"""
+    result: Future = Future()
+
+    def _inner_done(inner: Future) -> None:
+        error = inner.exception()
+        if error is not None:
+            result.set_exception(error)
+        else:
+            result.set_result(inner.result())
+
+    def _outer_done(done: Future) -> None:
+        error = done.exception()
+        if error is not None:
+            result.set_exception(error)
+            return
+        inner = done.result()
+        if isinstance(inner, Future):
+            inner.add_done_callback(_inner_done)
+        else:
+            result.set_result(inner)
+
+    outer.add_done_callback(_outer_done)
+    return result
+
+
+class GroupCommitWriter:
+    """
+    save_customer(user_id, sections)         → Future (eyni müştəri növbədədirsə birləşir)
+    append_conversation(user_id, day, entry) → Future (birləşmir, gün faylına BİR write-da yazılır)
+    flush()                                  → indiyə qədər növbələnənlərin commit-ini gözlə
+    """
+
+    def __init__(self, backend: StorageBackend, window: float = 0.002, name: str = "group-commit"):
+        self.backend = backend
+        self.window = max(0.0, window)
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._customers: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._conversations: List[ConversationRecord] = []
+        self._futures: List[Future] = []
+        # Commit olunan (yazılmaqda olan) batch - oxuyanlar üçün
+        self._inflight_customers: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._inflight_futures: List[Future] = []
+        # İstifadəçinin ən son yazmasının Future-u (növbədə və ya yazılmaqda)
+        self._pending_users: Dict[str, Future] = {}
+
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.committed = 0
+        self.failed_batches = 0
+        self.largest_batch = 0
+
+        atexit.register(self.close)
+
+    # ------------------------------------------------------
+    # Növbə
+    # ------------------------------------------------------
+    def save_customer(self, user_id: str, sections: Dict[str, Dict[str, Any]]) -> Future:
+        """sections çağırandan sonra dəyişdirilməməlidir (cache təzə decode olunmuş dict verir)"""
+        return self._submit(str(user_id), sections=sections)
+
+    def append_conversation(self, user_id: str, day: str, entry: Dict[str, Any]) -> Future:
+        return self._submit(str(user_id), conversation=(str(user_id), day, entry))
+
+    def _submit(self, user_id: str, sections: Optional[Dict[str, Dict[str, Any]]] = None,
+                conversation: Optional[ConversationRecord] = None) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if not self._closed:
+                self.submitted += 1
+                if sections is not None:
+                    if user_id in self._customers:
+                        self.coalesced += 1
+                    self._customers[user_id] = sections
+                else:
+                    self._conversations.append(conversation)
+                self._futures.append(future)
+                self._pending_users[user_id] = future
+                self._ensure_thread()
+                self._cond.notify()
+                return future
+
+        # Shutdown-dan sonra gələn yazma: çağıranın thread-ində tək batch
+        customers = {user_id: sections} if sections is not None else {}
+        conversations = [conversation] if conversation is not None else []
+        self._commit(customers, conversations, [future])
+        return future
+
+    def _ensure_thread(self) -> None:
+        """_cond altında çağırılır"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._futures and not self._closed:
+                    self._cond.wait()
+                if not self._futures:
+                    return
+                closing = self._closed
+
+            # Pəncərə: eyni anda gələn yazmalar bu batch-ə yığılsın
+            if self.window and not closing:
+                time.sleep(self.window)
+
+            with self._cond:
+                customers, self._customers = self._customers, {}
+                conversations, self._conversations = self._conversations, []
+                futures, self._futures = self._futures, []
+                self._inflight_customers = customers
+                self._inflight_futures = futures
+
+            self._commit(customers, conversations, futures)
+
+            with self._cond:
+                self._inflight_customers = {}
+                self._inflight_futures = []
+                done = set(futures)
+                for user_id in [user_id for user_id, future in self._pending_users.items() if future in done]:
+                    del self._pending_users[user_id]
+                self._cond.notify_all()
+
+    def _commit(self, customers: Dict[str, Dict[str, Dict[str, Any]]],
+                conversations: List[ConversationRecord], futures: List[Future]) -> None:
+        """Bir batch: BİR write_batch (tranzaksiya + barrier), sonra Future-lar"""
+        try:
+            self.backend.write_batch(customers, conversations)
+        except Exception as e:
+            self.failed_batches += 1
+            print(f"⚠️ Group commit xətası ({len(futures)} yazma): {e}")
+            for future in futures:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.committed += len(futures)
+        self.largest_batch = max(self.largest_batch, len(futures))
+        for future in futures:
+            future.set_result(None)
+
+    # ------------------------------------------------------
+    # Oxuyanlar üçün
+    # ------------------------------------------------------
+    def has_customer(self, user_id: str) -> bool:
+        user_id = str(user_id)
+        with self._cond:
+            return user_id in self._customers or user_id in self._inflight_customers
+
+    def pending_customer(self, user_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Commit gözləyən ən son qeyd (kopya) - yoxdursa None (diskdəki aktualdır)"""
+        user_id = str(user_id)
+        with self._cond:
+            sections = self._customers.get(user_id)
+            if sections is None:
+                sections = self._inflight_customers.get(user_id)
+        return copy.deepcopy(sections) if sections is not None else None
+
+    def wait(self, user_id: str, timeout: Optional[float] = None) -> None:
+        """İstifadəçinin növbədəki yazmaları commit olunana qədər gözlə"""
+        with self._cond:
+            future = self._pending_users.get(str(user_id))
+        if future is not None:
+            wait_futures([future], timeout=timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            futures = self._futures + self._inflight_futures
+        if futures:
+            wait_futures(futures, timeout=timeout)
+
+    def close(self) -> None:
+        """Shutdown: növbədəki hər şeyi yaz, thread-i dayandır"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = len(self._futures)
+            inflight = len(self._inflight_futures)
+        return {
+            "window_ms": round(self.window * 1000, 3),
+            "queued": queued,
+            "inflight": inflight,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "committed": self.committed,
+            "avg_batch": round(self.committed / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "failed_batches": self.failed_batches
+        }
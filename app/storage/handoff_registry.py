@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OPERATOR HANDOFF REGISTRY - YADDAŞDA, O(1)
+✅ Açar: (company, platform, user) → aktiv handoff qeydi
+✅ is_active(): bir dict lookup - mesaj yolunda I/O YOXDUR
+✅ Hər dəyişiklik backend-ə BİR qeyd kimi yazılır (JSON: jurnal sətri, SQLite: bir sətir)
+✅ Dövri snapshot: jurnal snapshot-a yığılır və sıfırlanır
+✅ Yalnız AKTİV handoff-lar saxlanılır (status=false qeydləri silinir)
+✅ Köhnə operator_handoff.json (user_id → qeyd) company/platform-suz qeyd kimi yüklənir
+"""
+
+import atexit
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.storage.conversation_log import iter_jsonl
+from app.storage.customer_store import atomic_write_json
+
+HandoffKey = Tuple[str, str, str]
+
+SNAPSHOT_SCHEMA_VERSION = 1
+
+
+def handoff_key(company_id: str, platform: str, user_id: str) -> HandoffKey:
+    return (str(company_id or ""), str(platform or ""), str(user_id))
+
+
+def legacy_key(user_id: str) -> HandoffKey:
+    """Köhnə formatdakı qeyd: istənilən company / platform üçün keçərli"""
+    return ("", "", str(user_id))
+
+
+# ======================================================
+# JSON PERSISTENCE: SNAPSHOT + JURNAL
+# ======================================================
+class HandoffJournal:
+    """
+    control/operator_handoff.json          → snapshot
+    control/operator_handoff.journal.jsonl → snapshot-dan sonrakı dəyişikliklər (bir sətir = bir dəyişiklik)
+    """
+
+    def __init__(self, snapshot_path: Path):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_name(self.snapshot_path.stem + ".journal.jsonl")
+
+    def load(self) -> Dict[HandoffKey, Dict[str, Any]]:
+        records: Dict[HandoffKey, Dict[str, Any]] = {}
+
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            print(f"⚠️ Handoff snapshot oxuna bilmədi: {e}")
+            data = {}
+
+        if isinstance(data, dict) and "schema_version" in data:
+            for item in data.get("handoffs", []):
+                records[handoff_key(item.get("company_id"), item.get("platform"), item.get("user_id"))] = item["record"]
+        elif isinstance(data, dict):
+            # Köhnə format: {user_id: {"status": ..., ...}}
+            for user_id, record in data.items():
+                if isinstance(record, dict) and record.get("status"):
+                    records[legacy_key(user_id)] = record
+
+        # Jurnalı ardıcıl tətbiq et (idempotent: set / clear)
+        for change in iter_jsonl(self.journal_path):
+            key = handoff_key(change.get("company_id"), change.get("platform"), change.get("user_id"))
+            if change.get("op") == "set":
+                records[key] = change.get("record") or {}
+            else:
+                records.pop(key, None)
+        return records
+
+    def append(self, key: HandoffKey, record: Optional[Dict[str, Any]]) -> None:
+        change = {
+            "op": "set" if record is not None else "clear",
+            "company_id": key[0],
+            "platform": key[1],
+            "user_id": key[2]
+        }
+        if record is not None:
+            change["record"] = record
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+    def snapshot(self, records: Dict[HandoffKey, Dict[str, Any]]) -> None:
+        """Snapshot atomik yazılır, SONRA jurnal sıfırlanır (arada çöksə jurnal təkrar tətbiq olunur)"""
+        atomic_write_json(self.snapshot_path, {
+            "schema_version": SNAPSHOT_SCHEMA_VERSION,
+            "handoffs": [
+                {"company_id": key[0], "platform": key[1], "user_id": key[2], "record": record}
+                for key, record in sorted(records.items())
+            ]
+        })
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+
+
+# ======================================================
+# REGISTRY
+# ======================================================
+class HandoffRegistry:
+    """
+    backend: load_handoffs() / append_handoff(key, record) / snapshot_handoffs(records)
+    """
+
+    def __init__(self, backend, snapshot_interval: float = 300.0, snapshot_every: int = 500):
+        self.backend = backend
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_every = snapshot_every
+
+        self._lock = threading.Lock()
+        self._records: Dict[HandoffKey, Dict[str, Any]] = {}
+        self._pending = 0
+        self._next_snapshot = time.monotonic() + snapshot_interval
+
+        self.lookups = 0
+        self.changes = 0
+        self.snapshots = 0
+
+        self.reload()
+        atexit.register(self.snapshot)
+
+    def reload(self) -> None:
+        records = self.backend.load_handoffs()
+        with self._lock:
+            self._records = records
+            self._pending = 0
+
+    # ------------------------------------------------------
+    # Oxuma (hot path - I/O yoxdur)
+    # ------------------------------------------------------
+    def get(self, company_id: str, platform: str, user_id: str) -> Optional[Dict[str, Any]]:
+        self.lookups += 1
+        record = self._records.get(handoff_key(company_id, platform, user_id))
+        if record is None:
+            record = self._records.get(legacy_key(user_id))
+        return record
+
+    def is_active(self, company_id: str, platform: str, user_id: str) -> bool:
+        record = self.get(company_id, platform, user_id)
+        return bool(record and record.get("status", False))
+
+    def active(self) -> Dict[HandoffKey, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._records)
+
+    # ------------------------------------------------------
+    # Yazma (bir dəyişiklik = bir jurnal qeydi)
+    # ------------------------------------------------------
+    def set(self, company_id: str, platform: str, user_id: str, record: Dict[str, Any]) -> None:
+        key = handoff_key(company_id, platform, user_id)
+        with self._lock:
+            self._records[key] = record
+            self.backend.append_handoff(key, record)
+            self._changed()
+        self._maybe_snapshot()
+
+    def clear(self, company_id: str, platform: str, user_id: str) -> None:
+        """Handoff-u bağla (köhnə formatdan gələn qeyd də silinir)"""
+        with self._lock:
+            for key in (handoff_key(company_id, platform, user_id), legacy_key(user_id)):
+                if self._records.pop(key, None) is not None:
+                    self.backend.append_handoff(key, None)
+                    self._changed()
+        self._maybe_snapshot()
+
+    def _changed(self) -> None:
+        self._pending += 1
+        self.changes += 1
+
+    # ------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------
+    def _maybe_snapshot(self) -> None:
+        if self._pending >= self.snapshot_every or (self._pending and time.monotonic() >= self._next_snapshot):
+            self.snapshot()
+
+    def snapshot(self) -> bool:
+        with self._lock:
+            self._next_snapshot = time.monotonic() + self.snapshot_interval
+            if not self._pending:
+                return False
+            try:
+                self.backend.snapshot_handoffs(self._records)
+            except Exception as e:
+                print(f"⚠️ Handoff snapshot xətası: {e}")
+                return False
+            self._pending = 0
+            self.snapshots += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._records),
+            "lookups": self.lookups,
+            "changes": self.changes,
+            "pending_journal": self._pending,
+            "snapshots": self.snapshots
+        }
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DİSK STRUKTURU - HASH SHARD-LANMIŞ QOVLUQLAR
+✅ <root>/<ab>/<cd>/<user_id> - user_id-nin md5 hash-inin ilk 2 baytı (256 × 256 qovluq)
+   milyon müştəridə də hər qovluqda ~15 giriş - stat / listing / backup sürətli qalır
+✅ ShardedLayout.resolve(): bütün yol qurucuları (müştəri beyni, konuşmalar) bunu istifadə edir
+✅ Köhnə düz struktur (<root>/<user_id>) ilk müraciətdə yerində köçürülür (rename)
+✅ IdManifest: <root>/manifest.jsonl - hər yeni id üçün BİR sətir (müştərilər və konuşmalar)
+   toplu işlər (sayma, compaction, konvertasiya) 65 536 shard qovluğunu gəzmir
+✅ Toplu köçürmə (bot dayandırılmış halda):
+    python -m app.storage.layout app/storage/data/telegram
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+SHARD_DEPTH = 2
+LAYOUT_FILE = ".layout.json"
+LAYOUT_VERSION = 1
+MANIFEST_FILE = "manifest.jsonl"
+
+_SHARD_NAME = re.compile(r"^[0-9a-f]{2}$")
+
+
+def shard_parts(user_id: str) -> Tuple[str, ...]:
+    """user_id → ("ab", "cd") - proseslər arası sabit (hash() deyil, md5)"""
+    digest = hashlib.md5(str(user_id).encode("utf-8")).hexdigest()
+    return tuple(digest[i * 2:i * 2 + 2] for i in range(SHARD_DEPTH))
+
+
+class ShardedLayout:
+    """
+    resolve(user_id) → <root>/<ab>/<cd>/<user_id>
+    Köhnə düz qovluqlar qalıbsa (.layout.json yoxdur) hər resolve köhnə yolu da yoxlayır
+    və tapsa yerində köçürür. Toplu köçürmədən sonra bu yoxlama söndürülür.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.marker_path = self.root / LAYOUT_FILE
+        self._lock = threading.Lock()
+        self.migrated = 0
+        # Marker yoxdursa və qovluq boş deyilsə - köhnə struktur ola bilər
+        self.legacy = not self.marker_path.exists() and self._has_entries()
+
+    def _has_entries(self) -> bool:
+        try:
+            with os.scandir(self.root) as entries:
+                # Marker, manifest və gizli (temp / state) fayllar köhnə struktur deyil
+                return any(not entry.name.startswith(".") and entry.name != MANIFEST_FILE for entry in entries)
+        except FileNotFoundError:
+            return False
+
+    def initialize(self) -> None:
+        """Yeni (boş) qovluq: birbaşa shard-lanmış struktur"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        if self.legacy:
+            print(f"⚠️ Köhnə düz qovluq strukturu: {self.root} "
+                  f"(köçürmə: python -m app.storage.layout)")
+        elif not self.marker_path.exists():
+            self.write_marker()
+
+    def write_marker(self) -> None:
+        with open(self.marker_path, "w", encoding="utf-8") as f:
+            json.dump({"layout": "sharded", "depth": SHARD_DEPTH, "version": LAYOUT_VERSION,
+                       "created_at": datetime.now().isoformat()}, f, indent=2)
+        self.legacy = False
+
+    # ------------------------------------------------------
+    # Yollar
+    # ------------------------------------------------------
+    def path_for(self, user_id: str) -> Path:
+        return self.root.joinpath(*shard_parts(user_id), str(user_id))
+
+    def legacy_path(self, user_id: str) -> Path:
+        return self.root / str(user_id)
+
+    def resolve(self, user_id: str) -> Path:
+        path = self.path_for(user_id)
+        # 2 simvollu hex ad shard qovluğudur - köhnə istifadəçi qovluğu kimi qəbul edilmir
+        if self.legacy and not _SHARD_NAME.match(str(user_id)):
+            legacy_path = self.legacy_path(user_id)
+            if legacy_path.is_dir():
+                with self._lock:
+                    if legacy_path.is_dir():
+                        self._move(legacy_path, path)
+        return path
+
+    def _move(self, legacy_path: Path, path: Path) -> None:
+        """Lock altında: köhnə qovluq → shard yolu (hədəf varsa uşaqlar bir-bir)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            os.rename(legacy_path, path)
+        else:
+            for child in legacy_path.iterdir():
+                target = path / child.name
+                if target.exists():
+                    print(f"⚠️ Köçürmə toqquşması, köhnə fayl saxlanıldı: {child}")
+                    continue
+                os.rename(child, target)
+            try:
+                legacy_path.rmdir()
+            except OSError:
+                return
+        self.migrated += 1
+
+    # ------------------------------------------------------
+    # Siyahı (yalnız köçürmə / arxa fon işləri üçün)
+    # ------------------------------------------------------
+    def iter_ids(self) -> Iterator[str]:
+        """Ağacı gəz: shard-lanmış və (varsa) köhnə düz qovluqlar"""
+        if not self.root.exists():
+            return
+        for top in sorted(self.root.iterdir()):
+            if not top.is_dir():
+                continue
+            if not _SHARD_NAME.match(top.name):
+                yield top.name
+                continue
+            for middle in sorted(top.iterdir()):
+                if middle.is_dir():
+                    for user_dir in sorted(middle.iterdir()):
+                        if user_dir.is_dir():
+                            yield user_dir.name
+
+    def migrate_all(self) -> int:
+        """Bütün köhnə düz qovluqları köçür, sonra marker yaz - köçürülən qovluq sayı"""
+        moved = 0
+        if self.root.exists():
+            with self._lock:
+                for top in sorted(self.root.iterdir()):
+                    if top.is_dir() and not _SHARD_NAME.match(top.name):
+                        self._move(top, self.path_for(top.name))
+                        moved += 1
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.write_marker()
+        return moved
+
+
+class IdManifest:
+    """
+    <root>/manifest.jsonl - hər yeni id üçün BİR sətir
+    count() / iter_ids() ağacı gəzmir; fayl yoxdursa bir dəfə ağacdan qurulur
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def add(self, user_id: str) -> None:
+        line = json.dumps({"user_id": str(user_id), "created_at": datetime.now().isoformat()},
+                          ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            if self._count is not None:
+                self._count += 1
+
+    def iter_ids(self) -> Iterator[str]:
+        """Unikal user_id-lər (əlavə olunma sırası ilə) - yarımçıq / korlanmış sətirlər atlanır"""
+        seen = set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        continue
+                    user_id = item.get("user_id") if isinstance(item, dict) else None
+                    if user_id and user_id not in seen:
+                        seen.add(user_id)
+                        yield user_id
+        except FileNotFoundError:
+            return
+
+    def count(self) -> int:
+        with self._lock:
+            if self._count is None:
+                self._count = sum(1 for _ in self.iter_ids())
+            return self._count
+
+    def rebuild(self, user_ids: Iterator[str]) -> int:
+        """Manifesti sıfırdan yaz (temp fayl + os.replace)"""
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        count = 0
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for user_id in user_ids:
+                    f.write(json.dumps({"user_id": str(user_id)}, ensure_ascii=False) + "\n")
+                    count += 1
+            os.replace(tmp_path, self.path)
+            self._count = count
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Düz müştəri / konuşma qovluqlarını shard-lanmış struktura köçür")
+    parser.add_argument("path", nargs="?", default="app/storage/data/telegram")
+    args = parser.parse_args()
+
+    from app.storage.backend import JsonBackend
+
+    result = JsonBackend(Path(args.path)).migrate_layout()
+    print(f"✅ Köçürüldü: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,11 @@
 """
 
 import json
-from datetime import datetime, timedelta
+import os
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import Future
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
 import re
 import sys  # 🚨 BU SƏTR ƏLAVƏ EDİLDİ
 
@@ -45,13 +47,15 @@ if str(app_dir) not in sys.path:
 
 # İndi düzgün import edək
 try:
-    from app.brain.deepthink import analyze_psychology
+    from app.brain.deepthink import analyze_psychology, deepthink
     print("✅ DeepThink import edildi")
 except ImportError as e:
     print(f"❌ DeepThink import xətası: {e}")
+    deepthink = None
     # Sadə emotional state məntiqi yaradaq
     def analyze_psychology(message, intent):
-        message_lower = message.lower()
+        # message: str və ya MessageContext (MessageContext aşağıda import olunur)
+        message_lower = MessageContext.of(message).lowered
         
         # Sadə mood detection
         if "əsəbi" in message_lower or "hirsli" in message_lower:
@@ -94,12 +98,19 @@ import json
 from pathlib import Path
 from typing import Optional, Dict, List
 
+from app.brain.message_context import MessageContext
+from app.brain.result_cache import ResultCache, cache_stats
+from app.brain.rule_registry import RuleRegistry
+from app.storage.concurrency import KeyedExecutor, lock_manager
+from app.storage.group_commit import flatten
+from app.storage.tenants import Tenant, TenantRegistry
+
 INTENT_RULES_PATH = Path("intent_rules.json")
 
-# ✅ 1. FAYLI HƏR DƏFƏ OXUYAN FUNKSİYA
+# ✅ 1. FAYLI OXUYAN FUNKSİYA (registry tərəfindən çağırılır)
 def load_intent_rules() -> dict:
     """
-    🚨 MƏCBURİ FIX: intent_rules.json faylını HƏR DƏFƏ yüklə
+    intent_rules.json faylını diskdən oxu (default yoxdursa yarat)
     """
     try:
         if INTENT_RULES_PATH.exists():
@@ -114,52 +125,102 @@ def load_intent_rules() -> dict:
         print(f"❌ Intent rules yükləmə xətası: {e}")
         return create_default_intent_rules()
 
-# ✅ 2. JSON RULES AŞKARLAMA (HƏR MESAJDA YENİDƏN YÜKLƏ)
-def detect_intent_from_rules(message: str) -> Optional[dict]:
+def _compile_intent_rules(rules: dict) -> Tuple[Tuple[str, dict], ...]:
     """
-    🚨 MƏCBURİ FIX: JSON RULE MATCHER - HƏR MESAJDA FAYLI YENİDƏN OXU
+    JSON qaydalarını match strukturuna çevir:
+    (phrase, nəticə şablonu) cütləri - fayldakı sıra ilə
     """
-    # 🚨 HƏR ZAMAN YENİ YÜKLƏ - manual dəyişikliklər dərhal götürülsün
-    rules = load_intent_rules()
+    entries = []
+    
+    if not isinstance(rules, dict):
+        return tuple(entries)
+    
+    # Hər bir intent kateqoriyasını yoxla
+    for intent_type, categories in rules.items():
+        if not isinstance(categories, dict):
+            continue
+        # Hər bir alt kateqoriyanı yoxla
+        for category, data in categories.items():
+            if not isinstance(data, dict):
+                continue
+            phrases = data.get("phrases", [])
+            if not isinstance(phrases, list):
+                continue
+            template = {
+                "intent": intent_type,
+                "category": category,
+                "pain_points": data.get("pain_points", []),
+                "goal": data.get("goal", ""),
+                "confidence": 0.95,
+                "source": "json_rules"
+            }
+            for phrase in phrases:
+                if phrase and isinstance(phrase, str):
+                    entries.append((phrase, template))
+    
+    return tuple(entries)
+
+# 🚨 HOT-RELOAD: fayl yalnız mtime/size dəyişəndə yenidən kompilyasiya olunur
+intent_rule_registry = RuleRegistry(
+    INTENT_RULES_PATH,
+    loader=lambda path: load_intent_rules(),
+    compiler=_compile_intent_rules
+)
+
+# 🚨 LRU: açar (lower+strip mətn, rules versiyası) - reload zamanı təmizlənir
+intent_rule_cache = ResultCache("intent_rules")
+intent_rule_registry.add_listener(intent_rule_cache.clear)
+
+def _match_intent_rules(message_lower: str) -> Optional[Tuple[str, dict]]:
+    """Stateless hissə: ilk uyğun (phrase, şablon) və ya None"""
+    for phrase, template in intent_rule_registry.get():
+        if phrase in message_lower:
+            return (phrase, template)
+    return None
+
+# ✅ 2. JSON RULES AŞKARLAMA (KOMPİLYASİYA OLUNMUŞ İNDEKS)
+def detect_intent_from_rules(message) -> Optional[dict]:
+    """
+    🚨 JSON RULE MATCHER - kompilyasiya olunmuş indeks üzərində
+    Manual dəyişikliklər ən gec 1 saniyə ərzində götürülür
+    message: str və ya MessageContext
+    """
+    message_lower = MessageContext.of(message).lowered_stripped
     
-    if not rules:
-        return None
+    match = intent_rule_cache.get_or_compute(
+        (message_lower, intent_rule_registry.version),
+        lambda: _match_intent_rules(message_lower)
+    )
     
-    message_lower = message.lower().strip()
-    
-    # JSON strukturu yoxla
-    if isinstance(rules, dict):
-        # Hər bir intent kateqoriyasını yoxla
-        for intent_type, categories in rules.items():
-            if isinstance(categories, dict):
-                # Hər bir alt kateqoriyanı yoxla
-                for category, data in categories.items():
-                    if isinstance(data, dict):
-                        phrases = data.get("phrases", [])
-                        if isinstance(phrases, list):
-                            for phrase in phrases:
-                                if phrase and isinstance(phrase, str) and phrase in message_lower:
-                                    print(f"   🎯 JSON RULE MATCH: '{phrase}' → {intent_type}.{category}")
-                                    return {
-                                        "intent": intent_type,
-                                        "category": category,
-                                        "pain_points": data.get("pain_points", []),
-                                        "goal": data.get("goal", ""),
-                                        "confidence": 0.95,
-                                        "source": "json_rules"
-                                    }
+    if not match:
+        return None
     
-    return None
+    phrase, template = match
+    print(f"   🎯 JSON RULE MATCH: '{phrase}' → {template['intent']}.{template['category']}")
+    result = dict(template)
+    result["pain_points"] = list(template["pain_points"])
+    return result
 
 # ✅ 3. ƏSAS INTENT AŞKARLAMA (JSON ƏVVƏL, HARD-CODE SONRA)
-def _detect_intent_from_message(mesaj: str, psikoloji_durum: dict, onceki_intent: str = None) -> tuple:
+# Keyword qrupları - MessageContext-də qrup adı ilə memo olunur
+INFO_KEYWORDS = ("məlumat", "soruş", "sual", "necə", "nədir", "nece", "nedir", "izah")
+NEGATIVE_INTENT_KEYWORDS = ("baha", "pis", "narazıyam", "bərbad")
+QUALITY_KEYWORDS = ("keyfiyyət", "kalite")
+SLOW_RESPONSE_KEYWORDS = ("cavab", "ver")
+INTEREST_KEYWORDS = ("maraq", "baxmaq", "görmək", "ölçü", "rəng", "model")
+CONFIRMATION_KEYWORDS = ("aydındır", "tamam", "old", "başa düşdüm", "anladım", "ok")
+
+def _detect_intent_from_message(mesaj, psikoloji_durum: dict, onceki_intent: str = None,
+                                rule_match: Optional[dict] = ...) -> tuple:
     """
     🚨 MƏCBURİ FIX: JSON RULES ƏVVƏL, HARD-CODE SONRA
+    rule_match əvvəlcədən hesablanıbsa, yenidən axtarılmır
     """
-    mesaj_lower = mesaj.lower().strip()
+    mesaj = MessageContext.of(mesaj)
     
     # 🚨 1. ƏVVƏL JSON RULE-LARA BAX (MÜTLƏQ ƏVVƏLCƏ)
-    rule_match = detect_intent_from_rules(mesaj)
+    if rule_match is ...:
+        rule_match = detect_intent_from_rules(mesaj)
     if rule_match:
         print(f"   🎯 INTENT FROM JSON: {rule_match['intent']}.{rule_match.get('category', 'general')}")
         print(f"   🚨 JSON MATCH → HARD-CODE LOGIC ATLANIR")
@@ -177,8 +238,7 @@ def _detect_intent_from_message(mesaj: str, psikoloji_durum: dict, onceki_intent
         if _contains_price_keywords(mesaj):
             return "price_question", "get_price_info", ["price_inquiry"]
         
-        info_keywords = ["məlumat", "soruş", "sual", "necə", "nədir", "nece", "nedir", "izah"]
-        if any(keyword in mesaj_lower for keyword in info_keywords):
+        if mesaj.contains_any("info", INFO_KEYWORDS, "lowered_stripped"):
             return "request_info", "get_information", ["information_request"]
         
         return "general_question", "clarify_query", []
@@ -188,35 +248,34 @@ def _detect_intent_from_message(mesaj: str, psikoloji_durum: dict, onceki_intent
         return "accusation", "handle_legal_issue", ["legal_accusation"]
     
     # POSITIVE FEEDBACK
-    negative_keywords_in_message = any(kw in mesaj_lower for kw in ["baha", "pis", "narazıyam", "bərbad"])
+    negative_keywords_in_message = mesaj.contains_any("negative_intent", NEGATIVE_INTENT_KEYWORDS, "lowered_stripped")
     
     if not negative_keywords_in_message and (_contains_positive_keywords(mesaj) or current_mood in ["happy", "satisfied", "positive"]):
         return "positive_feedback", "acknowledge_satisfaction", ["satisfaction"]
     
     # COMPLAINT
     if _contains_complaint_keywords(mesaj) or _contains_price_keywords(mesaj):
-        if "baha" in mesaj_lower and "satırsınız" in mesaj_lower:
+        if "baha" in mesaj.lowered_stripped and "satırsınız" in mesaj.lowered_stripped:
             return "complaint", "reduce_cost", ["price"]
         
         has_price = _contains_price_keywords(mesaj)
         has_complaint = _contains_complaint_keywords(mesaj)
         
-        if has_price and (has_complaint or "baha" in mesaj_lower):
+        if has_price and (has_complaint or "baha" in mesaj.lowered_stripped):
             return "complaint", "address_price_concern", ["price_issue"]
         
-        if "keyfiyyət" in mesaj_lower or "kalite" in mesaj_lower:
+        if mesaj.contains_any("quality", QUALITY_KEYWORDS, "lowered_stripped"):
             return "complaint", "address_quality_concern", ["quality_issue"]
         
         if has_complaint:
             return "complaint", "resolve_issue", []
     
     # SLOW RESPONSE
-    if "gec" in mesaj_lower and ("cavab" in mesaj_lower or "ver" in mesaj_lower):
+    if "gec" in mesaj.lowered_stripped and mesaj.contains_any("slow_response", SLOW_RESPONSE_KEYWORDS, "lowered_stripped"):
         return "slow_response", "get_faster_response", ["gec_cavab", "vaxt_itkisi"]
     
     # INTEREST
-    interest_keywords = ["maraq", "baxmaq", "görmək", "ölçü", "rəng", "model"]
-    if any(keyword in mesaj_lower for keyword in interest_keywords):
+    if mesaj.contains_any("interest", INTEREST_KEYWORDS, "lowered_stripped"):
         if current_mood in ["happy", "satisfied", "positive", "neutral"]:
             return "interest", "explore_options", []
     
@@ -225,8 +284,7 @@ def _detect_intent_from_message(mesaj: str, psikoloji_durum: dict, onceki_intent
         return "price_question", "get_price_info", ["qiymət_şübhəsi"]
     
     # CONFIRMATION
-    confirmation_keywords = ["aydındır", "tamam", "old", "başa düşdüm", "anladım", "ok"]
-    if any(keyword in mesaj_lower for keyword in confirmation_keywords):
+    if mesaj.contains_any("confirmation", CONFIRMATION_KEYWORDS, "lowered_stripped"):
         return "confirmation", "make_decision", []
     
     # DEFAULT
@@ -240,27 +298,7 @@ def _detect_intent_from_message(mesaj: str, psikoloji_durum: dict, onceki_intent
     else:
         return "request_info", "get_information", []
 
-# ✅ 4. KÖMƏKÇİ FUNKSİYALAR (OLD KİMİ QALIR)
-def _is_direct_question(message: str) -> bool:
-    return message.strip().endswith('?') or any(word in message.lower() for word in ["necə", "nədir", "nece", "nedir"])
-
-def _contains_price_keywords(message: str) -> bool:
-    price_keywords = ["qiymət", "bahalı", "baha", "ucuz", "price", "pul", "təklif"]
-    return any(keyword in message.lower() for keyword in price_keywords)
-
-def _contains_complaint_keywords(message: str) -> bool:
-    complaint_keywords = ["şikayət", "narazı", "problem", "issue", "pis", "yaxşı deyil"]
-    return any(keyword in message.lower() for keyword in complaint_keywords)
-
-def _contains_positive_keywords(message: str) -> bool:
-    positive_keywords = ["təşəkkür", "çox sağ ol", "yaxşı", "məmnunam", "əladı"]
-    return any(keyword in message.lower() for keyword in positive_keywords)
-
-def _contains_accusation_keywords(message: str) -> bool:
-    accusation_keywords = ["hüquq", "məhkəmə", "şikayət edəcəm", "qanunsuz", "dolandırıcı"]
-    return any(keyword in message.lower() for keyword in accusation_keywords)
-
-# ✅ 5. TEST FUNKSİYASI
+# ✅ 4. TEST FUNKSİYASI
 def test_intent_detection():
     """JSON rules düzgün işləyirmi yoxlamaq üçün test"""
     test_cases = [
@@ -379,25 +417,27 @@ def create_default_intent_rules() -> dict:
 
 
 # ƏVVƏLCƏ RULES YÜKLƏ
-INTENT_RULES = load_intent_rules()
+INTENT_RULES = intent_rule_registry.raw()
 
 
 
 # ======================================================
 # 🚨 KRİTİK FIX: UNKNOWN → POSITIVE QADAĞASI
 # ======================================================
-def _apply_unknown_restrictions(message: str, psychology_result: dict) -> dict:
+UNKNOWN_NEGATIVE_KEYWORDS = ("baha", "bahadır", "expensive", "puluna dəyməz",
+                             "pis", "bərbad", "narazıyam", "kötü", "yaxşı deyil")
+UNKNOWN_PRICE_KEYWORDS = ("qiymət", "bahadır", "pul", "ödəniş")
+UNKNOWN_COMPLAINT_KEYWORDS = ("pis", "bərbad", "narazıyam")
+
+def _apply_unknown_restrictions(message, psychology_result: dict) -> dict:
     """
     🚨 MƏCBURİ FIX: UNKNOWN halında POSITIVE/HAPPY/JOY YARADILMAMALIDIR
     """
     
-    message_lower = message.lower()
+    ctx = MessageContext.of(message)
     
     # ❌ QADAĞA 1: NEGATİV KEYWORD + POSITIVE MOOD
-    negative_keywords = ["baha", "bahadır", "expensive", "puluna dəyməz", 
-                        "pis", "bərbad", "narazıyam", "kötü", "yaxşı deyil"]
-    
-    if any(keyword in message_lower for keyword in negative_keywords):
+    if ctx.contains_any("unknown_negative", UNKNOWN_NEGATIVE_KEYWORDS):
         # Bu mesajda negative keyword varsa, positive mood VERİLMƏZ
         if psychology_result.get("current_mood") in ["happy", "joy", "positive", "satisfied"]:
             print(f"   🚫 NEGATIVE RESTRICTION: Negative keyword → positive mood FORBIDDEN")
@@ -406,10 +446,8 @@ def _apply_unknown_restrictions(message: str, psychology_result: dict) -> dict:
             psychology_result["last_reason"] = "negative_keyword_detected"
     
     # ❌ QADAĞA 2: PRICE NEGATIVE → POSITIVE FORBIDDEN
-    price_keywords = ["qiymət", "bahadır", "pul", "ödəniş"]
-    complaint_keywords = ["pis", "bərbad", "narazıyam"]
-    
-    if any(pk in message_lower for pk in price_keywords) and any(ck in message_lower for ck in complaint_keywords):
+    if (ctx.contains_any("unknown_price", UNKNOWN_PRICE_KEYWORDS)
+            and ctx.contains_any("unknown_complaint", UNKNOWN_COMPLAINT_KEYWORDS)):
         # Qiymət şikayəti + mənfi ifadə → positive QADAĞANDIR
         if psychology_result.get("current_mood") in ["happy", "joy", "positive"]:
             print(f"   🚫 PRICE COMPLAINT RESTRICTION: price+complaint → positive FORBIDDEN")
@@ -421,127 +459,98 @@ def _apply_unknown_restrictions(message: str, psychology_result: dict) -> dict:
 # ======================================================
 # ACCUSATION KEYWORD DETECTION - QƏTİ QAYDA
 # ======================================================
-def _contains_accusation_keywords(text: str) -> bool:
+ACCUSATION_KEYWORDS = (
+    # HÜQUQİ İDDİALAR
+    "dələduz", "aldatdınız", "pulumu yediniz", "fırıldaq",
+    "yalançı", "saxtakarlıq", "dolandırıcı", "oğurluq",
+    "hiylə", "hiyləgər", "niyyətiniz pis", "şər",
+    
+    # HÜQUQİ TƏHDİDLƏR
+    "polisə verəcəm", "məhkəməyə verəcəm", "şikayət edəcəm",
+    "hüququmı alacam", "qanuni", "hüquqi", "şikayətçi olacam",
+    
+    # ƏTİK İTTİHAM
+    "namussuz", "şərəfsiz", "vicdansız", "insafsız",
+    "xain", "xəyanət", "satqın"
+)
+
+COMPLAINT_KEYWORDS = (
+    "pis", "bərbad", "narazıyam", "kötü", "yaxşı deyil",
+    "əziyyət", "problem", "çətin", "çətinlik", "zəhmət",
+    "yoruldum", "bezdim", "usandım", "sıxıldım",
+    "keyfiyyət", "kalite", "pis iş", "yaxşı iş deyil"
+)
+
+POSITIVE_KEYWORDS = (
+    "keyfiyyətli", "yaxşıdır", "gözəldir", "məmnunam", "təşəkkür",
+    "sağ ol", "əladır", "mükəmməl", "çox yaxşı", "beğəndim"
+)
+
+PRICE_KEYWORDS = (
+    "qiymət", "bahadır", "bahalı", "ucuz", "pahalı",
+    "fiyat", "ödəniş", "vəsait", "pul"
+)
+
+def _contains_accusation_keywords(text) -> bool:
     """
     REAL ACCUSATION yoxlaması - yalnız HÜQUQİ İDDİA
     """
-    accusation_keywords = [
-        # HÜQUQİ İDDİALAR
-        "dələduz", "aldatdınız", "pulumu yediniz", "fırıldaq",
-        "yalançı", "saxtakarlıq", "dolandırıcı", "oğurluq",
-        "hiylə", "hiyləgər", "niyyətiniz pis", "şər",
-        
-        # HÜQUQİ TƏHDİDLƏR
-        "polisə verəcəm", "məhkəməyə verəcəm", "şikayət edəcəm",
-        "hüququmı alacam", "qanuni", "hüquqi", "şikayətçi olacam",
-        
-        # ƏTİK İTTİHAM
-        "namussuz", "şərəfsiz", "vicdansız", "insafsız",
-        "xain", "xəyanət", "satqın"
-    ]
-    
-    text_lower = text.lower()
-    
-    for keyword in accusation_keywords:
-        if keyword in text_lower:
-            return True
-    
-    return False
+    return MessageContext.of(text).contains_any("accusation", ACCUSATION_KEYWORDS)
 
-def _contains_complaint_keywords(text: str) -> bool:
+def _contains_complaint_keywords(text) -> bool:
     """
     ŞİKAYƏT yoxlaması - subyektiv narazılıq
     """
-    complaint_keywords = [
-        "pis", "bərbad", "narazıyam", "kötü", "yaxşı deyil",
-        "əziyyət", "problem", "çətin", "çətinlik", "zəhmət",
-        "yoruldum", "bezdim", "usandım", "sıxıldım",
-        "keyfiyyət", "kalite", "pis iş", "yaxşı iş deyil"
-    ]
-    
-    text_lower = text.lower()
-    
-    for keyword in complaint_keywords:
-        if keyword in text_lower:
-            return True
-    
-    return False
+    return MessageContext.of(text).contains_any("complaint", COMPLAINT_KEYWORDS)
 
-def _contains_positive_keywords(text: str) -> bool:
+def _contains_positive_keywords(text) -> bool:
     """
     POZİTİF feedback açar sözləri
     """
-    positive_keywords = [
-        "keyfiyyətli", "yaxşıdır", "gözəldir", "məmnunam", "təşəkkür",
-        "sağ ol", "əladır", "mükəmməl", "çox yaxşı", "beğəndim"
-    ]
-    
-    text_lower = text.lower()
-    
-    for keyword in positive_keywords:
-        if keyword in text_lower:
-            return True
-    
-    return False
+    return MessageContext.of(text).contains_any("positive", POSITIVE_KEYWORDS)
 
-def _contains_price_keywords(text: str) -> bool:
+def _contains_price_keywords(text) -> bool:
     """
     Qiymət açar sözləri
     """
-    price_keywords = [
-        "qiymət", "bahadır", "bahalı", "ucuz", "pahalı",
-        "fiyat", "ödəniş", "vəsait", "pul"
-    ]
-    
-    text_lower = text.lower()
-    
-    for keyword in price_keywords:
-        if keyword in text_lower:
-            return True
-    
-    return False
+    return MessageContext.of(text).contains_any("price", PRICE_KEYWORDS)
 
 # ======================================================
 # 🚨 STATE LOCK FIX: DIRECT QUESTION DETECTION
 # ======================================================
-def _is_direct_question(mesaj: str) -> bool:
+# Sual sözləri
+QUESTION_WORDS = ("necə", "nə", "neçə", "nece", "nedir", "nədir", 
+                  "hardan", "hara", "hansı", "kim", "niyə", "niye",
+                  "ne zaman", "nə vaxt", "nece alım", "necə alım")
+
+# Qiymət sual patternləri - bir regex-ə kompilyasiya olunur
+PRICE_QUESTION_REGEX = re.compile("|".join([
+    r"qiymət.*necə",
+    r"bahası.*necə",
+    r"neçəyə.*dir",
+    r"nə qədər",
+    r"qiyməti nədir"
+]))
+
+def _is_direct_question(mesaj) -> bool:
     """
     🚨 KRİTİK FIX: Birbaşa sual olub-olmadığını yoxlayır
     """
-    mesaj_lower = mesaj.lower()
-    
-    # Sual işarəsi və ya sual sözü olub-olmadığını yoxla
-    has_question_mark = "?" in mesaj
-    
-    # Sual sözləri
-    question_words = ["necə", "nə", "neçə", "nece", "nedir", "nədir", 
-                     "hardan", "hara", "hansı", "kim", "niyə", "niye",
-                     "ne zaman", "nə vaxt", "nece alım", "necə alım"]
-    
-    # Qiymət sual patternləri
-    price_question_patterns = [
-        r"qiymət.*necə",
-        r"bahası.*necə",
-        r"neçəyə.*dir",
-        r"nə qədər",
-        r"qiyməti nədir"
-    ]
-    
-    # 1. Sual işarəsi varsa
-    if has_question_mark:
-        return True
+    ctx = MessageContext.of(mesaj)
     
-    # 2. Sual sözü varsa
-    for word in question_words:
-        if word in mesaj_lower:
+    def hesabla() -> bool:
+        # 1. Sual işarəsi varsa
+        if "?" in ctx.text:
             return True
-    
-    # 3. Qiymət sual patterni varsa
-    for pattern in price_question_patterns:
-        if re.search(pattern, mesaj_lower):
+        
+        # 2. Sual sözü varsa
+        if ctx.contains_any("question", QUESTION_WORDS):
             return True
+        
+        # 3. Qiymət sual patterni varsa
+        return PRICE_QUESTION_REGEX.search(ctx.lowered) is not None
     
-    return False
+    return ctx.memo("direct_question", hesabla)
 
 # ======================================================
 # 🚨 KRİTİK FIX: REAL-TIME INTENT DETECTION - JSON RULES FIRST
@@ -552,13 +561,13 @@ def _is_direct_question(mesaj: str) -> bool:
 # 🚨 STATE LOCK FIX: CONTEXTUAL INTENT OVERRIDE
 # ======================================================
 def _apply_contextual_intent_override(cari_intent: str, cari_mood: str, 
-                                     onceki_intent: str, mesaj: str,
+                                     onceki_intent: str, mesaj,
                                      conversation_context: dict) -> tuple:
     """
     🚨 KRİTİK FIX: KONTEKSTUAL OVERRIDE QAYDALARI
     """
     
-    mesaj_lower = mesaj.lower()
+    mesaj = MessageContext.of(mesaj)
     
     # 🚨 QAYDA 1: DIRECT QUESTION → INTENT SHIFT (STATE LOCK QIRILMASI)
     if _is_direct_question(mesaj):
@@ -615,6 +624,44 @@ ANALYTICS_PATH = BASE_PATH / "analytics"
 
 OPERATOR_HANDOFF_FILE = CONTROL_PATH / "operator_handoff.json"
 
+# 🚨 MULTI-TENANT: hər (company_id, platform) öz partisiyasında
+# - yaddaş backend-i: MEMORY_BACKEND=json (default) | sqlite (WAL), MEMORY_TENANTS_FILE ilə tenant başına
+# - write-back cache: CUSTOMER_CACHE_SIZE / CUSTOMER_CACHE_FLUSH_INTERVAL (0 → write-through)
+# - group commit: MEMORY_GROUP_COMMIT=1 (default) | 0, MEMORY_GROUP_COMMIT_WINDOW_MS (default 2)
+# - operator handoff registry və analitika sayğacları
+# - MEMORY_MAX_TENANTS (default 32): yüklənmiş tenant limiti, artıq olanlar LRU ilə bağlanır
+# - company_id "default" (API-nin default dəyəri) → MEMORY_DEFAULT_COMPANY
+# Yuxarıdakı BASE_PATH default şirkətin (MEMORY_DEFAULT_COMPANY) telegram tenant-ıdır
+tenants = TenantRegistry(
+    BASE_PATH.parent,
+    legacy_path=BASE_PATH,
+    default_company=os.getenv("MEMORY_DEFAULT_COMPANY", "real_company"),
+    config_path=Path(os.getenv("MEMORY_TENANTS_FILE", "app/storage/tenants.json")),
+    cache_size=int(os.getenv("CUSTOMER_CACHE_SIZE", 1024)),
+    cache_flush_interval=float(os.getenv("CUSTOMER_CACHE_FLUSH_INTERVAL", 5.0)),
+    analytics_flush_interval=float(os.getenv("ANALYTICS_FLUSH_INTERVAL", 30.0)),
+    group_commit_window=(float(os.getenv("MEMORY_GROUP_COMMIT_WINDOW_MS", 2)) / 1000
+                         if os.getenv("MEMORY_GROUP_COMMIT", "1") != "0" else None),
+    max_tenants=int(os.getenv("MEMORY_MAX_TENANTS", 32))
+)
+
+def _tenant(company_id: str = "", platform: str = "") -> ContextManager[Tenant]:
+    """
+    with _tenant(company_id, platform) as tenant: (boş company → default şirkət)
+    Blok müddətində tenant istifadədədir - LRU onu bağlamır
+    """
+    return tenants.use(company_id, platform)
+
+# Default tenant-ın obyektləri (köhnə importlar üçün) - default tenant heç vaxt bağlanmır
+default_tenant = tenants.get()
+storage = default_tenant.storage
+customer_cache = default_tenant.customer_cache
+handoff_registry = default_tenant.handoff_registry
+analytics = default_tenant.analytics
+
+# 🚨 MESAJ POOL-U: fərqli müştərilər paralel, bir müştərinin mesajları gəliş sırası ilə
+message_executor = KeyedExecutor(max_workers=int(os.getenv("MEMORY_WORKERS", 8)))
+
 print(f"🧠 REAL İNSAN BEYNİ SİSTEMİ BAŞLADI")
 print(f"✅ EMOSİYA ≠ INTENT: AKTİV")
 print(f"🔄 SEQUENCE AWARE INTENT: AKTİV")
@@ -624,29 +671,12 @@ print(f"🚨 JSON RULES LOADED: intent_rules.json İŞLƏNİR")
 print(f"🚨 UNKNOWN RESTRICTIONS: Positive/Happy/Joy QADAĞANDIR")
 print(f"🚨 PSYCHOLOGY STATELESS: ANGRY RESET AKTİV")
 
-# ======================================================
-# YARDIMCI FONKSİYONLAR - DƏYİŞMƏZ
-# ======================================================
-def _json_oku(dosya_yolu: Path, varsayilan=None):
-    """JSON oxu"""
-    try:
-        if dosya_yolu.exists():
-            with open(dosya_yolu, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return varsayilan if varsayilan is not None else {}
-
-def _json_yaz(dosya_yolu: Path, veri: Any):
-    """JSON yaz"""
-    dosya_yolu.parent.mkdir(parents=True, exist_ok=True)
-    with open(dosya_yolu, 'w', encoding='utf-8') as f:
-        json.dump(veri, f, indent=2, ensure_ascii=False)
-
 # ======================================================
 # 🚨 KRİTİK FIX: PSİXOLOGİYA GÜNCELLEME - STATELESS VERSİYA
 # ======================================================
-def _psikoloji_guncelle(mesaj: str, onceki_psikoloji: dict, simdi_iso: str, intent: str) -> dict:
+PSYCHOLOGY_PRICE_KEYWORDS = ("baha", "bahadır", "qiymət", "pahalı", "ucuz deyil")
+
+def _psikoloji_guncelle(mesaj, onceki_psikoloji: dict, simdi_iso: str, intent: str) -> dict:
     """
     🚨 YENİ PSİXOLOGİYA: STATELESS + DYNAMIC
     - Keçmiş psixologiya OXUNMUR
@@ -654,8 +684,11 @@ def _psikoloji_guncelle(mesaj: str, onceki_psikoloji: dict, simdi_iso: str, inte
     - EmotionalStateEngine ilə inteqrasiya
     """
     
+    ctx = MessageContext.of(mesaj)
+    mesaj = ctx.text
+    
     # 🚨 1. YENİ ORKESTRATOR ilə psixologiya analizi
-    psychology_result = analyze_psychology(mesaj, intent)
+    psychology_result = analyze_psychology(ctx, intent)
     
     # 🚨 2. Nəticəni qur
     result = {
@@ -669,10 +702,7 @@ def _psikoloji_guncelle(mesaj: str, onceki_psikoloji: dict, simdi_iso: str, inte
     }
     
     # 🚨 3. VALIDATION: Angry mood price complaint-də OLMAMALI
-    mesaj_lower = mesaj.lower()
-    price_keywords = ["baha", "bahadır", "qiymət", "pahalı", "ucuz deyil"]
-    
-    if any(kw in mesaj_lower for kw in price_keywords):
+    if ctx.contains_any("psychology_price", PSYCHOLOGY_PRICE_KEYWORDS):
         if result["current_mood"] in ["angry", "frustrated"]:
             print(f"   🚫 PRICE COMPLAINT VALIDATION: Angry mood → neutral")
             result["current_mood"] = "neutral"
@@ -769,20 +799,8 @@ def test_angry_reset():
 # ======================================================
 # BEYİN OLUŞTURMA SİSTEMİ - EYNİ
 # ======================================================
-def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
-    """
-    Kullanıcı beyin sistemini oluşturur (eğer yoksa)
-    """
-    kullanici_dizini = CUSTOMERS_PATH / str(kullanici_id)
-    
-    # Eğer dizin zaten varsa, yeniden oluşturma
-    if kullanici_dizini.exists():
-        return False
-    
-    # Dizini ve 6 JSON dosyasını oluştur
-    kullanici_dizini.mkdir(parents=True, exist_ok=True)
-    simdi = datetime.now().isoformat()
-    
+def _yeni_beyin(kullanici_id: str, kullanici_adi: str, simdi: str) -> Dict[str, Dict[str, Any]]:
+    """Yeni müşteri üçün 6 bölməli beyin qeydi (yaddaşda)"""
     # 1️⃣ identity.json - Bu kişi kim?
     kimlik_verisi = {
         "telegram_id": str(kullanici_id),
@@ -795,7 +813,6 @@ def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
         "platform": "telegram",
         "updated_at": simdi
     }
-    _json_yaz(kullanici_dizini / "identity.json", kimlik_verisi)
     
     # 2️⃣ behavior.json - Nasıl davranır?
     davranis_verisi = {
@@ -807,7 +824,6 @@ def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
         "avg_message_length": 0,
         "updated_at": simdi
     }
-    _json_yaz(kullanici_dizini / "behavior.json", davranis_verisi)
     
     # 3️⃣ psychology.json - İç durumu
     psikoloji_verisi = {
@@ -819,7 +835,6 @@ def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
         "operator_required": False,
         "updated_at": simdi
     }
-    _json_yaz(kullanici_dizini / "psychology.json", psikoloji_verisi)
     
     # 4️⃣ intent_interest.json - Ne istiyor?
     niyet_verisi = {
@@ -838,7 +853,6 @@ def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
             "last_complaint_time": None
         }
     }
-    _json_yaz(kullanici_dizini / "intent_interest.json", niyet_verisi)
     
     # 5️⃣ relationship.json - Bizimle ilişki
     iliski_verisi = {
@@ -850,7 +864,6 @@ def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
         "engagement_level": "low",
         "updated_at": simdi
     }
-    _json_yaz(kullanici_dizini / "relationship.json", iliski_verisi)
     
     # 6️⃣ sales.json - Satış potansiyeli
     satis_verisi = {
@@ -862,7 +875,30 @@ def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
         "estimated_value": 0,
         "updated_at": simdi
     }
-    _json_yaz(kullanici_dizini / "sales.json", satis_verisi)
+    
+    return {
+        "identity": kimlik_verisi,
+        "behavior": davranis_verisi,
+        "psychology": psikoloji_verisi,
+        "intent_interest": niyet_verisi,
+        "relationship": iliski_verisi,
+        "sales": satis_verisi
+    }
+
+def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "",
+                   company_id: str = "", platform: str = "telegram") -> bool:
+    """
+    Kullanıcı beyin sistemini oluşturur (eğer yoksa)
+    """
+    with _tenant(company_id, platform) as tenant:
+        # Eğer beyin zaten varsa (yeni və ya köhnə format), yeniden oluşturma
+        if tenant.customer_cache.exists(kullanici_id):
+            return False
+        
+        # Yeni müştəri dərhal yazılır (müştəri sayı / exists diskdən oxunur)
+        tenant.customer_cache.put(kullanici_id, _yeni_beyin(kullanici_id, kullanici_adi, datetime.now().isoformat()),
+                                  critical=True)
+        tenant.analytics.record_customer_created()
     
     print(f"🧠 Yeni müşteri beyni oluşturuldu: {kullanici_id} ({kullanici_adi})")
     return True
@@ -870,31 +906,38 @@ def _beyin_olustur(kullanici_id: str, kullanici_adi: str = "") -> bool:
 # ======================================================
 # 🚨 KRİTİK FIX: BEYİN GÜNCELLEME SİSTEMİ - JSON RULES İLƏ
 # ======================================================
-def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
-    """Kullanıcının tüm beyin dosyalarını günceller - JSON RULES FIRST"""
+def _beyin_guncelle(kullanici_id: str, mesaj, kullanici_adi: str,
+                    company_id: str = "", platform: str = "telegram"):
+    """Kullanıcının tüm beyin bölmələrini günceller - JSON RULES FIRST"""
     
-    kullanici_dizini = CUSTOMERS_PATH / str(kullanici_id)
-    
-    # Əgər beyin yoxdursa oluştur
-    if not kullanici_dizini.exists():
-        _beyin_olustur(kullanici_id, kullanici_adi)
+    # 🚨 MESAJ CONTEXT: normalizasiya bütün mərhələlər üçün BİR DƏFƏ
+    ctx = MessageContext.of(mesaj)
+    mesaj = ctx.text
     
     # Zaman
     simdi = datetime.now()
     simdi_iso = simdi.isoformat()
     
-    # 1️⃣ identity.json güncelle
-    kimlik_yolu = kullanici_dizini / "identity.json"
-    kimlik_verisi = _json_oku(kimlik_yolu, {})
+    # 🚨 Tenant-ın cache-indən (miss olarsa BİR oxuma) - dəyişikliklər sonda put() ilə cache-ə düşür
+    # Yalnız _mesaj_kaydet-in _tenant() bloku daxilində çağırılır - tenant orada götürülüb
+    tenant = tenants.get(company_id, platform)
+    beyin = tenant.customer_cache.get(kullanici_id)
+    
+    # Əgər beyin yoxdursa yaddaşda oluştur (yazma sonda - bir dəfə)
+    if beyin is None:
+        beyin = _yeni_beyin(kullanici_id, kullanici_adi, simdi_iso)
+        tenant.analytics.record_customer_created()
+        print(f"🧠 Yeni müşteri beyni oluşturuldu: {kullanici_id} ({kullanici_adi})")
+    
+    # 1️⃣ identity güncelle
+    kimlik_verisi = beyin["identity"]
     kimlik_verisi["last_seen"] = simdi_iso
     kimlik_verisi["updated_at"] = simdi_iso
     if not kimlik_verisi.get("username"):
         kimlik_verisi["username"] = kullanici_adi
-    _json_yaz(kimlik_yolu, kimlik_verisi)
     
-    # 2️⃣ behavior.json güncelle
-    davranis_yolu = kullanici_dizini / "behavior.json"
-    davranis_verisi = _json_oku(davranis_yolu, {})
+    # 2️⃣ behavior güncelle
+    davranis_verisi = beyin["behavior"]
     
     davranis_verisi["message_count"] = davranis_verisi.get("message_count", 0) + 1
     davranis_verisi["last_seen"] = simdi_iso
@@ -924,28 +967,25 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
     else:
         davranis_verisi["avg_message_length"] = int((mevcut_ortalama + mesaj_uzunluk) / 2)
     
-    _json_yaz(davranis_yolu, davranis_verisi)
-    
-    # 3️⃣ psychology.json güncelle - 🚨 YENİ STATELESS PSİXOLOGİYA
-    psikoloji_yolu = kullanici_dizini / "psychology.json"
-    onceki_psikoloji = _json_oku(psikoloji_yolu, {})
+    # 3️⃣ psychology güncelle - 🚨 YENİ STATELESS PSİXOLOGİYA
+    onceki_psikoloji = beyin["psychology"]
     
     # ========== 🚨 JSON RULES FIRST INTENT DETECTION ==========
-    niyet_yolu = kullanici_dizini / "intent_interest.json"
-    niyet_verisi = _json_oku(niyet_yolu, {})
+    niyet_verisi = beyin["intent_interest"]
     
     last_intent = niyet_verisi.get("last_intent")
     conversation_context = niyet_verisi.get("conversation_context", {})
     
-    # 🚨 YENİ INTENT DETECTION: JSON RULES ƏVVƏL
+    # 🚨 YENİ INTENT DETECTION: JSON RULES ƏVVƏL (mesaj başına bir dəfə)
+    rule_match = detect_intent_from_rules(ctx)
     detected_intent, current_goal, pain_points = _detect_intent_from_message(
-        mesaj, onceki_psikoloji, last_intent
+        ctx, onceki_psikoloji, last_intent, rule_match=rule_match
     )
     
     # 🚨 KONTEKSTUAL OVERRIDE tətbiq et
     final_intent, updated_context = _apply_contextual_intent_override(
         detected_intent, onceki_psikoloji.get("current_mood", "neutral"),
-        last_intent, mesaj, conversation_context
+        last_intent, ctx, conversation_context
     )
     
     print(f"🎯 INTENT DETECTION: '{mesaj[:30]}...'")
@@ -956,13 +996,13 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
     
     # 🚨 YENİ PSİXOLOGİYA çağır - INTENT ilə birlikdə
     yeni_psikoloji = _psikoloji_guncelle(
-        mesaj, 
+        ctx, 
         onceki_psikoloji, 
         simdi_iso,
         final_intent  # 🚨 INTENT parametri əlavə edildi
     )
     
-    _json_yaz(psikoloji_yolu, yeni_psikoloji)
+    beyin["psychology"] = yeni_psikoloji
     
     current_mood = yeni_psikoloji.get("current_mood", "neutral")
     emotional_state = yeni_psikoloji.get("emotional_state", "neutral")
@@ -988,8 +1028,8 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
         "psychology_mood": current_mood,
         "psychology_emotional_state": emotional_state,
         "psychology_type": yeni_psikoloji.get("last_message_type", ""),
-        "json_rule_used": detect_intent_from_rules(mesaj) is not None,
-        "state_lock_broken": _is_direct_question(mesaj),
+        "json_rule_used": rule_match is not None,
+        "state_lock_broken": _is_direct_question(ctx),
         "timestamp": datetime.now().isoformat()
     }
     
@@ -1014,17 +1054,15 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
     niyet_verisi["current_goal"] = current_goal
     
     # İlgi alanları
-    ilgiler = _ilgi_cikar(mesaj)
+    ilgiler = _ilgi_cikar(ctx)
     for ilgi in ilgiler:
         if ilgi not in niyet_verisi.get("interests", []):
             niyet_verisi.setdefault("interests", []).append(ilgi)
     
     niyet_verisi["updated_at"] = simdi_iso
-    _json_yaz(niyet_yolu, niyet_verisi)
     
-    # 5️⃣ relationship.json güncelle
-    iliski_yolu = kullanici_dizini / "relationship.json"
-    iliski_verisi = _json_oku(iliski_yolu, {})
+    # 5️⃣ relationship güncelle
+    iliski_verisi = beyin["relationship"]
     
     iliski_verisi["interaction_count"] = iliski_verisi.get("interaction_count", 0) + 1
     iliski_verisi["last_interaction"] = simdi_iso
@@ -1057,7 +1095,7 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
     
     # Əgər operator tələb olunursa, operator handoff faylına yaz
     if operator_required:
-        _operator_handoff_ayarla(kullanici_id, True, "accusation_intent")
+        _operator_handoff_ayarla(kullanici_id, True, "accusation_intent", company_id, platform)
     
     # Etkileşim seviyesi
     etkilesim_sayisi = iliski_verisi["interaction_count"]
@@ -1068,11 +1106,8 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
     else:
         iliski_verisi["engagement_level"] = "high"
     
-    _json_yaz(iliski_yolu, iliski_verisi)
-    
-    # 6️⃣ sales.json güncelle
-    satis_yolu = kullanici_dizini / "sales.json"
-    satis_verisi = _json_oku(satis_yolu, {})
+    # 6️⃣ sales güncelle
+    satis_verisi = beyin["sales"]
     
     # Psixologiya VƏ intent-ə görə satış potensialı
     if current_mood in ["happy", "satisfied", "positive"] and final_intent in ["interest", "price_question", "positive_feedback"]:
@@ -1095,13 +1130,14 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
         satis_verisi["sales_potential"] = "high"
     
     satis_verisi["updated_at"] = simdi_iso
-    _json_yaz(satis_yolu, satis_verisi)
     
     # 7. İsim çıkarımı (eğer mesajda isim varsa)
-    isim = _isim_cikar(mesaj)
+    isim = _isim_cikar(ctx)
     if isim and isim != kullanici_adi:
         kimlik_verisi["real_name"] = isim
-        _json_yaz(kimlik_yolu, kimlik_verisi)
+    
+    # 🚨 Dirty işarələ - yazma flush-da (yeni müştəri / operator_required dəyişikliyi: dərhal)
+    tenant.customer_cache.put(kullanici_id, beyin)
     
     print(f"✅ Beyin güncellendi: {kullanici_id}")
     print(f"   Mood: {current_mood}, Emotional State: {emotional_state}, Intent: {final_intent}, Goal: {current_goal}")
@@ -1111,7 +1147,6 @@ def _beyin_guncelle(kullanici_id: str, mesaj: str, kullanici_adi: str):
         print(f"   🔄 SEQUENCE CHANGE: {last_intent} → {final_intent}")
     
     # 🚨 JSON RULES LOQ
-    rule_match = detect_intent_from_rules(mesaj)
     if rule_match:
         print(f"   📋 JSON RULE USED: {rule_match['intent']}.{rule_match.get('category')}")
 
@@ -1122,39 +1157,39 @@ def _niyet_cikar(metin: str) -> str:
     """Metinden niyet çıkarır (KÖHNƏ - ARTIQ İSTİFADƏ EDİLMİR)"""
     return ""
 
-def _ilgi_cikar(metin: str) -> List[str]:
+ILGI_KELIMELERI = {
+    "price": ("qiymət", "bahası", "ödəniş", "pul", "vəsait", "fiyat", "değer"),
+    "delivery": ("çatdırılma", "kargo", "göndərilmə", "vaxt", "zaman", "ne zaman", "çatdır"),
+    "quality": ("keyfiyyət", "material", "marka", "brend", "istehsal", "kalite", "malzeme"),
+    "warranty": ("zəmanət", "qaranti", "təmir", "servis", "təmiri", "garanti"),
+    "discount": ("endirim", "kampaniya", "təklif", "ucuz", "əskik", "indirim")
+}
+
+ISIM_PATTERNS = tuple(re.compile(pattern) for pattern in [
+    r"adım\s+(\w+)",
+    r"mənim\s+adım\s+(\w+)",
+    r"adımdır\s+(\w+)",
+    r"adı\s+(\w+)",
+    r"men\s+(\w+)"
+])
+
+def _ilgi_cikar(metin) -> List[str]:
     """Metinden ilgi alanlarını çıkarır"""
-    metin_kucuk = metin.lower()
+    ctx = MessageContext.of(metin)
     ilgiler = []
     
-    ilgi_kelimeleri = {
-        "price": ["qiymət", "bahası", "ödəniş", "pul", "vəsait", "fiyat", "değer"],
-        "delivery": ["çatdırılma", "kargo", "göndərilmə", "vaxt", "zaman", "ne zaman", "çatdır"],
-        "quality": ["keyfiyyət", "material", "marka", "brend", "istehsal", "kalite", "malzeme"],
-        "warranty": ["zəmanət", "qaranti", "təmir", "servis", "təmiri", "garanti"],
-        "discount": ["endirim", "kampaniya", "təklif", "ucuz", "əskik", "indirim"]
-    }
-    
-    for ilgi, kelimeler in ilgi_kelimeleri.items():
-        if any(kelime in metin_kucuk for kelime in kelimeler):
+    for ilgi, kelimeler in ILGI_KELIMELERI.items():
+        if ctx.contains_any(f"ilgi_{ilgi}", kelimeler):
             ilgiler.append(ilgi)
     
     return ilgiler
 
-def _isim_cikar(metin: str) -> str:
+def _isim_cikar(metin) -> str:
     """Metinden isim çıkarır (eğer varsa)"""
-    metin_kucuk = metin.lower()
-    
-    patterns = [
-        r"adım\s+(\w+)",
-        r"mənim\s+adım\s+(\w+)",
-        r"adımdır\s+(\w+)",
-        r"adı\s+(\w+)",
-        r"men\s+(\w+)"
-    ]
+    metin_kucuk = MessageContext.of(metin).lowered
     
-    for pattern in patterns:
-        match = re.search(pattern, metin_kucuk)
+    for pattern in ISIM_PATTERNS:
+        match = pattern.search(metin_kucuk)
         if match:
             isim = match.group(1).capitalize()
             if len(isim) > 2 and not isim.isdigit():
@@ -1162,94 +1197,48 @@ def _isim_cikar(metin: str) -> str:
     
     return ""
 
-def _konusma_kaydet(kullanici_id: str, mesaj: str, cevap: str):
-    """Konuşmayı tarihe göre arşivler"""
+def _konusma_kaydet(kullanici_id: str, mesaj: str, cevap: str,
+                    company_id: str = "", platform: str = "telegram") -> Future:
+    """Konuşmayı tarihe göre arşivler - Future: konuşma commit olunanda tamamlanır"""
     simdi = datetime.now()
-    tarih_dosya_adi = simdi.strftime("%Y-%m-%d")
-    
-    kullanici_konusma_dizini = CONVERSATIONS_PATH / str(kullanici_id)
-    konusma_dosyasi = kullanici_konusma_dizini / f"{tarih_dosya_adi}.json"
-    
-    # Mevcut konuşmaları oku veya yeni liste oluştur
-    konusmalar = _json_oku(konusma_dosyasi, [])
-    
-    # Yeni mesajı ekle
-    konusmalar.append({
-        "timestamp": simdi.isoformat(),
-        "user_message": mesaj,
-        "bot_response": cevap,
-        "message_type": "text"
-    })
-    
-    # Sadece son 100 mesajı sakla
-    if len(konusmalar) > 100:
-        konusmalar = konusmalar[-100:]
-    
-    _json_yaz(konusma_dosyasi, konusmalar)
-
-def _operator_handoff_ayarla(kullanici_id: str, aktif: bool, sebep: str = ""):
-    """Operator handoff durumunu ayarlar"""
-    operator_handoff_verisi = _json_oku(OPERATOR_HANDOFF_FILE, {})
-    
-    if aktif:
-        operator_handoff_verisi[kullanici_id] = {
-            "status": True,
-            "updated_at": datetime.now().isoformat(),
-            "reason": sebep,
-            "emotional_analysis": True
-        }
-    else:
-        # Eğer false ise, anahtarı sil
-        if kullanici_id in operator_handoff_verisi:
-            del operator_handoff_verisi[kullanici_id]
     
-    _json_yaz(OPERATOR_HANDOFF_FILE, operator_handoff_verisi)
+    # Sadece son 100 mesajı sakla (gün başına) - backend-in işi
+    with _tenant(company_id, platform) as tenant:
+        return tenant.append_conversation(str(kullanici_id), simdi.strftime("%Y-%m-%d"), {
+            "timestamp": simdi.isoformat(),
+            "user_message": mesaj,
+            "bot_response": cevap,
+            "message_type": "text"
+        })
+
+def _operator_handoff_ayarla(kullanici_id: str, aktif: bool, sebep: str = "",
+                             company_id: str = "", platform: str = "telegram"):
+    """Operator handoff durumunu ayarlar (registry + BİR jurnal qeydi)"""
+    with _tenant(company_id, platform) as tenant:
+        company_id, platform = tenant.key
+        if aktif:
+            # Yalnız yeni açılan handoff sayılır (təkrar set sayğacı artırmır)
+            if not tenant.handoff_registry.is_active(company_id, platform, kullanici_id):
+                tenant.analytics.record_handoff()
+            tenant.handoff_registry.set(company_id, platform, kullanici_id, {
+                "status": True,
+                "updated_at": datetime.now().isoformat(),
+                "reason": sebep,
+                "emotional_analysis": True
+            })
+        else:
+            # Eğer false ise, anahtarı sil
+            tenant.handoff_registry.clear(company_id, platform, kullanici_id)
 
-def _operator_handoff_aktif_mi(kullanici_id: str) -> bool:
-    """Operator handoff aktif mi kontrol eder"""
-    operator_handoff_verisi = _json_oku(OPERATOR_HANDOFF_FILE, {})
-    return operator_handoff_verisi.get(kullanici_id, {}).get("status", False)
+def _operator_handoff_aktif_mi(kullanici_id: str, company_id: str = "", platform: str = "telegram") -> bool:
+    """Operator handoff aktif mi kontrol eder - yaddaşda O(1), I/O yoxdur"""
+    with _tenant(company_id, platform) as tenant:
+        return tenant.handoff_registry.is_active(tenant.company_id, tenant.platform, kullanici_id)
 
-def _analitik_guncelle():
-    """Global analitik verilerini günceller"""
-    global_analitik_dosya = ANALYTICS_PATH / "global.json"
-    analitik_veri = _json_oku(global_analitik_dosya, {})
-    
-    simdi = datetime.now()
-    bugun_tarih = simdi.strftime("%Y-%m-%d")
-    
-    # Toplam müşteri sayısı
-    if CUSTOMERS_PATH.exists():
-        musteri_sayisi = len(list(CUSTOMERS_PATH.glob("*/")))
-    else:
-        musteri_sayisi = 0
-    
-    # Günlük mesaj sayısı
-    if bugun_tarih not in analitik_veri:
-        analitik_veri[bugun_tarih] = {
-            "message_count": 0,
-            "active_customers": 0,
-            "operator_handoffs": 0
-        }
-    
-    analitik_veri[bugun_tarih]["message_count"] += 1
-    analitik_veri["total_customers"] = musteri_sayisi
-    analitik_veri["last_update"] = simdi.isoformat()
-    
-    # Sadece son 30 günü sakla
-    tum_tarihler = list(analitik_veri.keys())
-    for tarih in tum_tarihler:
-        if tarih not in ["total_customers", "last_update"] and tarih != bugun_tarih:
-            # Tarih formatını kontrol et
-            try:
-                datetime.strptime(tarih, "%Y-%m-%d")
-                # 30 günden eski tarihleri sil
-                if (simdi - datetime.strptime(tarih, "%Y-%m-%d")).days > 30:
-                    del analitik_veri[tarih]
-            except ValueError:
-                continue
-    
-    _json_yaz(global_analitik_dosya, analitik_veri)
+def _analitik_guncelle(kullanici_id: str, company_id: str = "", platform: str = "telegram"):
+    """Tenant-ın analitik verilerini günceller - yaddaşda O(1), dövri flush (son 30 gün saxlanılır)"""
+    with _tenant(company_id, platform) as tenant:
+        tenant.analytics.record_message(kullanici_id)
 
 # ======================================================
 # TEST FUNCTIONS - KRİTİK FIX VALIDATION (DÜZƏLDİLMİŞ)
@@ -1345,65 +1334,81 @@ def add_customer_if_not_exists(company_id: str, platform: str, user_id: str, use
     """
     Müşteri yoksa otomatik beyin oluşturur
     """
-    return _beyin_olustur(user_id, username)
+    return _beyin_olustur(user_id, username, company_id, platform)
 
-def save_message(user_id: str, message: str, response: str, 
-                 company_id: str = "", platform: str = "telegram", 
-                 username: str = "User"):
+def _mesaj_kaydet(user_id: str, message, response: str,
+                  company_id: str = "", platform: str = "telegram",
+                  username: str = "User") -> Future:
     """
-    Mesajı müşteri beyin sisteminde saklar
+    Mesajı analiz edir və yazmaları növbələyir - Future: yazmalar commit olunanda tamamlanır
     """
-    # 1. Beyin dosyalarını güncelle
-    _beyin_guncelle(user_id, message, username)
-    
-    # 2. Konuşmayı arşivle
-    _konusma_kaydet(user_id, message, response)
-    
-    # 3. Analitik verilerını güncelle
-    _analitik_guncelle()
+    # 🚨 Mesaj context-i BİR DƏFƏ qurulur (str və ya MessageContext qəbul edilir)
+    ctx = MessageContext.of(message)
+    message = ctx.text
+    
+    # 🚨 Group commit: yazmalar tenant-ın writer batch-inə (BİR tranzaksiya + BİR fsync, çox müştəri)
+    # Group commit söndürülübsə: backend-də BİR tranzaksiya (sqlite: BİR commit)
+    # Lock sırası: əvvəl müştəri lock-u, sonra tranzaksiya (cache flusher ilə eyni sıra)
+    with _tenant(company_id, platform) as tenant, tenant.customer_cache.locked(user_id), tenant.transaction():
+        # 1. Beyin qeydini güncelle
+        _beyin_guncelle(user_id, ctx, username, company_id, platform)
+        
+        # 2. Konuşmayı arşivle
+        commit = _konusma_kaydet(user_id, message, response, company_id, platform)
+        
+        # 3. Analitik verilerını güncelle
+        _analitik_guncelle(user_id, company_id, platform)
     
     print(f"📝 {user_id} için analiz edildi və yazıldı: {message[:30]}...")
+    return commit
+
+def save_message(user_id: str, message, response: str, 
+                 company_id: str = "", platform: str = "telegram", 
+                 username: str = "User"):
+    """
+    Mesajı müşteri beyin sisteminde saklar (konuşma commit olunana qədər gözləyir)
+    """
+    _mesaj_kaydet(user_id, message, response, company_id, platform, username).result()
+
+def submit_message(user_id: str, message, response: str,
+                   company_id: str = "", platform: str = "telegram",
+                   username: str = "User") -> Future:
+    """
+    save_message-i thread pool-da işlədir (event loop / request bloklanmır)
+    Eyni (company, platform, user) üçün mesajlar ardıcıl, fərqli müştərilər paralel
+    Future batch commit olunanda tamamlanır - worker commit-i gözləmir (növbəti mesaja keçir)
+    """
+    return flatten(message_executor.submit(
+        lock_manager.key(*tenants.key(company_id, platform), user_id),
+        _mesaj_kaydet, user_id, message, response, company_id, platform, username
+    ))
 
 def set_operator_handoff(company_id: str, platform: str, user_id: str, active: bool):
     """
     Operator handoff durumunu ayarlar
     """
-    _operator_handoff_ayarla(user_id, active, "manual_request")
+    _operator_handoff_ayarla(user_id, active, "manual_request", company_id, platform)
     print(f"🔄 Operator handoff: {user_id} = {active}")
 
 def is_operator_handoff_active(company_id: str, platform: str, user_id: str) -> bool:
     """
     Operator handoff aktifse True döndürür
     """
-    return _operator_handoff_aktif_mi(user_id)
+    return _operator_handoff_aktif_mi(user_id, company_id, platform)
 
-def get_customer_brain(user_id: str) -> Dict[str, Any]:
+def get_customer_brain(user_id: str, company_id: str = "", platform: str = "telegram") -> Dict[str, Any]:
     """
     Kullanıcının tüm beyin verilerini döndürür
     """
-    kullanici_dizini = CUSTOMERS_PATH / str(user_id)
-    
-    if not kullanici_dizini.exists():
-        return {}
-    
-    beyin_verisi = {}
-    dosyalar = [
-        "identity.json", "behavior.json", "psychology.json",
-        "intent_interest.json", "relationship.json", "sales.json"
-    ]
-    
-    for dosya_adi in dosyalar:
-        dosya_yolu = kullanici_dizini / dosya_adi
-        anahtar = dosya_adi.replace(".json", "")
-        beyin_verisi[anahtar] = _json_oku(dosya_yolu, {})
-    
-    return beyin_verisi
+    with _tenant(company_id, platform) as tenant, tenant.customer_cache.locked(user_id):
+        # get() kompakt formadan təzə dict qaytarır - kopyalamaq lazım deyil
+        return tenant.customer_cache.get(user_id) or {}
 
-def get_customer_profile(user_id: str) -> Dict:
+def get_customer_profile(user_id: str, company_id: str = "", platform: str = "telegram") -> Dict:
     """
     Kullanıcının özet profilini döndürür
     """
-    beyin = get_customer_brain(user_id)
+    beyin = get_customer_brain(user_id, company_id, platform)
     
     if not beyin:
         return {}
@@ -1427,30 +1432,17 @@ def get_customer_profile(user_id: str) -> Dict:
         "operator_required": iliski.get("operator_required", False)
     }
 
-def get_conversation_history(user_id: str, days: int = 7) -> List[Dict]:
+def get_conversation_history(user_id: str, days: int = 7, limit: int = 100,
+                             before: Optional[str] = None, company_id: str = "",
+                             platform: str = "telegram") -> List[Dict]:
     """
-    Kullanıcının konuşma geçmişini döndürür
+    Kullanıcının konuşma geçmişini döndürür (ən yeni birinci)
+    before: bu timestamp-dan köhnə mesajların səhifəsi
     """
-    tum_konusmalar = []
-    
-    kullanici_konusma_dizini = CONVERSATIONS_PATH / str(user_id)
-    if not kullanici_konusma_dizini.exists():
-        return []
-    
-    # Son X günün dosyalarını oku
-    for i in range(days):
-        tarih = datetime.now().date() - timedelta(days=i)
-        tarih_dosya_adi = tarih.strftime("%Y-%m-%d")
-        konusma_dosyasi = kullanici_konusma_dizini / f"{tarih_dosya_adi}.json"
-        
-        if konusma_dosyasi.exists():
-            gun_konusmalari = _json_oku(konusma_dosyasi, [])
-            tum_konusmalar.extend(gun_konusmalari)
-    
-    # Tarihe göre sırala (en yeni en üstte)
-    tum_konusmalar.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    
-    return tum_konusmalar[:100]
+    with _tenant(company_id, platform) as tenant:
+        # Növbədəki (commit olunmamış) mesajlar da görünsün
+        tenant.wait_for_writes(str(user_id))
+        return tenant.storage.conversation_history(str(user_id), days, limit=limit, before=before)
 
 # ======================================================
 # SİSTEM FONKSİYONLARI
@@ -1463,63 +1455,83 @@ class MemoryManager:
     
     def _initialize(self):
         """Sistem başlatılır"""
-        for dizin in [CUSTOMERS_PATH, CONVERSATIONS_PATH, CONTROL_PATH, ANALYTICS_PATH]:
-            dizin.mkdir(parents=True, exist_ok=True)
-    
-    def get_statistics(self):
-        """İstatistikleri döndürür"""
-        global_analitik_dosya = ANALYTICS_PATH / "global.json"
-        analitik_veri = _json_oku(global_analitik_dosya, {})
-        
-        if CUSTOMERS_PATH.exists():
-            musteri_sayisi = len(list(CUSTOMERS_PATH.glob("*/")))
+        storage.initialize()
+    
+    def get_statistics(self, company_id: Optional[str] = None, platform: Optional[str] = None):
+        """
+        İstatistikleri döndürür
+        company_id / platform verilərsə - yalnız həmin tenant-ın öz partisiyasından
+        """
+        if company_id is None and platform is None:
+            yuklu_tenantlar = tenants.loaded()
+            tenant_istatistik = {"tenants": tenants.stats()}
         else:
-            musteri_sayisi = 0
+            with _tenant(company_id or "", platform or "") as tenant:
+                yuklu_tenantlar = [tenant]
+                tenant_istatistik = tenant.stats()
         
-        bugun_tarih = datetime.now().strftime("%Y-%m-%d")
-        bugun_mesaj = analitik_veri.get(bugun_tarih, {}).get("message_count", 0)
+        # Yaddaşdakı sayğaclardan - glob / fayl oxuma yoxdur
+        musteri_sayisi = sum(tenant.analytics.total_customers for tenant in yuklu_tenantlar)
+        bugun_mesaj = sum(tenant.analytics.today()["message_count"] for tenant in yuklu_tenantlar)
+        son_guncelleme = max((tenant.analytics.last_update for tenant in yuklu_tenantlar), default="")
         
         return {
+            **tenant_istatistik,
             "total_customers": musteri_sayisi,
             "today_messages": bugun_mesaj,
-            "last_update": analitik_veri.get("last_update", ""),
+            "last_update": son_guncelleme,
             "system": "telegram_customer_brain",
             "architecture": "fail_safe_emotion_engine",
             "state_lock_fix": "ACTIVE",
             "json_rules_loaded": bool(INTENT_RULES),
+            "classification_cache": cache_stats(),
+            "unknown_phrases": deepthink.unknown_tracker.stats() if deepthink else {},
+            "locks": lock_manager.stats(),
+            "message_executor": message_executor.stats(),
             "psychology_stateless": "ACTIVE",
             "angry_reset_fix": "ACTIVE",
             "version": "7.0"
         }
     
-    def get_customer_messages(self, user_id: str, limit: int = 50) -> List[Dict]:
+    def get_customer_messages(self, user_id: str, limit: int = 50, company_id: str = "",
+                              platform: str = "telegram") -> List[Dict]:
         """Müşterinin mesajlarını döndürür"""
-        return get_conversation_history(user_id, days=30)[:limit]
-    
-    def cleanup_old_data(self, days: int = 30):
-        """Eski verileri temizler"""
-        print(f"⚠️ Cleanup fonksiyonu henüz implement edilmedi: {days} gün")
+        return get_conversation_history(user_id, days=30, limit=limit, company_id=company_id, platform=platform)
+    
+    def cleanup_old_data(self, days: int = 30) -> Dict[str, int]:
+        """
+        Eski verileri temizler (bütün tenant-lar): days gündən köhnə konuşmalar silinir,
+        köhnə günlər aylıq arxivə yığılır - nəticədə boşalan bayt sayı
+        """
+        netice: Dict[str, int] = {}
+        for company_id, platform in tenants.known_keys():
+            with _tenant(company_id, platform) as tenant:
+                tenant_netice = tenant.storage.compact_conversations(retention_days=days)
+            for key, value in tenant_netice.items():
+                netice[key] = netice.get(key, 0) + value
+        print(f"🧹 Cleanup ({days} gün): {netice}")
+        return netice
 
 def get_memory_manager():
     """MemoryManager instance'ını döndürür"""
     return MemoryManager()
 
-def get_statistics():
-    """İstatistikleri döndürür"""
+def get_statistics(company_id: Optional[str] = None, platform: Optional[str] = None):
+    """İstatistikleri döndürür (company_id / platform → yalnız o tenant)"""
     memory_manager = MemoryManager()
-    return memory_manager.get_statistics()
+    return memory_manager.get_statistics(company_id, platform)
 
 def initialize_memory_system():
     """Sistem başlatılır"""
-    # Tüm gerekli dizinleri oluştur
-    for dizin in [CUSTOMERS_PATH, CONVERSATIONS_PATH, CONTROL_PATH, ANALYTICS_PATH]:
-        dizin.mkdir(parents=True, exist_ok=True)
+    # Tüm gerekli dizinleri / cədvəlləri oluştur
+    storage.initialize()
     
-    musteri_sayisi = len(list(CUSTOMERS_PATH.glob("*/"))) if CUSTOMERS_PATH.exists() else 0
+    musteri_sayisi = analytics.total_customers
     
     print(f"\n" + "="*60)
     print(f"✅ REAL İNSAN BEYNİ SİSTEMİ BAŞLADI (v7.0)")
     print(f"📂 Temel yol: {BASE_PATH}")
+    print(f"💾 Yaddaş backend-i: {storage.name}")
     print(f"👥 Müşteri sayısı: {musteri_sayisi}")
     print(f"🧠 EMOSİYA ≠ INTENT: AKTİV")
     print(f"🔄 SEQUENCE AWARE INTENT: AKTİV")
@@ -1556,22 +1568,23 @@ def update_customer_psychology(company_id: str, platform: str, user_id: str, psy
     Müştərinin psixologiya məlumatlarını yenilə
     """
     try:
-        kullanici_dizini = CUSTOMERS_PATH / str(user_id)
+        with _tenant(company_id, platform) as tenant, tenant.customer_cache.locked(user_id):
+            cache = tenant.customer_cache
+            beyin = cache.get(user_id)
         
-        if not kullanici_dizini.exists():
-            return False
+            if beyin is None:
+                return False
         
-        psikoloji_yolu = kullanici_dizini / "psychology.json"
-        psikoloji_verisi = _json_oku(psikoloji_yolu, {})
+            psikoloji_verisi = beyin["psychology"]
         
-        for key, value in psychology_data.items():
-            if isinstance(value, dict) and key in psikoloji_verisi and isinstance(psikoloji_verisi[key], dict):
-                psikoloji_verisi[key].update(value)
-            else:
-                psikoloji_verisi[key] = value
+            for key, value in psychology_data.items():
+                if isinstance(value, dict) and key in psikoloji_verisi and isinstance(psikoloji_verisi[key], dict):
+                    psikoloji_verisi[key].update(value)
+                else:
+                    psikoloji_verisi[key] = value
         
-        psikoloji_verisi["updated_at"] = datetime.now().isoformat()
-        _json_yaz(psikoloji_yolu, psikoloji_verisi)
+            psikoloji_verisi["updated_at"] = datetime.now().isoformat()
+            cache.put(user_id, beyin)
         
         return True
     except Exception as e:
@@ -1583,22 +1596,23 @@ def update_customer_sales(company_id: str, platform: str, user_id: str, sales_da
     Müştərinin satış məlumatlarını yenilə
     """
     try:
-        kullanici_dizini = CUSTOMERS_PATH / str(user_id)
+        with _tenant(company_id, platform) as tenant, tenant.customer_cache.locked(user_id):
+            cache = tenant.customer_cache
+            beyin = cache.get(user_id)
         
-        if not kullanici_dizini.exists():
-            return False
+            if beyin is None:
+                return False
         
-        satis_yolu = kullanici_dizini / "sales.json"
-        satis_verisi = _json_oku(satis_yolu, {})
+            satis_verisi = beyin["sales"]
         
-        for key, value in sales_data.items():
-            if isinstance(value, dict) and key in satis_verisi and isinstance(satis_verisi[key], dict):
-                satis_verisi[key].update(value)
-            else:
-                satis_verisi[key] = value
+            for key, value in sales_data.items():
+                if isinstance(value, dict) and key in satis_verisi and isinstance(satis_verisi[key], dict):
+                    satis_verisi[key].update(value)
+                else:
+                    satis_verisi[key] = value
         
-        satis_verisi["updated_at"] = datetime.now().isoformat()
-        _json_yaz(satis_yolu, satis_verisi)
+            satis_verisi["updated_at"] = datetime.now().isoformat()
+            cache.put(user_id, beyin)
         
         return True
     except Exception as e:
@@ -1610,28 +1624,29 @@ def update_customer_intent(company_id: str, platform: str, user_id: str, intent_
     Müştərinin niyyət məlumatlarını yenilə
     """
     try:
-        kullanici_dizini = CUSTOMERS_PATH / str(user_id)
+        with _tenant(company_id, platform) as tenant, tenant.customer_cache.locked(user_id):
+            cache = tenant.customer_cache
+            beyin = cache.get(user_id)
         
-        if not kullanici_dizini.exists():
-            return False
+            if beyin is None:
+                return False
         
-        niyet_yolu = kullanici_dizini / "intent_interest.json"
-        niyet_verisi = _json_oku(niyet_yolu, {})
+            niyet_verisi = beyin["intent_interest"]
         
-        for key, value in intent_data.items():
-            if key == "interests" and isinstance(value, list):
-                mevcut_ilgiler = niyet_verisi.get("interests", [])
-                yeni_ilgiler = [ilgi for ilgi in value if ilgi not in mevcut_ilgiler]
-                niyet_verisi["interests"] = mevcut_ilgiler + yeni_ilgiler
-            elif key == "intents" and isinstance(value, list):
-                mevcut_niyyetler = niyet_verisi.get("intents", [])
-                yeni_niyyetler = [niyet for niyet in value if niyet not in mevcut_niyyetler]
-                niyet_verisi["intents"] = mevcut_niyyetler + yeni_niyyetler
-            else:
-                niyet_verisi[key] = value
+            for key, value in intent_data.items():
+                if key == "interests" and isinstance(value, list):
+                    mevcut_ilgiler = niyet_verisi.get("interests", [])
+                    yeni_ilgiler = [ilgi for ilgi in value if ilgi not in mevcut_ilgiler]
+                    niyet_verisi["interests"] = mevcut_ilgiler + yeni_ilgiler
+                elif key == "intents" and isinstance(value, list):
+                    mevcut_niyyetler = niyet_verisi.get("intents", [])
+                    yeni_niyyetler = [niyet for niyet in value if niyet not in mevcut_niyyetler]
+                    niyet_verisi["intents"] = mevcut_niyyetler + yeni_niyyetler
+                else:
+                    niyet_verisi[key] = value
         
-        niyet_verisi["updated_at"] = datetime.now().isoformat()
-        _json_yaz(niyet_yolu, niyet_verisi)
+            niyet_verisi["updated_at"] = datetime.now().isoformat()
+            cache.put(user_id, beyin)
         
         return True
     except Exception as e:
@@ -1643,22 +1658,23 @@ def update_customer_relationship(company_id: str, platform: str, user_id: str, r
     Müştəri münasibət məlumatlarını yenilə
     """
     try:
-        kullanici_dizini = CUSTOMERS_PATH / str(user_id)
+        with _tenant(company_id, platform) as tenant, tenant.customer_cache.locked(user_id):
+            cache = tenant.customer_cache
+            beyin = cache.get(user_id)
         
-        if not kullanici_dizini.exists():
-            return False
+            if beyin is None:
+                return False
         
-        iliski_yolu = kullanici_dizini / "relationship.json"
-        iliski_verisi = _json_oku(iliski_yolu, {})
+            iliski_verisi = beyin["relationship"]
         
-        for key, value in relationship_data.items():
-            if isinstance(value, dict) and key in iliski_verisi and isinstance(iliski_verisi[key], dict):
-                iliski_verisi[key].update(value)
-            else:
-                iliski_verisi[key] = value
+            for key, value in relationship_data.items():
+                if isinstance(value, dict) and key in iliski_verisi and isinstance(iliski_verisi[key], dict):
+                    iliski_verisi[key].update(value)
+                else:
+                    iliski_verisi[key] = value
         
-        iliski_verisi["updated_at"] = datetime.now().isoformat()
-        _json_yaz(iliski_yolu, iliski_verisi)
+            iliski_verisi["updated_at"] = datetime.now().isoformat()
+            cache.put(user_id, beyin)
         
         return True
     except Exception as e:
@@ -1668,6 +1684,5 @@ def update_customer_relationship(company_id: str, platform: str, user_id: str, r
 # ======================================================
 # BAŞLANGIÇ
 # ======================================================
-# Dosya import edildiğinde dizinleri oluştur
-for dizin in [CUSTOMERS_PATH, CONVERSATIONS_PATH, CONTROL_PATH, ANALYTICS_PATH]:
-    dizin.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+# Dosya import edildiğinde dizinleri / cədvəlləri oluştur
+# (hər tenant yaradılanda öz backend-ini initialize edir - default tenant yuxarıda yükləndi)
\ No newline at end of file
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SERİALİZASİYA - PLUGGABLE FORMAT (JSON / BİNAR)
+✅ Backend başına seçilir: MEMORY_SERIALIZER=json|binary (default: json)
+✅ json   → oxunaqlı JSON (indent=2) qeydlər, JSONL seqmentlər - debug üçün
+✅ binary → kompakt tag-lı binar kodlaşdırma (varint uzunluqlar), u32 uzunluq prefiksli frame-lər
+✅ Fayllar özünü təsvir edir: binar fayl MAGIC başlığı ilə başlayır (format + sxem versiyası),
+   qalan hər şey JSON-dur → qarışıq ağaclar (köçürmə zamanı) eyni kodla oxunur
+✅ Qeyd (record):  <başlıq><dəyər>
+   Seqment:        <başlıq>(<u32 uzunluq><dəyər>)*  - append-only, yarımçıq son frame atlanır
+✅ Toplu çevirmə (bot dayandırılmış halda):
+    python -m app.storage.serializer app/storage/data/telegram --format binary
+"""
+
+import argparse
+import json
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# İlk bayt 0x00: etibarlı JSON / UTF-8 mətn heç vaxt bununla başlamır
+MAGIC = b"\x00SSB"
+FORMAT_VERSION = 1
+SCHEMA_VERSION = 1
+
+KIND_RECORD = 1
+KIND_SEGMENT = 2
+
+_HEADER = struct.Struct("<4sBBH")
+HEADER_SIZE = _HEADER.size
+
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_I64_MIN = -(1 << 63)
+_I64_MAX = (1 << 63) - 1
+
+
+class SerializationError(ValueError):
+    """Korlanmış / naməlum binar məlumat"""
+
+
+# ======================================================
+# BİNAR DƏYƏR KODLAŞDIRMASI
+# N=None T=True F=False u=0..255 i=int64 I=böyük int d=float64 s=str l=list m=dict
+# Uzunluqlar / saylar varint (LEB128): 128-dən kiçik - 1 bayt
+# ======================================================
+def _varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    byte = data[offset]
+    if byte < 0x80:
+        return byte, offset + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        offset += 1
+        byte = data[offset]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset + 1
+        shift += 7
+
+
+def _key(key: Any) -> str:
+    """dict açarı JSON qaydası ilə str-ə (1 → "1", True → "true", None → "null")"""
+    return key if isinstance(key, str) else json.dumps(key)
+
+
+def _encode(value: Any, out: bytearray) -> None:
+    value_type = type(value)
+    if value_type is str:
+        data = value.encode("utf-8")
+        out += b"s"
+        _varint(len(data), out)
+        out += data
+    elif value_type is dict:
+        out += b"m"
+        _varint(len(value), out)
+        for key, item in value.items():
+            data = _key(key).encode("utf-8")
+            _varint(len(data), out)
+            out += data
+            _encode(item, out)
+    elif value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif value_type is int:
+        if 0 <= value <= 0xFF:
+            out += b"u"
+            out.append(value)
+        elif _I64_MIN <= value <= _I64_MAX:
+            out += b"i"
+            out += _I64.pack(value)
+        else:
+            data = str(value).encode("ascii")
+            out += b"I"
+            _varint(len(data), out)
+            out += data
+    elif value_type is float:
+        out += b"d"
+        out += _F64.pack(value)
+    elif value_type is list or value_type is tuple:
+        out += b"l"
+        _varint(len(value), out)
+        for item in value:
+            _encode(item, out)
+    # Alt siniflər (str Enum və s.) - json.dumps kimi baza tipinə görə
+    elif isinstance(value, str):
+        _encode(str(value), out)
+    elif isinstance(value, bool):
+        _encode(bool(value), out)
+    elif isinstance(value, int):
+        _encode(int(value), out)
+    elif isinstance(value, float):
+        _encode(float(value), out)
+    elif isinstance(value, dict):
+        _encode(dict(value), out)
+    elif isinstance(value, (list, tuple)):
+        _encode(list(value), out)
+    else:
+        raise TypeError(f"Object of type {value_type.__name__} is not serializable")
+
+
+_KEY_CACHE: Dict[bytes, str] = {}
+_KEY_CACHE_LIMIT = 4096
+
+
+def _decode(data: bytes, offset: int) -> Tuple[Any, int]:
+    tag = data[offset]
+    offset += 1
+    if tag == 0x73:  # s
+        size, offset = _read_varint(data, offset)
+        end = offset + size
+        return data[offset:end].decode("utf-8"), end
+    if tag == 0x6D:  # m
+        count, offset = _read_varint(data, offset)
+        result: Dict[str, Any] = {}
+        for _ in range(count):
+            size, offset = _read_varint(data, offset)
+            end = offset + size
+            # Açarlar (sahə adları) təkrarlanır - decode bir dəfə
+            raw_key = data[offset:end]
+            key = _KEY_CACHE.get(raw_key)
+            if key is None:
+                key = raw_key.decode("utf-8")
+                if len(_KEY_CACHE) < _KEY_CACHE_LIMIT:
+                    _KEY_CACHE[raw_key] = key
+            result[key], offset = _decode(data, end)
+        return result, offset
+    if tag == 0x75:  # u
+        return data[offset], offset + 1
+    if tag == 0x69:  # i
+        return _I64.unpack_from(data, offset)[0], offset + 8
+    if tag == 0x4E:  # N
+        return None, offset
+    if tag == 0x54:  # T
+        return True, offset
+    if tag == 0x46:  # F
+        return False, offset
+    if tag == 0x64:  # d
+        return _F64.unpack_from(data, offset)[0], offset + 8
+    if tag == 0x6C:  # l
+        count, offset = _read_varint(data, offset)
+        items: List[Any] = []
+        for _ in range(count):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == 0x49:  # I
+        size, offset = _read_varint(data, offset)
+        return int(data[offset:offset + size].decode("ascii")), offset + size
+    raise SerializationError(f"Naməlum tag: {tag:#x} (offset {offset - 1})")
+
+
+def _decode_value(data: bytes) -> Any:
+    try:
+        value, offset = _decode(data, 0)
+    except (struct.error, IndexError, UnicodeDecodeError, ValueError) as e:
+        raise SerializationError(f"Binar dəyər oxuna bilmədi: {e}") from e
+    if offset != len(data):
+        raise SerializationError(f"Dəyərdən sonra artıq bayt: {len(data) - offset}")
+    return value
+
+
+def read_header(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """Binar başlıq → (format_version, kind, schema_version); JSON-dursa None"""
+    if len(data) < HEADER_SIZE or not data.startswith(MAGIC):
+        return None
+    _, format_version, kind, schema_version = _HEADER.unpack_from(data)
+    if format_version > FORMAT_VERSION:
+        raise SerializationError(f"Dəstəklənməyən binar format versiyası: {format_version}")
+    return format_version, kind, schema_version
+
+
+# ======================================================
+# SERİALİZATORLAR
+# ======================================================
+class Serializer:
+    """
+    dumps(obj)       → bütöv qeyd (brain.json və s.)
+    segment_header() → yeni seqment faylının başlığı (JSONL-də boş)
+    frame(entry)     → seqmentə əlavə olunan bir qeyd
+    Oxuma formatdan asılı deyil: modul səviyyəli loads() / iter_stream() başlığa baxır
+    """
+
+    name = "abstract"
+
+    def dumps(self, obj: Any, schema_version: int = SCHEMA_VERSION) -> bytes:
+        raise NotImplementedError
+
+    def segment_header(self, schema_version: int = SCHEMA_VERSION) -> bytes:
+        raise NotImplementedError
+
+    def frame(self, entry: Any) -> bytes:
+        raise NotImplementedError
+
+
+class JsonSerializer(Serializer):
+    """Oxunaqlı JSON - mövcud fayllarla bayt-bayt eyni"""
+
+    name = "json"
+
+    def __init__(self, indent: Optional[int] = 2):
+        self.indent = indent
+
+    def dumps(self, obj: Any, schema_version: int = SCHEMA_VERSION) -> bytes:
+        return json.dumps(obj, indent=self.indent, ensure_ascii=False).encode("utf-8")
+
+    def segment_header(self, schema_version: int = SCHEMA_VERSION) -> bytes:
+        return b""
+
+    def frame(self, entry: Any) -> bytes:
+        return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class BinarySerializer(Serializer):
+    """MAGIC + versiyalar, sonra tag-lı dəyərlər (seqmentdə hər biri u32 uzunluq prefiksli)"""
+
+    name = "binary"
+
+    def dumps(self, obj: Any, schema_version: int = SCHEMA_VERSION) -> bytes:
+        out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, KIND_RECORD, schema_version))
+        _encode(obj, out)
+        return bytes(out)
+
+    def segment_header(self, schema_version: int = SCHEMA_VERSION) -> bytes:
+        return _HEADER.pack(MAGIC, FORMAT_VERSION, KIND_SEGMENT, schema_version)
+
+    def frame(self, entry: Any) -> bytes:
+        out = bytearray(4)
+        _encode(entry, out)
+        _U32.pack_into(out, 0, len(out) - 4)
+        return bytes(out)
+
+
+JSON = JsonSerializer()
+BINARY = BinarySerializer()
+SERIALIZERS: Dict[str, Serializer] = {JSON.name: JSON, BINARY.name: BINARY}
+
+
+def get_serializer(name: Optional[str] = None) -> Serializer:
+    """Ad → serializator (naməlum ad → json)"""
+    serializer = SERIALIZERS.get((name or JSON.name).lower())
+    if serializer is None:
+        print(f"⚠️ Naməlum serializator: {name} → json istifadə olunur")
+        return JSON
+    return serializer
+
+
+def sniff(prefix: bytes) -> Serializer:
+    """Faylın ilk baytları → onu yazan serializator"""
+    return BINARY if read_header(prefix) is not None else JSON
+
+
+# ======================================================
+# OXUMA (formatdan asılı olmayaraq)
+# ======================================================
+def loads(data) -> Any:
+    """Qeyd: binar başlıq varsa binar, yoxsa JSON (str də qəbul olunur - SQLite TEXT sütunları)"""
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    header = read_header(data)
+    if header is None:
+        return json.loads(data.decode("utf-8"))
+    if header[1] != KIND_RECORD:
+        raise SerializationError("Qeyd gözlənilirdi, seqment tapıldı")
+    return _decode_value(data[HEADER_SIZE:])
+
+
+def iter_stream(f: BinaryIO) -> Iterator[Any]:
+    """
+    Seqment faylını stream et (açıq binar fayl / gzip obyekti)
+    JSONL: korlanmış sətirlər atlanır, yarımçıq son sətir oxunmur
+    Binar: korlanmış frame uzunluğu sayəsində atlanır, yarımçıq son frame oxunmur
+    """
+    prefix = f.read(HEADER_SIZE)
+    header = read_header(prefix)
+    if header is None:
+        yield from _iter_json_lines(prefix, f)
+        return
+    if header[1] != KIND_SEGMENT:
+        raise SerializationError("Seqment gözlənilirdi, qeyd tapıldı")
+    while True:
+        size_bytes = f.read(4)
+        if len(size_bytes) < 4:
+            return
+        (size,) = _U32.unpack(size_bytes)
+        payload = f.read(size)
+        if len(payload) < size:
+            # Hələ yazılmaqda olan son frame
+            return
+        try:
+            yield _decode_value(payload)
+        except SerializationError:
+            continue
+
+
+def _iter_json_lines(prefix: bytes, f: BinaryIO) -> Iterator[Any]:
+    pending = prefix
+    for chunk in iter(lambda: f.read(65536), b""):
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+    # pending: "\n" ilə bitməyən son sətir - hələ yazılmaqdadır
+
+
+def read_file(path: Path) -> Tuple[Optional[Serializer], List[Any], int]:
+    """Seqment faylı → (format, dəyərlər, xam qeyd sayı); fayl yoxdursa (None, [], 0)"""
+    try:
+        with open(path, "rb") as f:
+            serializer = sniff(f.read(HEADER_SIZE))
+            f.seek(0)
+            values = list(iter_stream(f))
+            raw_count = _raw_count(serializer, f)
+    except FileNotFoundError:
+        return None, [], 0
+    return serializer, values, raw_count
+
+
+def _raw_count(serializer: Serializer, f: BinaryIO) -> int:
+    """Compaction üçün: fayldakı (korlanmışlar da daxil) qeyd sayı"""
+    f.seek(0)
+    if serializer is JSON:
+        return sum(1 for line in f if line.strip())
+    f.seek(HEADER_SIZE)
+    count = 0
+    while True:
+        size_bytes = f.read(4)
+        if len(size_bytes) < 4:
+            return count
+        (size,) = _U32.unpack(size_bytes)
+        f.seek(size, 1)
+        count += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON backend qovluğunu başqa serializasiya formatına çevir")
+    parser.add_argument("path", nargs="?", default="app/storage/data/telegram")
+    parser.add_argument("--format", default=BINARY.name, choices=sorted(SERIALIZERS))
+    args = parser.parse_args()
+
+    from app.storage.backend import JsonBackend
+
+    backend = JsonBackend(Path(args.path), serializer=get_serializer(args.format))
+    backend.initialize()
+    result = backend.convert_format()
+    print(f"✅ Çevrildi ({args.format}): {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLITE BACKEND - WAL REJİMİ
+✅ Cədvəllər: customers, profile_sections, conversations, operator_handoffs, analytics_daily, analytics_meta
+✅ WAL: oxuyanlar yazanı gözləmir, yazan oxuyanları bloklamır
+✅ Hər thread-in öz connection-ı (sqlite3 connection thread-lər arası paylaşılmır)
+✅ transaction(): bir mesajın beyin + konuşma + analitika yazmaları BİR commit
+✅ write_batch(): group commit - çox müştərinin yazmaları BİR commit (synchronous=FULL)
+✅ İndekslər: (user_id, day, id) konuşmalar üçün
+✅ serializer=binary → profil bölmələri BLOB kimi (binar qeyd); oxuma TEXT / BLOB-u özü tanıyır
+✅ JSON qovluğundan köçürmə:
+    python -m app.storage.sqlite_backend app/storage/data/telegram app/storage/data/telegram/memory.db
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.storage.backend import (
+    ANALYTICS_KEEP_DAYS,
+    ANALYTICS_META_KEYS,
+    HISTORY_LIMIT,
+    JsonBackend,
+    StorageBackend,
+    history_days
+)
+from app.storage.customer_store import SCHEMA_VERSION, SECTIONS
+from app.storage.handoff_registry import HandoffKey
+from app.storage.serializer import JSON, Serializer, loads
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    user_id        TEXT PRIMARY KEY,
+    schema_version INTEGER NOT NULL,
+    updated_at     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile_sections (
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    data    TEXT NOT NULL,
+    PRIMARY KEY (user_id, section)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS conversations (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id       TEXT NOT NULL,
+    day           TEXT NOT NULL,
+    timestamp     TEXT NOT NULL,
+    user_message  TEXT,
+    bot_response  TEXT,
+    message_type  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_user_day ON conversations (user_id, day, id);
+CREATE TABLE IF NOT EXISTS operator_handoffs (
+    company_id TEXT NOT NULL,
+    platform   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    PRIMARY KEY (company_id, platform, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS analytics_daily (
+    day               TEXT PRIMARY KEY,
+    message_count     INTEGER NOT NULL DEFAULT 0,
+    active_customers  INTEGER NOT NULL DEFAULT 0,
+    operator_handoffs INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS analytics_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SqliteBackend(StorageBackend):
+    """StorageBackend-in SQLite (WAL) implementasiyası"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path, timeout: float = 10.0, serializer: Serializer = JSON):
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self.serializer = serializer
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._schema_ready = False
+
+    # ------------------------------------------------------
+    # Connection / tranzaksiya
+    # ------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None → BEGIN / COMMIT əl ilə idarə olunur
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+
+        self._local.conn = conn
+        self._local.depth = 0
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        İç-içə çağırışlar bir tranzaksiyada birləşir
+        Xəta olarsa bütün mesaj yazmaları geri qaytarılır
+        """
+        conn = self._connect()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute("COMMIT")
+
+    def initialize(self) -> None:
+        self._connect()
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    # ------------------------------------------------------
+    # Müştəri beyni
+    # ------------------------------------------------------
+    def customer_exists(self, user_id: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM customers WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return row is not None
+
+    def load_customer(self, user_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        conn = self._connect()
+        if not self.customer_exists(user_id):
+            return None
+
+        sections = {section: {} for section in SECTIONS}
+        for section, data in conn.execute(
+            "SELECT section, data FROM profile_sections WHERE user_id = ?", (str(user_id),)
+        ):
+            if section in sections:
+                sections[section] = loads(data)
+        return sections
+
+    def _section_data(self, data: Dict[str, Any]):
+        """JSON → kompakt TEXT (mövcud sətirlərlə eyni), binary → BLOB"""
+        if self.serializer is JSON:
+            return json.dumps(data, ensure_ascii=False)
+        return self.serializer.dumps(data, SCHEMA_VERSION)
+
+    def save_customer(self, user_id: str, sections: Dict[str, Dict[str, Any]]) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO customers (user_id, schema_version, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET schema_version = excluded.schema_version, "
+                "updated_at = excluded.updated_at",
+                (str(user_id), SCHEMA_VERSION, datetime.now().isoformat())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO profile_sections (user_id, section, data) VALUES (?, ?, ?)",
+                [
+                    (str(user_id), section, self._section_data(sections.get(section, {})))
+                    for section in SECTIONS
+                ]
+            )
+
+    def count_customers(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+    # ------------------------------------------------------
+    # Konuşmalar
+    # ------------------------------------------------------
+    def append_conversation(self, user_id: str, day: str, entry: Dict[str, Any]) -> None:
+        with self.transaction() as conn:
+            # Gün başına limit YOXDUR - heç bir mesaj səssizcə atılmır
+            conn.execute(
+                "INSERT INTO conversations (user_id, day, timestamp, user_message, bot_response, message_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(user_id), day, entry.get("timestamp", ""), entry.get("user_message"),
+                 entry.get("bot_response"), entry.get("message_type", "text"))
+            )
+
+    def write_batch(self, customers: Dict[str, Dict[str, Dict[str, Any]]],
+                    conversations: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Group commit: batch BİR tranzaksiya; writer-in connection-ı synchronous=FULL (commit = BİR fsync)"""
+        conn = self._connect()
+        if not getattr(self._local, "durable", False):
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.durable = True
+        with self.transaction():
+            for user_id, sections in customers.items():
+                self.save_customer(user_id, sections)
+            conn.executemany(
+                "INSERT INTO conversations (user_id, day, timestamp, user_message, bot_response, message_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (str(user_id), day, entry.get("timestamp", ""), entry.get("user_message"),
+                     entry.get("bot_response"), entry.get("message_type", "text"))
+                    for user_id, day, entry in conversations
+                ]
+            )
+
+    def conversation_history(self, user_id: str, days: int, limit: int = HISTORY_LIMIT,
+                             before: Optional[str] = None) -> List[Dict[str, Any]]:
+        tarixler = history_days(days)
+        if not tarixler:
+            return []
+
+        # ORDER BY (day, id) - idx_conversations_user_day indeksi tərsinə oxunur, sort yoxdur
+        sql = ("SELECT timestamp, user_message, bot_response, message_type FROM conversations "
+               "WHERE user_id = ? AND day BETWEEN ? AND ?")
+        params: List[Any] = [str(user_id), tarixler[-1], tarixler[0]]
+        if before is not None:
+            sql += " AND day <= ? AND timestamp < ?"
+            params += [before[:10], before]
+        rows = self._connect().execute(sql + " ORDER BY day DESC, id DESC LIMIT ?", params + [limit]).fetchall()
+        return [
+            {"timestamp": timestamp, "user_message": user_message,
+             "bot_response": bot_response, "message_type": message_type}
+            for timestamp, user_message, bot_response, message_type in rows
+        ]
+
+    def compact_conversations(self, retention_days: Optional[int] = None) -> Dict[str, int]:
+        """
+        retention_days-dan köhnə mesajları sil. Fayl kiçilmir (VACUUM yoxdur) -
+        boşalan səhifələr SQLite tərəfindən yenidən istifadə olunur, bytes_reclaimed onları göstərir
+        """
+        result = {"expired": 0, "bytes_reclaimed": 0}
+        if not retention_days:
+            return result
+
+        cutoff = (datetime.now().date() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+        conn = self._connect()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        with self.transaction() as conn:
+            result["expired"] = conn.execute("DELETE FROM conversations WHERE day < ?", (cutoff,)).rowcount
+        free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        result["bytes_reclaimed"] = max(0, free_after - free_before) * page_size
+        return result
+
+    # ------------------------------------------------------
+    # Operator handoff
+    # ------------------------------------------------------
+    def load_handoffs(self) -> Dict[HandoffKey, Dict[str, Any]]:
+        return {
+            (company_id, platform, user_id): json.loads(data)
+            for company_id, platform, user_id, data in self._connect().execute(
+                "SELECT company_id, platform, user_id, data FROM operator_handoffs"
+            )
+        }
+
+    def append_handoff(self, key: HandoffKey, record: Optional[Dict[str, Any]]) -> None:
+        # Bir dəyişiklik = bir sətir (WAL özü jurnaldır - snapshot lazım deyil)
+        with self.transaction() as conn:
+            if record is None:
+                conn.execute(
+                    "DELETE FROM operator_handoffs WHERE company_id = ? AND platform = ? AND user_id = ?", key
+                )
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO operator_handoffs (company_id, platform, user_id, data) "
+                    "VALUES (?, ?, ?, ?)",
+                    (*key, json.dumps(record, ensure_ascii=False))
+                )
+
+    # ------------------------------------------------------
+    # Analitika
+    # ------------------------------------------------------
+    def save_analytics(self, daily: Dict[str, Dict[str, int]], meta: Dict[str, Any]) -> None:
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO analytics_daily "
+                "(day, message_count, active_customers, operator_handoffs) VALUES (?, ?, ?, ?)",
+                [
+                    (day, counters.get("message_count", 0), counters.get("active_customers", 0),
+                     counters.get("operator_handoffs", 0))
+                    for day, counters in daily.items()
+                ]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO analytics_meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()]
+            )
+
+    def prune_analytics(self, now: datetime, keep_days: int = ANALYTICS_KEEP_DAYS) -> int:
+        # JSON backend ilə eyni: (now - gün).days > keep_days → sil
+        cutoff = (now - timedelta(days=keep_days + 1)).strftime("%Y-%m-%d")
+        with self.transaction() as conn:
+            return conn.execute(
+                "DELETE FROM analytics_daily WHERE day <= ? AND day != ?", (cutoff, now.strftime("%Y-%m-%d"))
+            ).rowcount
+
+    def get_analytics(self) -> Dict[str, Any]:
+        conn = self._connect()
+        analitik_veri: Dict[str, Any] = {}
+        for day, message_count, active_customers, operator_handoffs in conn.execute(
+            "SELECT day, message_count, active_customers, operator_handoffs FROM analytics_daily ORDER BY day"
+        ):
+            analitik_veri[day] = {
+                "message_count": message_count,
+                "active_customers": active_customers,
+                "operator_handoffs": operator_handoffs
+            }
+        for key, value in conn.execute("SELECT key, value FROM analytics_meta"):
+            analitik_veri[key] = json.loads(value)
+        return analitik_veri
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "path": str(self.db_path), "journal_mode": "wal",
+                "serializer": self.serializer.name}
+
+    # ------------------------------------------------------
+    # JSON qovluğundan köçürmə
+    # ------------------------------------------------------
+    def import_json(self, source: JsonBackend) -> Dict[str, int]:
+        """JSON qovluq strukturundakı bütün verilər → SQLite (BİR tranzaksiya)"""
+        counts = {"customers": 0, "conversations": 0, "handoffs": 0, "analytics_days": 0}
+
+        with self.transaction() as conn:
+            for user_id in source.customer_store.iter_customer_ids():
+                sections = source.load_customer(user_id)
+                if sections is not None:
+                    self.save_customer(user_id, sections)
+                    counts["customers"] += 1
+
+            for user_id, day, entry in source.conversation_log.iter_all():
+                self.append_conversation(user_id, day, entry)
+                counts["conversations"] += 1
+
+            for key, record in source.load_handoffs().items():
+                self.append_handoff(key, record)
+                counts["handoffs"] += 1
+
+            analitik_veri = source.get_analytics()
+            for key, value in analitik_veri.items():
+                if key not in ANALYTICS_META_KEYS and isinstance(value, dict):
+                    conn.execute(
+                        "INSERT OR REPLACE INTO analytics_daily "
+                        "(day, message_count, active_customers, operator_handoffs) VALUES (?, ?, ?, ?)",
+                        (key, value.get("message_count", 0), value.get("active_customers", 0),
+                         value.get("operator_handoffs", 0))
+                    )
+                    counts["analytics_days"] += 1
+                else:
+                    conn.execute("INSERT OR REPLACE INTO analytics_meta (key, value) VALUES (?, ?)",
+                                 (key, json.dumps(value, ensure_ascii=False)))
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON qovluq yaddaşını SQLite-a köçür")
+    parser.add_argument("source", nargs="?", default="app/storage/data/telegram")
+    parser.add_argument("target", nargs="?", default="")
+    args = parser.parse_args()
+
+    source = JsonBackend(Path(args.source))
+    target = SqliteBackend(Path(args.target) if args.target else Path(args.source) / "memory.db")
+    counts = target.import_json(source)
+    target.close()
+    print(f"✅ SQLite-a köçürüldü: {target.db_path} {counts}")
+
+
+if __name__ == "__main__":
+    main()
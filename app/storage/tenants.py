@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MULTI-TENANT YADDAŞ - (company_id, platform) BAŞINA PARTİSİYA
+✅ Hər tenant-ın ÖZ backend-i, müştəri cache-i, handoff registry-si və analitikası var
+   - bir tenant-ın həcmi digərinin lookup-larını yavaşlatmır
+   - statistika tenant-ın öz partisiyasından gəlir (qlobal fayllar süzülmür)
+✅ Default yol: <data_root>/tenants/<platform>/<company_id>
+✅ Köhnə app/storage/data/telegram qovluğu default şirkətin (MEMORY_DEFAULT_COMPANY) telegram tenant-ıdır
+✅ Tenant başqa diskə / backend-ə köçürülə bilər (MEMORY_TENANTS_FILE, JSON):
+    {"real_company:telegram": {"backend": "sqlite", "path": "/mnt/disk2/real_company",
+                               "sqlite_path": "/mnt/disk2/real_company/memory.db", "serializer": "binary"}}
+✅ Tenant-lar ilk müraciətdə yaradılır (lazy); yüklənmiş tenant sayı məhduddur (max_tenants, LRU) -
+   istifadədə olmayan ən köhnə tenant bağlanır (flush + thread-lər dayanır), default tenant çıxarılmır
+   - əməliyyatlar registry.use() ilə: refcount > 0 olan tenant bağlanmır
+✅ company_id "default" → default şirkət (API-nin default dəyəri bot ilə eyni partisiyaya düşür)
+✅ Group commit (default aktiv): tenant-ın yazmaları öz writer thread-ində batch-lərlə commit olunur
+   (tenant konfiqurasiyasında "group_commit": false → sinxron yazma)
+"""
+
+import atexit
+import json
+import string
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, wait as wait_futures
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from app.storage.analytics import AnalyticsAggregator
+from app.storage.backend import StorageBackend, create_backend
+from app.storage.customer_cache import CustomerCache
+from app.storage.group_commit import GroupCommitWriter, completed
+from app.storage.handoff_registry import HandoffRegistry
+
+TenantKey = Tuple[str, str]
+
+DEFAULT_PLATFORM = "telegram"
+TENANTS_DIR = "tenants"
+DEFAULT_ALIAS = "default"
+
+# Qovluq adında olduğu kimi qalan simvollar - qalanı %XX (böyük hərflər də: case-insensitive FS)
+_PLAIN_CHARS = frozenset(string.ascii_lowercase + string.digits + "_-")
+
+
+def _safe_name(value: str) -> str:
+    """
+    company / platform adı → qovluq adı: geri çevrilə bilən, toqquşmasız
+    ("acme shop" → acme%20shop, "acme_shop" → acme_shop, "Acme" → %41cme, ".." → %2E%2E)
+    """
+    name = "".join(ch if ch in _PLAIN_CHARS else quote(ch, safe="") if not ch.isascii() else f"%{ord(ch):02X}"
+                   for ch in str(value))
+    return name or "%"
+
+
+def _unsafe_name(name: str) -> str:
+    """_safe_name-in tərsi (diskdəki qovluq adı → company / platform)"""
+    return unquote(name) if name != "%" else ""
+
+
+class Tenant:
+    """Bir (company, platform) partisiyası"""
+
+    def __init__(self, company_id: str, platform: str, storage: StorageBackend,
+                 cache_size: int = 1024, cache_flush_interval: float = 5.0,
+                 analytics_flush_interval: float = 30.0, group_commit_window: Optional[float] = None):
+        self.company_id = company_id
+        self.platform = platform
+        self.storage = storage
+        # Registry.use() sayğacı (registry lock-u altında dəyişir)
+        self.refs = 0
+        self.storage.initialize()
+        # Writer cache-dən ƏVVƏL yaradılır: atexit-də cache əvvəl flush edir, writer sonra bağlanır
+        self.writer: Optional[GroupCommitWriter] = None
+        if group_commit_window is not None:
+            self.writer = GroupCommitWriter(storage, window=group_commit_window,
+                                            name=f"group-commit-{company_id}-{platform}")
+        self.customer_cache = CustomerCache(storage, maxsize=cache_size, flush_interval=cache_flush_interval,
+                                            company_id=company_id, platform=platform, writer=self.writer)
+        self.handoff_registry = HandoffRegistry(storage)
+        self.analytics = AnalyticsAggregator(storage, flush_interval=analytics_flush_interval)
+
+    @property
+    def key(self) -> TenantKey:
+        return (self.company_id, self.platform)
+
+    # ------------------------------------------------------
+    # Yazma / oxuma (group commit varsa onun üzərindən)
+    # ------------------------------------------------------
+    def transaction(self):
+        """Mesajın yazmaları: writer varsa batch özü tranzaksiyadır, yoxsa backend tranzaksiyası"""
+        return nullcontext() if self.writer is not None else self.storage.transaction()
+
+    def append_conversation(self, user_id: str, day: str, entry: Dict[str, Any]) -> Future:
+        """Future: konuşma commit olunanda tamamlanır"""
+        if self.writer is not None:
+            return self.writer.append_conversation(user_id, day, entry)
+        self.storage.append_conversation(user_id, day, entry)
+        return completed()
+
+    def wait_for_writes(self, user_id: str) -> None:
+        """Oxumadan əvvəl: istifadəçinin növbədəki yazmaları commit olunsun"""
+        if self.writer is not None:
+            self.writer.wait(user_id)
+
+    def close(self) -> None:
+        """Registry-dən çıxarılanda: cache → writer → handoff/analitika → backend; thread-lər dayanır"""
+        self.customer_cache.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.handoff_registry.snapshot()
+        self.analytics.flush()
+        self.storage.close()
+        # atexit qeydləri bağlanmış obyektləri yaddaşda saxlamasın
+        atexit.unregister(self.customer_cache.close)
+        atexit.unregister(self.handoff_registry.snapshot)
+        atexit.unregister(self.analytics.flush)
+        if self.writer is not None:
+            atexit.unregister(self.writer.close)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "company_id": self.company_id,
+            "platform": self.platform,
+            "total_customers": self.analytics.total_customers,
+            "today_messages": self.analytics.today()["message_count"],
+            "last_update": self.analytics.last_update,
+            "storage": self.storage.stats(),
+            "customer_cache": self.customer_cache.stats(),
+            "operator_handoffs": self.handoff_registry.stats(),
+            "analytics": self.analytics.stats(),
+            "group_commit": self.writer.stats() if self.writer is not None else None
+        }
+
+
+class TenantRegistry:
+    """
+    use(company_id, platform) → with ... as tenant (yoxdursa yaradılır, istifadə müddətində refcount)
+    Boş / "default" company_id → default_company, boş platform → telegram
+    max_tenants-dan çox tenant yüklənəndə istifadədə olmayan ən köhnəsi bağlanır (default tenant qalır)
+    """
+
+    def __init__(self, data_root: Path, legacy_path: Optional[Path] = None,
+                 default_company: str = "real_company", config_path: Optional[Path] = None,
+                 cache_size: int = 1024, cache_flush_interval: float = 5.0,
+                 analytics_flush_interval: float = 30.0, group_commit_window: Optional[float] = 0.002,
+                 max_tenants: int = 32):
+        self.data_root = Path(data_root)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.default_company = default_company
+        self.cache_size = cache_size
+        self.cache_flush_interval = cache_flush_interval
+        self.analytics_flush_interval = analytics_flush_interval
+        # None → group commit söndürülüb
+        self.group_commit_window = group_commit_window
+        self.max_tenants = max(1, max_tenants)
+        self.config = self._load_config(config_path)
+
+        self._tenants: "OrderedDict[TenantKey, Tenant]" = OrderedDict()
+        # Yaradılan / bağlanan tenant-lar: açar → Future (bitəndə tamamlanır)
+        self._pending: Dict[TenantKey, Future] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @staticmethod
+    def _load_config(config_path: Optional[Path]) -> Dict[TenantKey, Dict[str, Any]]:
+        config: Dict[TenantKey, Dict[str, Any]] = {}
+        if not config_path or not Path(config_path).exists():
+            return config
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Tenant konfiqurasiyası oxuna bilmədi: {config_path} ({e})")
+            return config
+        for name, options in data.items():
+            company_id, _, platform = name.partition(":")
+            config[(company_id, platform or DEFAULT_PLATFORM)] = options or {}
+        return config
+
+    # ------------------------------------------------------
+    # Açar / yol
+    # ------------------------------------------------------
+    def key(self, company_id: str = "", platform: str = "") -> TenantKey:
+        company_id = str(company_id or "")
+        if not company_id or company_id == DEFAULT_ALIAS:
+            company_id = self.default_company
+        return (company_id, str(platform or DEFAULT_PLATFORM))
+
+    @property
+    def default_key(self) -> TenantKey:
+        return (self.default_company, DEFAULT_PLATFORM)
+
+    def base_path(self, key: TenantKey) -> Path:
+        company_id, platform = key
+        options = self.config.get(key, {})
+        if options.get("path"):
+            return Path(options["path"])
+        if self.legacy_path and key == self.default_key:
+            return self.legacy_path
+        return self.data_root / TENANTS_DIR / _safe_name(platform) / _safe_name(company_id)
+
+    # ------------------------------------------------------
+    # Tenant-lar
+    # ------------------------------------------------------
+    @contextmanager
+    def use(self, company_id: str = "", platform: str = "") -> Iterator[Tenant]:
+        """Əməliyyat müddətində tenant istifadədədir - LRU onu bağlamır"""
+        tenant = self.acquire(company_id, platform)
+        try:
+            yield tenant
+        finally:
+            self.release(tenant)
+
+    def get(self, company_id: str = "", platform: str = "") -> Tenant:
+        """Refcount-suz: yalnız qısa baxış / default tenant üçün (əməliyyatlar use() ilə)"""
+        tenant = self.acquire(company_id, platform)
+        self.release(tenant)
+        return tenant
+
+    def acquire(self, company_id: str = "", platform: str = "") -> Tenant:
+        """
+        Tenant-ı götür (refs += 1), yoxdursa yarat
+        🚨 Yaratma (backend initialize, jurnal / analitika yükləmə) registry lock-undan KƏNARDA:
+           açar üçün Future yer tutur - eyni açarı istəyənlər onu gözləyir, digər tenant-lar gözləmir
+        🚨 Bağlanan tenant da Future ilə görünür - bağlanma bitənə qədər təkrar yaradılmır
+        """
+        key = self.key(company_id, platform)
+        while True:
+            with self._lock:
+                tenant = self._tenants.get(key)
+                if tenant is not None:
+                    self._tenants.move_to_end(key)
+                    tenant.refs += 1
+                    return tenant
+                pending = self._pending.get(key)
+                owner = pending is None
+                if owner:
+                    pending = self._pending[key] = Future()
+            if owner:
+                break
+            wait_futures([pending])
+
+        try:
+            tenant = self._create(key)
+        except BaseException:
+            with self._lock:
+                del self._pending[key]
+            pending.set_result(None)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            tenant.refs += 1
+            self._tenants[key] = tenant
+            evicted = self._evict_locked()
+        pending.set_result(tenant)
+        self._close_evicted(evicted)
+        return tenant
+
+    def release(self, tenant: Tenant) -> None:
+        with self._lock:
+            tenant.refs -= 1
+            evicted = self._evict_locked() if len(self._tenants) > self.max_tenants else []
+        self._close_evicted(evicted)
+
+    def _evict_locked(self) -> List[Tuple[Tenant, Future]]:
+        """_lock altında: limitdən artıq, istifadədə olmayan ən köhnə tenant-lar (default qalır)"""
+        evicted = []
+        while len(self._tenants) > self.max_tenants:
+            victim = next((key for key, tenant in self._tenants.items()
+                           if key != self.default_key and tenant.refs == 0), None)
+            if victim is None:
+                # Hamısı istifadədədir - növbəti release-də yenidən yoxlanılır
+                break
+            closing = self._pending[victim] = Future()
+            evicted.append((self._tenants.pop(victim), closing))
+            self.evictions += 1
+        return evicted
+
+    def _close_evicted(self, evicted: List[Tuple[Tenant, Future]]) -> None:
+        """Bağlama (flush / thread join) registry lock-undan kənarda; bitəndə açar azad olur"""
+        for old, closing in evicted:
+            print(f"🏢 Tenant bağlandı (LRU): {old.company_id}/{old.platform}")
+            try:
+                old.close()
+            except Exception as e:
+                print(f"⚠️ Tenant bağlana bilmədi: {old.company_id}/{old.platform} ({e})")
+            finally:
+                with self._lock:
+                    del self._pending[old.key]
+                closing.set_result(None)
+
+    def _create(self, key: TenantKey) -> Tenant:
+        options = self.config.get(key, {})
+        base_path = self.base_path(key)
+        sqlite_path = options.get("sqlite_path")
+        if sqlite_path:
+            sqlite_path = Path(sqlite_path)
+        elif not (self.legacy_path and base_path == self.legacy_path):
+            # MEMORY_SQLITE_PATH yalnız köhnə (default) tenant üçündür - digərləri öz qovluğunda
+            sqlite_path = base_path / "memory.db"
+        storage = create_backend(kind=options.get("backend"), base_path=base_path, sqlite_path=sqlite_path,
+                                 serializer=options.get("serializer"))
+        print(f"🏢 Tenant yükləndi: {key[0]}/{key[1]} ({storage.name}, {base_path})")
+        group_commit_window = self.group_commit_window
+        if not options.get("group_commit", True):
+            group_commit_window = None
+        return Tenant(key[0], key[1], storage,
+                      cache_size=int(options.get("cache_size", self.cache_size)),
+                      cache_flush_interval=self.cache_flush_interval,
+                      analytics_flush_interval=self.analytics_flush_interval,
+                      group_commit_window=group_commit_window)
+
+    def loaded(self) -> List[Tenant]:
+        with self._lock:
+            return list(self._tenants.values())
+
+    def known_keys(self) -> List[TenantKey]:
+        """Yüklənmiş + konfiqurasiyadakı + diskdəki tenant-lar (cleanup kimi toplu işlər üçün)"""
+        with self._lock:
+            keys = set(self._tenants) | set(self.config)
+        if self.legacy_path and self.legacy_path.exists():
+            keys.add(self.default_key)
+        tenants_dir = self.data_root / TENANTS_DIR
+        if tenants_dir.exists():
+            for platform_dir in tenants_dir.iterdir():
+                if platform_dir.is_dir():
+                    for company_dir in platform_dir.iterdir():
+                        if company_dir.is_dir():
+                            keys.add((_unsafe_name(company_dir.name), _unsafe_name(platform_dir.name)))
+        return sorted(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        return {f"{tenant.company_id}:{tenant.platform}": tenant.stats() for tenant in self.loaded()}